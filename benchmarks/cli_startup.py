@@ -0,0 +1,70 @@
+# coding: utf-8
+
+"""
+Benchmark of the command line interface startup time. Each command is run
+in a fresh interpreter, the publisher manifest being removed before the
+'cold' runs.
+
+Usage: python benchmarks/cli_startup.py [--runs N] [--niamoto_home PATH]
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+
+COMMANDS = [
+    ['--help'],
+    ['status', '--help'],
+    ['publishers'],
+    ['publish', '--help'],
+    ['publish', 'occurrences', '--help'],
+]
+
+
+def run_command(args, env):
+    t = time.perf_counter()
+    subprocess.run(
+        [sys.executable, '-m', 'niamoto.bin.cli'] + args,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        check=True,
+    )
+    return time.perf_counter() - t
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--niamoto_home', default=None)
+    options = parser.parse_args()
+    env = dict(os.environ)
+    if options.niamoto_home is not None:
+        env['NIAMOTO_HOME'] = options.niamoto_home
+    from niamoto.constants import DEFAULT_NIAMOTO_HOME
+    manifest_path = os.path.join(
+        env.get('NIAMOTO_HOME', DEFAULT_NIAMOTO_HOME),
+        'cache',
+        'publishers.json'
+    )
+    print("{:<35} {:>10} {:>10}".format('command', 'cold (s)', 'warm (s)'))
+    for args in COMMANDS:
+        cold = []
+        for i in range(options.runs):
+            if os.path.exists(manifest_path):
+                os.remove(manifest_path)
+            cold.append(run_command(args, env))
+        warm = [run_command(args, env) for i in range(options.runs)]
+        print("{:<35} {:>10.3f} {:>10.3f}".format(
+            ' '.join(args),
+            statistics.median(cold),
+            statistics.median(warm),
+        ))
+
+
+if __name__ == '__main__':
+    main()
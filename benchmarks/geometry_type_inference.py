@@ -0,0 +1,79 @@
+# coding: utf-8
+
+"""
+Benchmark of the geometry type inference of GeoSQLTable, on homogeneous
+and mixed-type layers: vectorized inference versus the previous per type
+isinstance scans.
+
+Usage: python benchmarks/geometry_type_inference.py [--size N]
+"""
+
+import time
+import argparse
+
+import numpy as np
+import geopandas as gpd
+from shapely.geometry import Point, LineString, Polygon, MultiPoint, \
+    MultiLineString, MultiPolygon, GeometryCollection
+
+from niamoto.data_publishers.utils.geo_pandas_sql import \
+    get_geometry_type_and_srid
+
+
+def legacy_geometry_type(col):
+    """
+    Previous implementation: one isinstance scan per geometry type.
+    """
+    types = [
+        (Point, 'POINT'),
+        (LineString, 'LINESTRING'),
+        (Polygon, 'POLYGON'),
+        (MultiPoint, 'MULTIPOINT'),
+        (MultiLineString, 'MULTILINESTRING'),
+        (MultiPolygon, 'MULTIPOLYGON'),
+        (GeometryCollection, 'GEOMETRYCOLLECTION'),
+    ]
+    for geom_class, name in types:
+        if all(isinstance(item, geom_class) or not item for item in col):
+            return name
+    return 'GEOMETRY'
+
+
+def make_layer(size, mixed):
+    rng = np.random.RandomState(0)
+    xy = rng.uniform(-180, 180, size=(size, 2))
+    polygons = [
+        Polygon([(x, y), (x + 1, y), (x + 1, y + 1)]) for x, y in xy
+    ]
+    if mixed:
+        # The odd type comes last, the worst case of the legacy scans
+        polygons[-1] = MultiPolygon([polygons[-1]])
+    return gpd.GeoSeries(polygons, crs={'init': 'epsg:4326'})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size', type=int, default=1000000)
+    options = parser.parse_args()
+    print("{:<12} {:>12} {:>14} {:>10}".format(
+        'layer', 'legacy (s)', 'vectorized (s)', 'type'
+    ))
+    for mixed in [False, True]:
+        layer = make_layer(options.size, mixed)
+        t = time.perf_counter()
+        legacy_type = legacy_geometry_type(layer)
+        legacy = time.perf_counter() - t
+        t = time.perf_counter()
+        geometry_type, srid = get_geometry_type_and_srid(layer)
+        vectorized = time.perf_counter() - t
+        assert legacy_type == geometry_type
+        print("{:<12} {:>12.3f} {:>14.3f} {:>10}".format(
+            'mixed' if mixed else 'homogeneous',
+            legacy,
+            vectorized,
+            geometry_type,
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+# coding: utf-8
+
+"""
+Benchmark of the provider taxon id mapping: SynonymMap (sorted int64
+arrays, searchsorted lookup) versus Series.map on the Series returned by
+TaxonomyManager.get_synonyms_for_key.
+
+Usage: python benchmarks/synonym_map.py [--taxa N] [--occurrences N]
+"""
+
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from niamoto.taxonomy.synonym_map import SynonymMap
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--taxa', type=int, default=50000)
+    parser.add_argument('--occurrences', type=int, default=5000000)
+    options = parser.parse_args()
+    rng = np.random.RandomState(0)
+    provider_taxon_ids = rng.permutation(options.taxa * 2)[:options.taxa]
+    synonyms = pd.Series(
+        np.arange(options.taxa),
+        index=pd.Index(provider_taxon_ids, name='provider_taxon_id'),
+    )
+    # Some occurrences have no synonym or no taxon
+    ids = rng.randint(0, options.taxa * 2, options.occurrences)
+    ids = pd.Series(ids.astype(np.float64))
+    ids[::100] = np.nan
+    t = time.perf_counter()
+    expected = ids.map(synonyms)
+    series_map = time.perf_counter() - t
+    t = time.perf_counter()
+    synonym_map = SynonymMap.from_series(synonyms)
+    build = time.perf_counter() - t
+    t = time.perf_counter()
+    result = synonym_map.map_series(ids)
+    lookup = time.perf_counter() - t
+    assert np.array_equal(
+        result.values, expected.values.astype(np.float64), equal_nan=True
+    )
+    print("{:<24} {:>10}".format('', 'time (s)'))
+    print("{:<24} {:>10.3f}".format('Series.map', series_map))
+    print("{:<24} {:>10.3f}".format('SynonymMap (build)', build))
+    print("{:<24} {:>10.3f}".format('SynonymMap (lookup)', lookup))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+# coding: utf-8
+
+"""
+Occurrence and plot properties API module.
+"""
+
+from niamoto.db.property_catalog import PropertyCatalog
+
+
+def get_property_catalog(entity=None):
+    """
+    :param entity: 'occurrence' or 'plot'. If None, return the catalog
+        entries of both entities.
+    :return: A pandas DataFrame containing the property key catalog.
+    """
+    return PropertyCatalog.get_catalog(entity=entity)
+
+
+def refresh_property_catalog(entity, provider_id=None):
+    """
+    Rebuild the property key catalog of an entity from its properties.
+    :param entity: 'occurrence' or 'plot'.
+    :param provider_id: If not None, only refresh the entries of this
+        provider.
+    """
+    PropertyCatalog.refresh(entity, provider_id=provider_id)
+
+
+def get_promoted_properties(entity=None):
+    """
+    :param entity: 'occurrence' or 'plot'. If None, return the promoted
+        properties of both entities.
+    :return: A pandas DataFrame containing the promoted properties.
+    """
+    return PropertyCatalog.get_promoted_properties(entity=entity)
+
+
+def promote_property(entity, key, value_type=None):
+    """
+    Promote a property to an indexed typed column. The typed extraction
+    expression of the property is indexed, the index is used by the
+    publishers when filtering on the property.
+    :param entity: 'occurrence' or 'plot'.
+    :param key: The property key.
+    :param value_type: The type of the property ('number', 'boolean' or
+        'string'). If None, use the catalogued type.
+    :return: The name of the created index.
+    """
+    return PropertyCatalog.promote(entity, key, value_type=value_type)
+
+
+def demote_property(entity, key):
+    """
+    Demote a promoted property, i.e. drop its index.
+    :param entity: 'occurrence' or 'plot'.
+    :param key: The property key.
+    """
+    PropertyCatalog.demote(entity, key)
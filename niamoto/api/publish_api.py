@@ -2,6 +2,7 @@
 
 import sys
 
+from niamoto.data_publishers import load_publisher
 from niamoto.data_publishers.base_data_publisher import PUBLISHER_REGISTRY
 from niamoto.exceptions import WrongPublisherKeyError, \
     UnavailablePublishFormat
@@ -33,6 +34,34 @@ def publish(publisher_key, publish_format, *args, destination=sys.stdout,
     )
 
 
+def process_r_publishers(publisher_keys, processes=None):
+    """
+    Api method for processing several R publishers in parallel, in the
+    shared pool of R worker processes.
+    :param publisher_keys: The keys of the R publishers.
+    :param processes: The number of worker processes, only used when the
+        pool is created.
+    :return: A dict mapping each publisher key to the data to be published,
+        the publish args and the publish kwargs.
+    """
+    from niamoto.data_publishers.r_data_publisher import RDataPublisher
+    from niamoto.data_publishers.r_worker_pool import get_r_worker_pool
+    publishers = []
+    for publisher_key in publisher_keys:
+        publisher_class = get_publisher_class(publisher_key)
+        if not issubclass(publisher_class, RDataPublisher):
+            m = "The publisher '{}' is not a R publisher."
+            raise WrongPublisherKeyError(m.format(publisher_key))
+        publishers.append(publisher_class())
+    pool = get_r_worker_pool(processes=processes)
+    results = [
+        pool.submit(p.r_script_path, exchange=p.exchange) for p in publishers
+    ]
+    return {
+        k: result.get() for k, result in zip(publisher_keys, results)
+    }
+
+
 def list_publish_formats(publisher_key):
     """
     Return the publish formats accepted by a publisher.
@@ -45,10 +74,12 @@ def list_publish_formats(publisher_key):
 
 def get_publisher_class(publisher_key):
     """
-    Return a publisher class from its key.
+    Return a publisher class from its key, loading it if needed.
     :param publisher_key: The key of the publisher.
     :return: The publisher class corresponding to the key.
     """
+    if publisher_key not in PUBLISHER_REGISTRY:
+        load_publisher(publisher_key)
     if publisher_key not in PUBLISHER_REGISTRY:
         m = "The publisher key '{}' does not exist.".format(publisher_key)
         raise WrongPublisherKeyError(m)
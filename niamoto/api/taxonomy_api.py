@@ -9,7 +9,6 @@ from niamoto.taxonomy.taxonomy_manager import TaxonomyManager
 from niamoto.db import metadata as niamoto_db_meta
 from niamoto.db.connector import Connector
 from niamoto.api.data_provider_api import get_data_provider_list
-from niamoto.data_providers.base_data_provider import PROVIDER_REGISTRY
 from niamoto.exceptions import DataSourceNotFoundError
 from niamoto.log import get_logger
 
@@ -33,7 +32,7 @@ def set_taxonomy(csv_file_path):
     must therefore be integers corresponding to the corresponding value in the
     referential pointed by the synonym key.
     :param csv_file_path: The csv file path.
-    :return: (number_of_taxon_inserted, synonyms_registered)
+    :return: (number_of_taxon_inserted_or_updated, synonyms_registered)
     """
     if not os.path.exists(csv_file_path) or os.path.isdir(csv_file_path):
         raise DataSourceNotFoundError(
@@ -43,26 +42,66 @@ def set_taxonomy(csv_file_path):
     return TaxonomyManager.set_taxonomy(dataframe)
 
 
+def set_synonyms(csv_file_path, synonym_key, replace=False,
+                 register_key=False):
+    """
+    Load the synonyms of a synonym key from a csv file.
+    The csv must have a header and it must contains the following columns:
+    - taxon_id: The id of the taxon, in Niamoto's referential.
+    - provider_taxon_id: The id of the taxon in the referential pointed by
+                         the synonym key.
+    :param csv_file_path: The csv file path.
+    :param synonym_key: The synonym key.
+    :param replace: If True, remove the synonyms of the key that are not in
+        the csv file.
+    :param register_key: If True, register the synonym key if it is not
+        registered yet.
+    :return: The number of taxa whose synonym had been set.
+    """
+    if not os.path.exists(csv_file_path) or os.path.isdir(csv_file_path):
+        raise DataSourceNotFoundError(
+            "The csv file '{}' had not been found.".format(csv_file_path)
+        )
+    dataframe = pd.read_csv(csv_file_path)
+    with Connector.get_connection() as connection:
+        with connection.begin():
+            if register_key and synonym_key not in set(
+                    TaxonomyManager.get_synonym_keys()['name']):
+                TaxonomyManager.register_synonym_key(
+                    synonym_key,
+                    bind=connection
+                )
+            return TaxonomyManager.set_synonym_data(
+                synonym_key,
+                dataframe,
+                replace=replace,
+                connection=connection,
+            )
+
+
 def map_all_synonyms():
     """
     Update the synonym mapping for every data provider registered in the
-    database.
+    database, in a single statement (see
+    TaxonomyManager.map_occurrence_synonyms).
     """
     data_providers = get_data_provider_list()
+    if len(data_providers) == 0:
+        return data_providers
+    stats = TaxonomyManager.map_occurrence_synonyms()
     for i, record in data_providers.iterrows():
-        name = record['name']
-        provider_type = record['provider_type']
-        synonym_key = record['synonym_key']
-        data_provider = PROVIDER_REGISTRY[provider_type]['class'](name)
-        m, s = data_provider.occurrence_provider.update_synonym_mapping()
+        mapped, total = 0, 0
+        if i in stats.index:
+            mapped = stats.loc[i, 'mapped']
+            total = stats.loc[i, 'total']
         msg = "DataProvider(provider_type='{}', name='{}', synonym_key='{}'" \
               "): {} taxa had been mapped, over {} occurrences."
         LOGGER.info(msg.format(
-            provider_type,
-            name,
-            synonym_key,
-            len(m[m.notnull()]),
-            len(m),
+            record['provider_type'],
+            record['name'],
+            record['synonym_key'],
+            mapped,
+            total,
         ))
     return data_providers
 
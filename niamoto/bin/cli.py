@@ -19,10 +19,10 @@ from niamoto.bin.commands.data_provider import list_data_provider_types, \
     list_data_providers, add_data_provider, delete_data_provider, sync, \
     update_data_provider_cli
 from niamoto.bin.commands.taxonomy import set_taxonomy_cli, \
-    map_all_synonyms_cli, get_synonym_keys_cli
+    set_synonyms_cli, map_all_synonyms_cli, get_synonym_keys_cli
 from niamoto.bin.commands.status import get_general_status_cli
 from niamoto.bin.commands.publish import publish_cli, list_publishers_cli, \
-    list_publish_formats_cli, init_publish_cli
+    list_publish_formats_cli
 from niamoto.bin.commands.data_marts import list_dimension_types_cli, \
     list_dimensions_cli, list_fact_tables_cli, create_vector_dim_cli, \
     create_fact_table_cli, delete_dimension_cli, delete_fact_table_cli, \
@@ -59,8 +59,6 @@ def niamoto_cli(context, niamoto_home=None):
     try:
         conf.set_niamoto_home()
         conf.set_settings()
-        if context.invoked_subcommand == 'publish':
-            init_publish_cli()
     except Exception as err:
         LOGGER.debug(str(err))
         raise
@@ -95,6 +93,7 @@ niamoto_cli.add_command(sync)
 
 # Taxonomy commands
 niamoto_cli.add_command(set_taxonomy_cli)
+niamoto_cli.add_command(set_synonyms_cli)
 niamoto_cli.add_command(map_all_synonyms_cli)
 niamoto_cli.add_command(get_synonym_keys_cli)
 
@@ -128,6 +127,7 @@ display_dict["General commands"] = [
 ]
 display_dict["Taxonomy commands"] = [
     set_taxonomy_cli,
+    set_synonyms_cli,
     map_all_synonyms_cli,
     get_synonym_keys_cli,
 ]
@@ -1,7 +1,6 @@
 # coding: utf-8
 
 import sys
-import inspect
 
 import click
 
@@ -26,7 +25,92 @@ def make_publish_format_func(publish_key, publish_format):
     return func
 
 
-@click.group("publish")
+#  Click types of the publisher parameters, by type name
+PARAMETER_TYPES = {
+    'str': str,
+    'int': int,
+    'float': float,
+    'bool': bool,
+}
+
+
+def add_parameters(func, parameters):
+    """
+    Add the click arguments and options described in the publisher manifest
+    to a command function.
+    """
+    for p in parameters:
+        if p['kind'] == 'argument':
+            func = click.argument(p['name'])(func)
+        else:
+            arg_type = PARAMETER_TYPES.get(p['type'], str)
+            func = click.option(
+                "--" + p['name'],
+                type=arg_type,
+                default=p['default'],
+                help=p['help'],
+                is_flag=(arg_type == bool),
+            )(func)
+    return func
+
+
+def make_publisher_group(pub_key, publisher, publish_formats):
+    """
+    Build the click group of a publisher, from its manifest description.
+    """
+    @click.pass_context
+    @cli_catch_unknown_error
+    def group(ctx, **kwargs):
+        ctx.obj = kwargs
+
+    group = add_parameters(group, publisher['parameters'])
+    group = click.group(
+        pub_key,
+        context_settings={'ignore_unknown_options': True, },
+        help=publisher['description'],
+    )(group)
+    for pub_format in publisher['publish_formats']:
+        format_desc = publish_formats[pub_format]
+        f = make_publish_format_func(pub_key, pub_format)
+        f = add_parameters(f, format_desc['parameters'])
+        group.command(
+            pub_format,
+            help=format_desc['help'],
+        )(f)
+    return group
+
+
+class PublishGroup(click.Group):
+    """
+    Click group whose publisher commands are built on demand from the
+    publisher manifest, without importing the publisher modules.
+    """
+
+    def list_commands(self, ctx):
+        from niamoto.data_publishers.publisher_manifest import get_manifest
+        publishers = get_manifest()['publishers']
+        return sorted([
+            k for k, p in publishers.items() if len(p['publish_formats']) > 0
+        ])
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name in self.commands:
+            return self.commands[cmd_name]
+        from niamoto.data_publishers.publisher_manifest import get_manifest
+        manifest = get_manifest()
+        publisher = manifest['publishers'].get(cmd_name, None)
+        if publisher is None or len(publisher['publish_formats']) == 0:
+            return None
+        group = make_publisher_group(
+            cmd_name,
+            publisher,
+            manifest['publish_formats']
+        )
+        self.add_command(group)
+        return group
+
+
+@click.group("publish", cls=PublishGroup)
 def publish_cli():
     """
     Publish data using a data publisher.
@@ -35,97 +119,13 @@ def publish_cli():
 
 
 def init_publish_cli():
-    from niamoto.data_publishers.base_data_publisher import BaseDataPublisher
-    from niamoto.data_publishers.base_data_publisher import PUBLISHER_REGISTRY
-    from niamoto.utils import parse_docstring
-
-    publish_commands = {}
-
-    for pub_key in PUBLISHER_REGISTRY.keys():
-
-        publisher = PUBLISHER_REGISTRY[pub_key]['class']
-
-        try:
-            formats = publisher.get_publish_formats()
-            if len(formats) == 0:
-                continue
-        except NotImplementedError:
-            continue
-
-        @click.pass_context
-        @cli_catch_unknown_error
-        def group(ctx, **kwargs):
-            ctx.obj = kwargs
-
-        signature = inspect.signature(publisher._process)
-        doc = parse_docstring(publisher._process.__doc__)
-
-        for p_key, p in signature.parameters.items():
-            if p_key == 'self':
-                continue
-            if p.kind == inspect.Parameter.POSITIONAL_OR_KEYWORD:
-                group = click.argument(p_key)(group)
-            elif p.kind == inspect.Parameter.KEYWORD_ONLY:
-                h = ""
-                if p_key in doc['params']:
-                    h = doc['params'][p_key].replace("\n", " ")
-                default = p.default
-                arg_type = str
-                if default is not None:
-                    arg_type = type(default)
-                flag = False
-                if arg_type == bool:
-                    flag = True
-                group = click.option(
-                    "--" + p_key,
-                    type=arg_type,
-                    default=default,
-                    help=h,
-                    is_flag=flag,
-                )(group)
-
-        group = publish_cli.group(
-            pub_key,
-            context_settings={'ignore_unknown_options': True, },
-            help=publisher.get_description(),
-        )(group)
-
-        publish_formats = publisher.get_publish_formats()
-        for pub_format in publish_formats:
-            format_method = BaseDataPublisher.FORMAT_TO_METHOD[pub_format]
-            signature = inspect.signature(format_method)
-            format_doc = parse_docstring(format_method.__doc__)
-            f = make_publish_format_func(pub_key, pub_format)
-            for p_key, p in signature.parameters.items():
-                if p_key in ['data', 'destination']:
-                    continue
-                if p.kind == inspect.Parameter.POSITIONAL_OR_KEYWORD:
-                    f = click.argument(p_key)(f)
-                elif p.kind == inspect.Parameter.KEYWORD_ONLY:
-                    h = ""
-                    if p_key in format_doc['params']:
-                        h = format_doc['params'][p_key].replace("\n", " ")
-                    default = p.default
-                    arg_type = str
-                    if default is not None:
-                        arg_type = type(default)
-                    flag = False
-                    if arg_type == bool:
-                        flag = True
-                    f = click.option(
-                        "--" + p_key,
-                        type=arg_type,
-                        default=default,
-                        help=h,
-                        is_flag=flag,
-                    )(f)
-
-            group.command(
-                pub_format,
-                help=format_doc['short_description'],
-            )(f)
-
-        publish_commands[pub_key] = group
+    """
+    Reset the publisher commands, and rebuild the publisher manifest if it
+    is out of date. The commands are built on demand.
+    """
+    from niamoto.data_publishers.publisher_manifest import get_manifest
+    publish_cli.commands.clear()
+    get_manifest()
 
 
 @click.command("publishers")
@@ -134,13 +134,14 @@ def list_publishers_cli():
     """
     Display the list of available data publishers.
     """
-    from niamoto.data_publishers.base_data_publisher import PUBLISHER_REGISTRY
-    max_length = max([len(i) for i in PUBLISHER_REGISTRY.keys()])
-    for k in PUBLISHER_REGISTRY.keys():
+    from niamoto.data_publishers.publisher_manifest import get_manifest
+    publishers = get_manifest()['publishers']
+    max_length = max([len(i) for i in publishers.keys()])
+    for k in publishers.keys():
         click.echo(
             "    {} :   {}".format(
                 k.ljust(max_length),
-                PUBLISHER_REGISTRY[k]['description']
+                publishers[k]['description']
             )
         )
 
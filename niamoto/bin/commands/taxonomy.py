@@ -17,7 +17,7 @@ def set_taxonomy_cli(csv_file_path, no_mapping=False):
     click.secho("Setting the taxonomy...")
     nb, synonyms = taxonomy_api.set_taxonomy(csv_file_path)
     click.secho("The taxonomy had been successfully set!")
-    click.secho("    {} taxa inserted".format(nb), fg='green')
+    click.secho("    {} taxa inserted or updated".format(nb), fg='green')
     click.secho(
         "    {} synonyms inserted: {}".format(len(synonyms), synonyms),
         fg='green',
@@ -30,6 +30,40 @@ def set_taxonomy_cli(csv_file_path, no_mapping=False):
         map_all_synonyms_cli.invoke(click.Context(map_all_synonyms_cli))
 
 
+@click.command('set_synonyms')
+@click.argument('csv_file_path')
+@click.argument('synonym_key')
+@click.option('--replace', is_flag=True, default=False,
+              help="Remove the synonyms of the key that are not in the "
+                   "csv file.")
+@click.option('--register', is_flag=True, default=False,
+              help="Register the synonym key if it does not exist.")
+@click.option('--no_mapping', type=bool, default=False)
+@cli_catch_unknown_error
+def set_synonyms_cli(csv_file_path, synonym_key, replace=False,
+                     register=False, no_mapping=False):
+    """
+    Load the synonyms of a synonym key from a csv file with a 'taxon_id'
+    and a 'provider_taxon_id' column.
+    """
+    from niamoto.api import taxonomy_api
+    click.secho("Setting the '{}' synonyms...".format(synonym_key))
+    nb = taxonomy_api.set_synonyms(
+        csv_file_path,
+        synonym_key,
+        replace=replace,
+        register_key=register,
+    )
+    click.secho("The synonyms had been successfully set!")
+    click.secho("    {} synonyms set".format(nb), fg='green')
+    if no_mapping:
+        m = "   Advice: run 'niamoto map_all_synonyms' " \
+            "to update occurrences taxon identifiers"
+        click.secho(m, fg='yellow')
+    else:
+        map_all_synonyms_cli.invoke(click.Context(map_all_synonyms_cli))
+
+
 @click.command('map_all_synonyms')
 @cli_catch_unknown_error
 def map_all_synonyms_cli():
@@ -0,0 +1,131 @@
+# coding: utf-8
+
+"""
+Process level cache for the aggregation results of the dimensional model.
+The dimensional model is read-mostly between syncs. The cache keys contain
+the 'data_mart' database revision, which is bumped whenever a dimension or a
+fact table is populated, truncated or dropped: results cached by a process
+(e.g. a dashboard) are not reused after the dimensional model had been
+modified by another process (e.g. the niamoto CLI).
+"""
+
+from collections import OrderedDict
+import threading
+
+from niamoto.db.revision import DatabaseRevision
+from niamoto.log import get_logger
+
+
+LOGGER = get_logger(__name__)
+
+
+class AggregationCache:
+    """
+    LRU cache of aggregation results.
+    """
+
+    def __init__(self, max_entries=512, max_result_cells=100000):
+        """
+        :param max_entries: The maximum number of cached results, the least
+            recently used result is evicted when the limit is reached.
+        :param max_result_cells: Results with more cells than this limit
+            are not cached.
+        """
+        self.max_entries = max_entries
+        self.max_result_cells = max_result_cells
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model_key, cube, cell=None, drilldown=None,
+                 aggregates=None, revision=None, **options):
+        """
+        :param revision: The revision tag of the dimensional model, see
+            get_revision.
+        :return: A hashable key for an aggregation query.
+        """
+        def normalize(value):
+            if value is None:
+                return None
+            if isinstance(value, dict):
+                return tuple(sorted(
+                    (str(k), normalize(v)) for k, v in value.items()
+                ))
+            if isinstance(value, (list, tuple)):
+                return tuple(normalize(v) for v in value)
+            return str(value)
+        return (
+            model_key,
+            revision,
+            str(cube),
+            normalize(cell),
+            normalize(drilldown),
+            normalize(aggregates),
+            normalize(options),
+        )
+
+    def get(self, key):
+        """
+        :return: The cached result corresponding to the key, None if there
+            is no such result.
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def set(self, key, result, cell_count=0):
+        """
+        Cache a result.
+        :param key: The key of the result.
+        :param result: The result to cache.
+        :param cell_count: The number of cells of the result.
+        """
+        if cell_count > self.max_result_cells:
+            return
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def get_revision(connection=None):
+        """
+        :param connection: If not None, use an existing connection.
+        :return: The current revision tag of the dimensional model.
+        """
+        return DatabaseRevision.get_tag(
+            DatabaseRevision.DATA_MART,
+            connection=connection
+        )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+AGGREGATION_CACHE = AggregationCache()
+
+
+def invalidate_aggregation_cache(connection=None):
+    """
+    Invalidate the cached aggregation results, in every process, by bumping
+    the 'data_mart' database revision. The results cached by this process
+    are also dropped. Must be called whenever the content of a dimension or
+    a fact table is modified.
+    :param connection: If not None, use an existing connection, the
+        revision is then bumped within the current transaction.
+    """
+    DatabaseRevision.bump(DatabaseRevision.DATA_MART, connection=connection)
+    if len(AGGREGATION_CACHE) > 0:
+        LOGGER.debug("Invalidating the aggregation cache.")
+    AGGREGATION_CACHE.clear()
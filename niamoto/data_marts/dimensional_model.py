@@ -1,5 +1,8 @@
 # coding: utf-8
 
+import json
+import hashlib
+
 import sqlalchemy as sa
 from cubes import Workspace
 
@@ -8,11 +11,81 @@ from niamoto.db.connector import Connector
 from niamoto.data_marts.fact_tables.base_fact_table import BaseFactTable
 from niamoto.data_marts.dimensions.base_dimension import \
     DIMENSION_TYPE_REGISTRY
-from niamoto.data_publishers.base_data_publisher import PUBLISHER_REGISTRY
 from niamoto.data_marts.dimensions.dimension_manager import DimensionManager
+from niamoto.data_marts.aggregation_cache import AGGREGATION_CACHE
+from niamoto.api import publish_api
 from niamoto.exceptions import DimensionNotRegisteredError
 
 
+class CachingBrowser:
+    """
+    Wrapper around a cubes aggregation browser, caching the aggregation
+    results in the aggregation cache. Every other browser method is
+    delegated to the wrapped browser.
+    """
+
+    def __init__(self, browser, model_key, cache=AGGREGATION_CACHE):
+        """
+        :param browser: The cubes browser to wrap.
+        :param model_key: A key identifying the dimensional model.
+        :param cache: The aggregation cache to use.
+        """
+        self.browser = browser
+        self.model_key = model_key
+        self.cache = cache
+
+    def aggregate(self, cell=None, aggregates=None, drilldown=None,
+                  **options):
+        key = self.cache.make_key(
+            self.model_key,
+            self.browser.cube.name,
+            cell=cell,
+            drilldown=drilldown,
+            aggregates=aggregates,
+            revision=self.cache.get_revision(),
+            **options
+        )
+        result = self.cache.get(key)
+        if result is not None:
+            return result
+        result = self.browser.aggregate(
+            cell=cell,
+            aggregates=aggregates,
+            drilldown=drilldown,
+            **options
+        )
+        # The cells can be a lazy iterator, they must be materialized
+        # before caching the result. The calculators are already applied by
+        # the iterator, so they are disabled while setting the cells.
+        calculators = result.calculators
+        result.calculators = []
+        result.cells = list(result.cells)
+        result.calculators = calculators
+        self.cache.set(key, result, cell_count=len(result.cells))
+        return result
+
+    def __getattr__(self, item):
+        return getattr(self.browser, item)
+
+
+class CachingWorkspace(Workspace):
+    """
+    Cubes workspace returning caching browsers.
+    """
+
+    def __init__(self, *args, model_key=None, **kwargs):
+        super(CachingWorkspace, self).__init__(*args, **kwargs)
+        self.model_key = model_key
+
+    def browser(self, cube, locale=None, identity=None):
+        browser = super(CachingWorkspace, self).browser(
+            cube,
+            locale=locale,
+            identity=identity
+        )
+        return CachingBrowser(browser, self.model_key)
+
+
 class DimensionalModel:
     """
     Class representing the whole dimensional model: dimensions and
@@ -75,15 +148,38 @@ class DimensionalModel:
             })
         return {'dimensions': dims, 'cubes': cubes}
 
-    def get_cubes_workspace(self):
-        workspace = Workspace()
+    def get_model_key(self, cubes_model=None):
+        """
+        :param cubes_model: The cubes model, generated if None.
+        :return: A key identifying the dimensional model, used by the
+            aggregation cache.
+        """
+        if cubes_model is None:
+            cubes_model = self.generate_cubes_model()
+        dump = json.dumps(cubes_model, sort_keys=True, default=str)
+        return hashlib.sha1(dump.encode('utf-8')).hexdigest()
+
+    def get_cubes_workspace(self, use_cache=True):
+        """
+        :param use_cache: If True, the browsers of the workspace cache the
+            aggregation results. The cache is invalidated whenever a
+            dimension or a fact table is populated or truncated.
+        :return: A cubes workspace for the dimensional model.
+        """
+        cubes_model = self.generate_cubes_model()
+        if use_cache:
+            workspace = CachingWorkspace(
+                model_key=self.get_model_key(cubes_model)
+            )
+        else:
+            workspace = Workspace()
         workspace.register_default_store(
             "sql",
             url=Connector.get_database_url(),
             schema=settings.NIAMOTO_FACT_TABLES_SCHEMA,
             dimension_schema=settings.NIAMOTO_DIMENSIONS_SCHEMA,
         )
-        workspace.import_model(self.generate_cubes_model())
+        workspace.import_model(cubes_model)
         return workspace
 
     def create_model(self):
@@ -167,7 +263,7 @@ def load_model_from_dict(model_dict):
         publisher_cls = None
         if 'publisher_key' in ft:
             pub_key = ft['publisher_key']
-            publisher_cls = PUBLISHER_REGISTRY[pub_key]['class']
+            publisher_cls = publish_api.get_publisher_class(pub_key)
         fact_tables[ft_name] = BaseFactTable(
             ft_name,
             ft_dims,
@@ -11,6 +11,7 @@ import pandas as pd
 from niamoto.db import metadata as meta
 from niamoto.db.connector import Connector
 from niamoto.conf import settings
+from niamoto.data_marts.aggregation_cache import invalidate_aggregation_cache
 from niamoto.log import get_logger
 
 
@@ -301,6 +302,7 @@ class BaseDimension(metaclass=DimensionMeta):
         cur.close()
         raw_connection.commit()
         raw_connection.close()
+        invalidate_aggregation_cache()
         LOGGER.debug("{} successfully populated".format(self))
 
     def populate_from_publisher(self, *args, append_ns_row=True, **kwargs):
@@ -336,6 +338,7 @@ class BaseDimension(metaclass=DimensionMeta):
             if cascade:
                 sql += " CASCADE"
             connection.execute(sql)
+        invalidate_aggregation_cache(connection=connection)
         if close_after:
             connection.close()
             LOGGER.debug("{} successfully truncated".format(self))
@@ -3,43 +3,265 @@
 import sqlalchemy as sa
 from geoalchemy2 import Geometry
 import geopandas as gpd
+import pandas as pd
 
 from niamoto.conf import settings
+from niamoto.db import metadata as meta
 from niamoto.db.connector import Connector
 from niamoto.data_publishers.occurrence_data_publisher import \
     OccurrenceLocationPublisher
 from niamoto.data_marts.dimensions.base_dimension import BaseDimension
+from niamoto.data_marts.aggregation_cache import invalidate_aggregation_cache
+from niamoto.log import get_logger
+
+
+LOGGER = get_logger(__name__)
 
 
 class OccurrenceLocationDimension(BaseDimension):
     """
-    Dimension representing occurrences location
+    Dimension representing occurrences location. Locations are snapped to a
+    grid and deduplicated in database, the snapped WKT (snapped_wkt column)
+    being the key of a location: a location keeps the same id across
+    successive populations. The location and location_wkt columns hold the
+    (not snapped) location of one of the deduplicated occurrences, as
+    published by OccurrenceLocationPublisher.
+    The snapped_wkt column (and its index) is added to the dimensions
+    created before it was introduced the first time it is used, see
+    add_snapped_wkt_column, and their rows are filled on the next
+    population.
     """
 
     DEFAULT_NAME = 'occurrence_location'
     PUBLISHER = OccurrenceLocationPublisher()
+    DEFAULT_SNAP_PRECISION = 1e-7
 
-    def __init__(self, name=DEFAULT_NAME, publisher=PUBLISHER):
+    def __init__(self, name=DEFAULT_NAME, publisher=PUBLISHER,
+                 snap_precision=DEFAULT_SNAP_PRECISION):
+        """
+        :param snap_precision: The grid size (in degrees) used to snap the
+            occurrences locations before deduplicating them.
+        """
         columns = [
             sa.Column('location', Geometry('POINT', srid=4326)),
-            sa.Column('location_wkt', sa.String())
+            sa.Column('location_wkt', sa.String()),
+            sa.Column('snapped_wkt', sa.String(), index=True),
         ]
+        self.snap_precision = snap_precision
         super(OccurrenceLocationDimension, self).__init__(
             name,
             columns,
             publisher=publisher,
             label_col='location',
+            properties={'snap_precision': snap_precision},
         )
 
     def populate(self, dataframe, *args, **kwargs):
-        dataframe['location'] = dataframe['location'].apply(
-            lambda x: "SRID={};{}".format("4326", x)
-        )
-        return super(OccurrenceLocationDimension, self).populate(
+        dataframe['location'] = "SRID=4326;" + \
+            dataframe['location'].astype(str)
+        result = super(OccurrenceLocationDimension, self).populate(
             dataframe,
             *args,
             **kwargs
         )
+        with Connector.get_connection() as connection:
+            self.update_snapped_wkt(connection)
+        return result
+
+    def add_snapped_wkt_column(self, connection):
+        """
+        Add the snapped_wkt column and its index to an existing dimension
+        created before the column was introduced. Do nothing if the column
+        already exists, or if the dimension does not exist.
+        :param connection: A connection to the database to work with.
+        :return: True if the column was added.
+        """
+        sql_exists = \
+            """
+            SELECT EXISTS (
+                SELECT 1 FROM information_schema.tables
+                WHERE table_schema = '{schema}' AND table_name = '{name}'
+            ), EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_schema = '{schema}' AND table_name = '{name}'
+                    AND column_name = 'snapped_wkt'
+            );
+            """.format(**{
+                'schema': settings.NIAMOTO_DIMENSIONS_SCHEMA,
+                'name': self.name,
+            })
+        table_exists, column_exists = connection.execute(
+            sql_exists
+        ).fetchone()
+        if not table_exists or column_exists:
+            return False
+        LOGGER.debug("Adding the snapped_wkt column to {}".format(self))
+        with connection.begin():
+            connection.execute(
+                "ALTER TABLE {schema}.{name} "
+                "ADD COLUMN snapped_wkt VARCHAR;".format(**{
+                    'schema': settings.NIAMOTO_DIMENSIONS_SCHEMA,
+                    'name': self.name,
+                })
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS ix_{name}_snapped_wkt "
+                "ON {schema}.{name} (snapped_wkt);".format(**{
+                    'schema': settings.NIAMOTO_DIMENSIONS_SCHEMA,
+                    'name': self.name,
+                })
+            )
+        return True
+
+    def update_snapped_wkt(self, connection):
+        """
+        Fill the snapped_wkt column of the rows that do not have it yet
+        (rows inserted from a DataFrame, or before the column existed). The
+        column is added first if needed, see add_snapped_wkt_column.
+        :param connection: A connection to the database to work with.
+        :return: The number of updated rows.
+        """
+        self.add_snapped_wkt_column(connection)
+        sql = \
+            """
+            UPDATE {dim_table}
+            SET snapped_wkt = ST_AsText(ST_SnapToGrid(location, {precision}))
+            WHERE snapped_wkt IS NULL AND location IS NOT NULL;
+            """.format(**{
+                'dim_table': '{}.{}'.format(
+                    settings.NIAMOTO_DIMENSIONS_SCHEMA,
+                    self.name
+                ),
+                'precision': float(self.snap_precision),
+            })
+        with connection.begin():
+            return connection.execute(sql).rowcount
+
+    def populate_from_publisher(self, *args, append_ns_row=True, **kwargs):
+        """
+        Populates the dimension directly in database, see
+        populate_from_occurrences. The publisher is not used, hence no
+        publisher arguments are accepted.
+        :param append_ns_row: If True, append a NS row to the dimension.
+        """
+        if len(args) > 0 or len(kwargs) > 0:
+            raise TypeError(
+                "{} is populated directly in database, it does not accept "
+                "publisher arguments (got {}, {}).".format(self, args, kwargs)
+            )
+        return self.populate_from_occurrences(append_ns_row=append_ns_row)
+
+    def populate_from_occurrences(self, append_ns_row=True, connection=None):
+        """
+        Insert the locations of occurrences that are not yet in the
+        dimension. Existing locations are left untouched, so this method can
+        be used to incrementally append new locations after a sync.
+        :param append_ns_row: If True, append a NS row to the dimension if
+            it does not already have one.
+        :param connection: If not None, use an existing connection.
+        :return: The number of inserted locations.
+        """
+        LOGGER.debug("Populating {} from occurrences".format(self))
+        close_after = False
+        if connection is None:
+            connection = Connector.get_engine().connect()
+            close_after = True
+        sql_insert = \
+            """
+            INSERT INTO {dim_table} (id, location, location_wkt, snapped_wkt)
+            SELECT base.max_id + ROW_NUMBER() OVER (ORDER BY new.snapped_wkt),
+                new.location,
+                new.location_wkt,
+                new.snapped_wkt
+            FROM (
+                SELECT DISTINCT ON (snapped_wkt)
+                    location, location_wkt, snapped_wkt
+                FROM (
+                    SELECT location,
+                        ST_AsText(location) AS location_wkt,
+                        ST_AsText(
+                            ST_SnapToGrid(location, {precision})
+                        ) AS snapped_wkt
+                    FROM {occurrence_table}
+                    WHERE location IS NOT NULL
+                ) AS snapped
+                ORDER BY snapped_wkt, location_wkt
+            ) AS new
+            CROSS JOIN (
+                SELECT COALESCE(MAX(id), -1) AS max_id FROM {dim_table}
+            ) AS base
+            WHERE NOT EXISTS (
+                SELECT 1 FROM {dim_table} AS dim
+                WHERE dim.snapped_wkt = new.snapped_wkt
+            );
+            """.format(**{
+                'dim_table': '{}.{}'.format(
+                    settings.NIAMOTO_DIMENSIONS_SCHEMA,
+                    self.name
+                ),
+                'occurrence_table': '{}.{}'.format(
+                    settings.NIAMOTO_SCHEMA,
+                    meta.occurrence.name
+                ),
+                'precision': float(self.snap_precision),
+            })
+        sql_ns = \
+            """
+            INSERT INTO {dim_table} (id, location, location_wkt)
+            SELECT COALESCE(MAX(id), -1) + 1, NULL, '{ns}'
+            FROM {dim_table}
+            HAVING COUNT(*) FILTER (WHERE location IS NULL) = 0;
+            """.format(**{
+                'dim_table': '{}.{}'.format(
+                    settings.NIAMOTO_DIMENSIONS_SCHEMA,
+                    self.name
+                ),
+                'ns': self.NS_VALUES[sa.String],
+            })
+        self.update_snapped_wkt(connection)
+        with connection.begin():
+            inserted = connection.execute(sql_insert).rowcount
+            if append_ns_row:
+                connection.execute(sql_ns)
+        invalidate_aggregation_cache(connection=connection)
+        if close_after:
+            connection.close()
+        LOGGER.debug("{} new locations inserted in {}".format(inserted, self))
+        return inserted
+
+    def get_occurrence_location_ids(self):
+        """
+        :return: A DataFrame indexed by occurrence id, with the
+            '<dimension_name>_id' column containing the key of the occurrence
+            location. Occurrences without location get the NS key.
+        """
+        sql = \
+            """
+            SELECT occ.id AS id,
+                COALESCE(
+                    dim.id,
+                    (SELECT MAX(id) FROM {dim_table} WHERE location IS NULL)
+                ) AS {name}_id
+            FROM {occurrence_table} AS occ
+            LEFT JOIN {dim_table} AS dim
+                ON dim.snapped_wkt = ST_AsText(
+                    ST_SnapToGrid(occ.location, {precision})
+                );
+            """.format(**{
+                'name': self.name,
+                'dim_table': '{}.{}'.format(
+                    settings.NIAMOTO_DIMENSIONS_SCHEMA,
+                    self.name
+                ),
+                'occurrence_table': '{}.{}'.format(
+                    settings.NIAMOTO_SCHEMA,
+                    meta.occurrence.name
+                ),
+                'precision': float(self.snap_precision),
+            })
+        with Connector.get_connection() as connection:
+            self.update_snapped_wkt(connection)
+            return pd.read_sql(sql, connection, index_col='id')
 
     @classmethod
     def get_key(cls):
@@ -52,7 +274,13 @@ class OccurrenceLocationDimension(BaseDimension):
     @classmethod
     def load(cls, dimension_name, label_col='label', properties={},
              column_labels={}):
-        return cls(name=dimension_name)
+        return cls(
+            name=dimension_name,
+            snap_precision=properties.get(
+                'snap_precision',
+                cls.DEFAULT_SNAP_PRECISION
+            ),
+        )
 
     def get_values(self, wkt_filter=None):
         where_clause = "WHERE location IS NOT NULL"
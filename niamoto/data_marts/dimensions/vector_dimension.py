@@ -1,5 +1,7 @@
 # coding: utf-8
 
+from niamoto.conf import settings
+from niamoto.db.utils import create_gist_index
 from niamoto.data_marts.dimensions.base_dimension import BaseDimension
 from niamoto.vector.vector_manager import VectorManager
 from niamoto.data_publishers.vector_publisher import VectorDataPublisher
@@ -48,6 +50,20 @@ class VectorDimension(BaseDimension):
         """
         return VectorManager.get_vector_geo_dataframe(self.name)
 
+    def create_dimension(self, connection=None):
+        """
+        Create the dimension in database, with a GiST index on its geometry
+        column (used by the spatial join publishers).
+        :param connection: If not None, use an existing connection.
+        """
+        super(VectorDimension, self).create_dimension(connection=connection)
+        create_gist_index(
+            settings.NIAMOTO_DIMENSIONS_SCHEMA,
+            self.name,
+            self.geom_column_name,
+            connection=connection
+        )
+
     def populate_from_publisher(self, *args, **kwargs):
         return super(VectorDimension, self).populate_from_publisher(
             self.vector_name,
@@ -11,6 +11,7 @@ from niamoto.data_marts.dimensions.dimension_manager import DimensionManager
 from niamoto.db import metadata as meta
 from niamoto.db.connector import Connector
 from niamoto.conf import settings
+from niamoto.data_marts.aggregation_cache import invalidate_aggregation_cache
 from niamoto.log import get_logger
 
 
@@ -190,6 +191,7 @@ class BaseFactTable:
                 meta.fact_table_registry.c.name == self.name
             )
             connection.execute(delete)
+        invalidate_aggregation_cache(connection=connection)
         if close_after:
             connection.close()
         LOGGER.debug("{} successfully dropped".format(self))
@@ -214,6 +216,7 @@ class BaseFactTable:
                 settings.NIAMOTO_FACT_TABLES_SCHEMA,
                 self.name
             )))
+        invalidate_aggregation_cache(connection=connection)
         if close_after:
             connection.close()
             LOGGER.debug("{} successfully truncated".format(self))
@@ -244,6 +247,7 @@ class BaseFactTable:
         cur.close()
         raw_connection.commit()
         raw_connection.close()
+        invalidate_aggregation_cache()
         LOGGER.debug("{} successfully populated".format(self))
 
     def populate_from_publisher(self, *args, **kwargs):
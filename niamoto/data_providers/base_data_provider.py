@@ -7,6 +7,8 @@ from sqlalchemy import select, and_
 
 from niamoto.db import metadata as niamoto_db_meta
 from niamoto.db.connector import Connector
+from niamoto.db.property_catalog import PropertyCatalog
+from niamoto.db.revision import DatabaseRevision
 from niamoto.taxonomy.taxonomy_manager import TaxonomyManager
 from niamoto.exceptions import NoRecordFoundError, RecordAlreadyExistsError
 from niamoto.log import get_logger
@@ -126,6 +128,19 @@ class BaseDataProvider(metaclass=ProviderMeta):
                     update=update,
                     delete=delete,
                 ) if sync_plot else ([], [], [])
+                if sync_occurrence:
+                    PropertyCatalog.refresh(
+                        PropertyCatalog.OCCURRENCE,
+                        provider_id=self.db_id,
+                        connection=connection
+                    )
+                if sync_plot:
+                    PropertyCatalog.refresh(
+                        PropertyCatalog.PLOT,
+                        provider_id=self.db_id,
+                        connection=connection
+                    )
+                DatabaseRevision.bump(connection=connection)
             with connection.begin():
                 i3, u3, d3 = self.plot_occurrence_provider.sync(
                     connection,
@@ -133,6 +148,8 @@ class BaseDataProvider(metaclass=ProviderMeta):
                     update=update,
                     delete=delete,
                 ) if sync_plot_occurrence else ([], [], [])
+                if sync_plot_occurrence:
+                    DatabaseRevision.bump(connection=connection)
             upd = niamoto_db_meta.data_provider.update().values({
                 'last_sync': datetime.now(),
             }).where(niamoto_db_meta.data_provider.c.name == self.name)
@@ -249,10 +266,12 @@ class BaseDataProvider(metaclass=ProviderMeta):
         )
         if bind is not None:
             bind.execute(delete_stmt)
+            DatabaseRevision.bump(connection=bind)
             return
         with Connector.get_connection() as connection:
             with connection.begin():
                 connection.execute(delete_stmt)
+                DatabaseRevision.bump(connection=connection)
 
     @staticmethod
     def assert_data_provider_does_not_exist(name, bind=None):
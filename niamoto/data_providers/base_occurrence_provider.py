@@ -2,14 +2,11 @@
 
 import time
 import json
-import io
 
 from sqlalchemy.sql import select, bindparam, and_, cast, func
 from sqlalchemy.dialects.postgresql import JSONB
 import pandas as pd
 
-from niamoto.conf import settings
-from niamoto.db.connector import Connector
 from niamoto.db.metadata import occurrence
 from niamoto.taxonomy.taxonomy_manager import TaxonomyManager
 from niamoto.log import get_logger
@@ -29,9 +26,11 @@ class BaseOccurrenceProvider:
         """
         self.data_provider = data_provider
 
-    def get_niamoto_occurrence_dataframe(self, connection):
+    def get_niamoto_occurrence_dataframe(self, connection, provider_pks=None):
         """
         :param connection: A connection to the database to work with.
+        :param provider_pks: If not None, only return the occurrences whose
+            provider's pk is in this list.
         :return: A DataFrame containing the occurrence data for this
         provider that is currently stored in the Niamoto database.
         """
@@ -47,6 +46,8 @@ class BaseOccurrenceProvider:
         ]).where(
             occurrence.c.provider_id == self.data_provider.db_id
         )
+        if provider_pks is not None:
+            sel = sel.where(occurrence.c.provider_pk.in_(provider_pks))
         return pd.read_sql(
             sel,
             connection,
@@ -57,8 +58,11 @@ class BaseOccurrenceProvider:
         """
         Update the synonym mapping of an already stored dataframe.
         To be called when a synonym had been defined or modified, but not
-        the occurrences.
+        the occurrences. The mapping is done by the database, see
+        TaxonomyManager.map_occurrence_synonyms.
         :param connection: If passed, use an existing connection.
+        :return: The number of mapped occurrences and the total number of
+            occurrences of the provider.
         """
         # Log start
         m = "(provider_id='{}', synonym_key='{}'): Updating synonym " \
@@ -67,78 +71,24 @@ class BaseOccurrenceProvider:
             self.data_provider.db_id,
             self.data_provider.synonym_key)
         )
-        close_after = False
-        if connection is None:
-            connection = Connector.get_engine().connect()
-            close_after = True
-        # Start
-        df = self.get_niamoto_occurrence_dataframe(connection)
-        if close_after:
-            connection.close()
-        synonyms = TaxonomyManager.get_synonyms_for_key(
-            self.data_provider.synonym_key
+        stats = TaxonomyManager.map_occurrence_synonyms(
+            provider_ids=[self.data_provider.db_id],
+            connection=connection,
         )
-        mapping = df["provider_taxon_id"].map(synonyms)
-        if len(df) > 0:
-            df["taxon_id"] = mapping
-            df = df[['provider_id', 'provider_pk', 'taxon_id']]
-            s = io.StringIO()
-            df.where((pd.notnull(df)), None).rename(columns={
-                'provider_id': 'prov_id',
-                'provider_pk': 'prov_pk',
-            }).to_csv(s, columns=['taxon_id', 'prov_id', 'prov_pk'])
-            s.seek(0)
-            sql_create_temp = \
-                """
-                DROP TABLE IF EXISTS {tmp};
-                CREATE TABLE {tmp} (
-                    id float,
-                    taxon_id float,
-                    prov_id float,
-                    prov_pk float
-                );
-                """.format(**{
-                    'tmp': 'tmp_niamoto'
-                })
-            sql_copy_from = \
-                """
-                COPY {tmp} FROM STDIN CSV HEADER DELIMITER ',';
-                """.format(**{
-                    'tmp': 'tmp_niamoto'
-                })
-            sql_update = \
-                """
-                UPDATE {occurrence_table}
-                SET taxon_id = {tmp}.taxon_id::int
-                FROM {tmp}
-                WHERE {occurrence_table}.provider_id = {tmp}.prov_id::int
-                    AND {occurrence_table}.provider_pk = {tmp}.prov_pk::int;
-                DROP TABLE {tmp};
-                """.format(**{
-                    'tmp': 'tmp_niamoto',
-                    'occurrence_table': '{}.{}'.format(
-                        settings.NIAMOTO_SCHEMA, occurrence.name
-                    )
-                })
-            raw_connection = Connector.get_engine().raw_connection()
-            cur = raw_connection.cursor()
-            cur.execute(sql_create_temp)
-            cur.copy_expert(sql_copy_from, s)
-            cur.execute(
-                sql_update
-            )
-            cur.close()
-            raw_connection.commit()
-            raw_connection.close()
+        mapped, total = 0, 0
+        if self.data_provider.db_id in stats.index:
+            mapped = int(stats.loc[self.data_provider.db_id, 'mapped'])
+            total = int(stats.loc[self.data_provider.db_id, 'total'])
         # Log end
-        m = "(provider_id='{}', synonym_key='{}'): {} synonym mapping had " \
-            "been updated."
+        m = "(provider_id='{}', synonym_key='{}'): synonym mapping had " \
+            "been updated ({} mapped occurrences, over {})."
         LOGGER.debug(m.format(
             self.data_provider.db_id,
             self.data_provider.synonym_key,
-            len(synonyms)
+            mapped,
+            total,
         ))
-        return mapping, synonyms
+        return mapped, total
 
     def map_provider_taxon_ids(self, dataframe):
         """
@@ -155,11 +105,11 @@ class BaseOccurrenceProvider:
             self.data_provider.db_id,
             self.data_provider.synonym_key)
         )
-        synonyms = TaxonomyManager.get_synonyms_for_key(
+        synonyms = TaxonomyManager.get_synonym_map(
             self.data_provider.synonym_key
         )
         dataframe["provider_taxon_id"] = dataframe["taxon_id"]
-        dataframe["taxon_id"] = dataframe["taxon_id"].map(synonyms)
+        dataframe["taxon_id"] = synonyms.map_series(dataframe["taxon_id"])
         m = "(provider_id='{}', synonym_key='{}'): {} taxon ids had " \
             "been mapped."
         LOGGER.debug(m.format(
@@ -198,6 +148,53 @@ class BaseOccurrenceProvider:
             if update else []
         delete_df = self.get_delete_dataframe(niamoto_df, provider_df) \
             if delete else []
+        self._apply(connection, insert_df, update_df, delete_df)
+        return insert_df, update_df, delete_df
+
+    def _sync_changes(self, df, deleted_pks, connection, insert=True,
+                      update=True, delete=True):
+        """
+        Sync Niamoto database with a subset of the provider's data: the
+        records that changed since the last sync, and the pks of the
+        records that were deleted since the last sync. The other records
+        of the provider are left untouched.
+        :param df: The provider's DataFrame of the changed records.
+        :param deleted_pks: The provider's pks of the deleted records.
+        :param connection: A connection to the database to work with.
+        :param insert: if False, skip insert operation.
+        :param update: if False, skip update operation.
+        :param delete: if False, skip delete operation.
+        :return: The insert, update, delete DataFrames.
+        """
+        provider_pks = list(df.index) + list(deleted_pks)
+        niamoto_df = self.get_niamoto_occurrence_dataframe(
+            connection,
+            provider_pks=provider_pks,
+        )
+        provider_df = df.where((pd.notnull(df)), None)
+        insert_df = self.get_insert_dataframe(niamoto_df, provider_df) \
+            if insert else []
+        update_df = self.get_update_dataframe(niamoto_df, provider_df) \
+            if update else []
+        delete_df = []
+        if delete:
+            # A record both changed and deleted had been recreated
+            pks = niamoto_df['provider_pk']
+            deleted = pks.isin(deleted_pks) & ~pks.isin(provider_df.index)
+            delete_df = niamoto_df[deleted]
+        self._apply(connection, insert_df, update_df, delete_df)
+        return insert_df, update_df, delete_df
+
+    def _apply(self, connection, insert_df, update_df, delete_df):
+        """
+        Apply the insert, update and delete DataFrames to the occurrence
+        table.
+        :param connection: A connection to the database to work with.
+        :param insert_df: The DataFrame of the records to insert.
+        :param update_df: The DataFrame of the records to update.
+        :param delete_df: The DataFrame of the records to delete, indexed by
+            Niamoto occurrence id.
+        """
         with connection.begin():
             if len(insert_df) > 0:
                 LOGGER.debug("Inserting new occurrence records...")
@@ -241,7 +238,6 @@ class BaseOccurrenceProvider:
                     occurrence.c.id.in_(delete_df.index)
                 )
                 connection.execute(del_stmt)
-        return insert_df, update_df, delete_df
 
     def sync(self, connection, insert=True, update=True, delete=True):
         """
@@ -2,11 +2,14 @@
 
 import time
 
-from sqlalchemy.sql import and_, bindparam, select
+from sqlalchemy.sql import select
+import numpy as np
 import pandas as pd
 
+from niamoto.conf import settings
 from niamoto.db.metadata import plot_occurrence, plot, occurrence
 from niamoto.db.connector import Connector
+from niamoto.db.staging import StagingTable
 from niamoto.exceptions import IncoherentDatabaseStateError
 from niamoto.log import get_logger
 
@@ -23,6 +26,9 @@ class BasePlotOccurrenceProvider:
     provider.
     """
 
+    # Maximum number of missing plot / occurrence pks reported on error
+    MISSING_SAMPLE_SIZE = 10
+
     def __init__(self, data_provider):
         """
         :param data_provider: The parent data provider.
@@ -85,50 +91,93 @@ class BasePlotOccurrenceProvider:
                 "niamoto",
                 "uq_plot_occurrence_plot_id__occurrence_identifier"
             ))
-            plot_id_col = plot_occurrence.c.plot_id
-            occurrence_id_col = plot_occurrence.c.occurrence_id
-            if len(insert_df) > 0:
-                LOGGER.debug("Inserting new plot-occurrence records...")
-                ins_stmt = plot_occurrence.insert().values(
-                    insert_df.to_dict(orient='records')
-                )
-                connection.execute(ins_stmt)
-            if len(update_df) > 0:
-                LOGGER.debug("Updating existing plot-occurrence records...")
-                upd_stmt = plot_occurrence.update().where(
-                    and_(
-                        plot_id_col == bindparam('_plot_id'),
-                        occurrence_id_col == bindparam('_occurrence_id')
-                    )
-                ).values({
-                    'occurrence_identifier': bindparam(
-                        'occurrence_identifier'
-                    )
-                })
-                connection.execute(
-                    upd_stmt,
-                    update_df.rename(columns={
-                        'plot_id': '_plot_id',
-                        'occurrence_id': '_occurrence_id',
-                    }).to_dict(orient='records')
-                )
-            if len(delete_df) > 0:
-                LOGGER.debug("Deleting expired plot-occurrence records...")
-                del_stmt = plot_occurrence.delete().where(
-                    and_(
-                        plot_id_col == bindparam('plot_id'),
-                        occurrence_id_col == bindparam('occurrence_id')
-                    )
-                )
-                connection.execute(
-                    del_stmt,
-                    delete_df[[
-                        'plot_id',
-                        'occurrence_id',
-                    ]].to_dict(orient='records')
-                )
+            self._apply(connection, insert_df, update_df, delete_df)
         return insert_df, update_df, delete_df
 
+    def _apply(self, connection, insert_df, update_df, delete_df):
+        """
+        Apply the insert, update and delete DataFrames to the plot_occurrence
+        table. The rows are loaded in a staging table with COPY, tagged with
+        the operation to perform, and applied with one INSERT, one
+        UPDATE ... FROM and one DELETE ... USING on the composite key
+        (plot_id, occurrence_id). Must be called within a transaction.
+        :param connection: A connection to the database to work with.
+        :param insert_df: The DataFrame of the records to insert.
+        :param update_df: The DataFrame of the records to update.
+        :param delete_df: The DataFrame of the records to delete.
+        """
+        operations = [
+            ('i', insert_df),
+            ('u', update_df),
+            ('d', delete_df),
+        ]
+        frames = [
+            df.assign(op=op) for op, df in operations if len(df) > 0
+        ]
+        if len(frames) == 0:
+            return
+        staged = pd.concat(frames, ignore_index=True)
+        tables = {
+            'plot_occurrence': '{}.{}'.format(
+                settings.NIAMOTO_SCHEMA,
+                plot_occurrence.name
+            ),
+        }
+        with StagingTable(connection, [
+                ('op', 'char(1)'),
+                ('plot_id', 'integer'),
+                ('occurrence_id', 'integer'),
+                ('provider_id', 'integer'),
+                ('provider_plot_pk', 'integer'),
+                ('provider_occurrence_pk', 'integer'),
+                ('occurrence_identifier', 'text')],
+                prefix='niamoto_plot_occurrence') as stg:
+            LOGGER.debug("Staging plot-occurrence records...")
+            stg.copy_from(staged)
+            tables['staging'] = stg.name
+            LOGGER.debug("Inserting new plot-occurrence records...")
+            connection.execute(
+                """
+                INSERT INTO {plot_occurrence} (
+                    plot_id,
+                    occurrence_id,
+                    provider_id,
+                    provider_plot_pk,
+                    provider_occurrence_pk,
+                    occurrence_identifier
+                )
+                SELECT plot_id,
+                    occurrence_id,
+                    provider_id,
+                    provider_plot_pk,
+                    provider_occurrence_pk,
+                    occurrence_identifier
+                FROM {staging}
+                WHERE op = 'i';
+                """.format(**tables)
+            )
+            LOGGER.debug("Updating existing plot-occurrence records...")
+            connection.execute(
+                """
+                UPDATE {plot_occurrence} AS po
+                SET occurrence_identifier = stg.occurrence_identifier
+                FROM {staging} AS stg
+                WHERE stg.op = 'u'
+                    AND po.plot_id = stg.plot_id
+                    AND po.occurrence_id = stg.occurrence_id;
+                """.format(**tables)
+            )
+            LOGGER.debug("Deleting expired plot-occurrence records...")
+            connection.execute(
+                """
+                DELETE FROM {plot_occurrence} AS po
+                USING {staging} AS stg
+                WHERE stg.op = 'd'
+                    AND po.plot_id = stg.plot_id
+                    AND po.occurrence_id = stg.occurrence_id;
+                """.format(**tables)
+            )
+
     def sync(self, connection, insert=True, update=True, delete=True):
         """
         Sync Niamoto database with provider.
@@ -214,51 +263,72 @@ class BasePlotOccurrenceProvider:
             ['provider_plot_pk', 'provider_occurrence_pk'],
             inplace=True
         )
-        with Connector.get_connection() as connection:
-            sel_plot = select([
-                plot.c.id.label('plot_id'),
-                plot.c.provider_pk.label('provider_plot_pk')
-            ]).where(plot.c.provider_id == self.data_provider.db_id)
-            sel_occ = select([
-                occurrence.c.id.label('occurrence_id'),
-                occurrence.c.provider_pk.label('provider_occurrence_pk')
-            ]).where(occurrence.c.provider_id == self.data_provider.db_id)
-            plot_ids = pd.read_sql(
-                sel_plot,
-                connection,
-                index_col='provider_plot_pk'
-            )
-            occ_ids = pd.read_sql(
-                sel_occ,
-                connection,
-                index_col='provider_occurrence_pk'
-            )
         dataframe.reset_index(inplace=True)
-        # Assert plots and occurrences exist in db
-        plot_pks = pd.Index(pd.unique(dataframe['provider_plot_pk']))
-        plot_not_in_db = plot_pks.difference(plot_ids.index)
-        occ_pks = pd.Index(pd.unique(dataframe['provider_occurrence_pk']))
-        occ_not_in_db = occ_pks.difference(occ_ids.index)
-        if len(plot_not_in_db) != 0:
-            raise IncoherentDatabaseStateError(
-                "Tried to insert plot_occurrence records with plot records "
-                "that do not exist in database."
-            )
-        if len(occ_not_in_db) != 0:
-            raise IncoherentDatabaseStateError(
-                "Tried to insert plot_occurrence records with occurrence "
-                "records that dot not exist in database."
-            )
-        dataframe = dataframe.merge(
-            plot_ids,
-            left_on='provider_plot_pk',
-            right_index=True,
-        )
-        dataframe = dataframe.merge(
-            occ_ids,
-            left_on='provider_occurrence_pk',
-            right_index=True,
-        )
+        pks = pd.DataFrame({
+            'idx': np.arange(len(dataframe)),
+            'provider_plot_pk': dataframe['provider_plot_pk'].values,
+            'provider_occurrence_pk': dataframe[
+                'provider_occurrence_pk'
+            ].values,
+        })
+        tables = {
+            'plot': '{}.{}'.format(settings.NIAMOTO_SCHEMA, plot.name),
+            'occurrence': '{}.{}'.format(
+                settings.NIAMOTO_SCHEMA,
+                occurrence.name
+            ),
+        }
+        params = {
+            'provider_id': self.data_provider.db_id,
+            'limit': self.MISSING_SAMPLE_SIZE,
+        }
+        with Connector.get_connection() as connection:
+            with StagingTable(connection, [
+                    ('idx', 'integer'),
+                    ('provider_plot_pk', 'integer'),
+                    ('provider_occurrence_pk', 'integer')],
+                    prefix='niamoto_plot_occurrence_pk') as stg:
+                stg.copy_from(pks)
+                tables['staging'] = stg.name
+                # Assert plots and occurrences exist in db
+                missing_plots = self._get_missing_references(
+                    connection, 'plot', tables, params
+                )
+                if len(missing_plots) != 0:
+                    raise IncoherentDatabaseStateError(
+                        "Tried to insert plot_occurrence records with plot "
+                        "records that do not exist in database (provider "
+                        "pks: {}).".format(missing_plots)
+                    )
+                missing_occurrences = self._get_missing_references(
+                    connection, 'occurrence', tables, params
+                )
+                if len(missing_occurrences) != 0:
+                    raise IncoherentDatabaseStateError(
+                        "Tried to insert plot_occurrence records with "
+                        "occurrence records that dot not exist in database "
+                        "(provider pks: {}).".format(missing_occurrences)
+                    )
+                ids = pd.read_sql(
+                    """
+                    SELECT stg.idx,
+                        plot.id AS plot_id,
+                        occ.id AS occurrence_id
+                    FROM {staging} AS stg
+                    INNER JOIN {plot} AS plot
+                        ON plot.provider_id = %(provider_id)s
+                        AND plot.provider_pk = stg.provider_plot_pk
+                    INNER JOIN {occurrence} AS occ
+                        ON occ.provider_id = %(provider_id)s
+                        AND occ.provider_pk = stg.provider_occurrence_pk;
+                    """.format(**tables),
+                    connection,
+                    params=params,
+                    index_col='idx',
+                )
+        ids = ids.reindex(pks['idx'])
+        dataframe['plot_id'] = ids['plot_id'].values
+        dataframe['occurrence_id'] = ids['occurrence_id'].values
         dataframe.set_index(['plot_id', 'occurrence_id'], inplace=True)
         dataframe['provider_id'] = self.data_provider.db_id
         dataframe['plot_id'] = dataframe.index.get_level_values('plot_id')
@@ -267,6 +337,34 @@ class BasePlotOccurrenceProvider:
         )
         return dataframe
 
+    @staticmethod
+    def _get_missing_references(connection, table, tables, params):
+        """
+        :param connection: A connection to the database to work with.
+        :param table: The referenced table, 'plot' or 'occurrence'.
+        :param tables: The table names, including the staging table holding
+            the provider pks.
+        :param params: The query parameters (provider_id and limit).
+        :return: A bounded, sorted sample of the provider pks of the staging
+            table that are not in the referenced table.
+        """
+        sql = """
+            SELECT DISTINCT stg.provider_{table}_pk
+            FROM {staging} AS stg
+            WHERE NOT EXISTS (
+                SELECT 1 FROM {referenced} AS ref
+                WHERE ref.provider_id = %(provider_id)s
+                    AND ref.provider_pk = stg.provider_{table}_pk
+            )
+            ORDER BY 1
+            LIMIT %(limit)s;
+        """.format(
+            table=table,
+            staging=tables['staging'],
+            referenced=tables[table],
+        )
+        return [r[0] for r in connection.execute(sql, params)]
+
     def get_insert_dataframe(self, niamoto_dataframe, provider_dataframe):
         """
         :param niamoto_dataframe: Plot-occurrence DataFrame from Niamoto
@@ -3,6 +3,8 @@
 from os.path import exists, isfile
 
 from niamoto.data_providers.base_data_provider import BaseDataProvider
+from niamoto.data_providers.plantnote_provider.plantnote_database \
+    import PlantnoteDatabase
 from niamoto.data_providers.plantnote_provider.plantnote_occurrence_provider \
     import PlantnoteOccurrenceProvider
 from niamoto.data_providers.plantnote_provider.plantnote_plot_provider \
@@ -19,20 +21,34 @@ class PlantnoteDataProvider(BaseDataProvider):
     must have previously been converted to a SQLite3 database.
     """
 
-    def __init__(self, name, plantnote_db_path=None):
+    def __init__(self, name, plantnote_db_path=None, read_only=False,
+                 mmap_size=None):
+        """
+        :param name: The name of the data provider.
+        :param plantnote_db_path: The path to the Pl@ntnote SQLite database.
+        :param read_only: If True, open the Pl@ntnote database in read-only
+            mode.
+        :param mmap_size: If not None, enable memory-mapped I/O for (at
+            most) this number of bytes when reading the Pl@ntnote database.
+        """
         super(PlantnoteDataProvider, self).__init__(name)
         self.plantnote_db_path = plantnote_db_path
+        self.plantnote_database = PlantnoteDatabase(
+            self.plantnote_db_path,
+            read_only=read_only,
+            mmap_size=mmap_size,
+        )
         self._occurrence_provider = PlantnoteOccurrenceProvider(
             self,
-            self.plantnote_db_path
+            self.plantnote_database
         )
         self._plot_provider = PlantnotePlotProvider(
             self,
-            self.plantnote_db_path
+            self.plantnote_database
         )
         self._plot_occurrence_provider = PlantnotePlotOccurrenceProvider(
             self,
-            self.plantnote_db_path
+            self.plantnote_database
         )
 
     def sync(self, insert=True, update=True, delete=True,
@@ -44,14 +60,17 @@ class PlantnoteDataProvider(BaseDataProvider):
                 db_path
             )
             raise DataSourceNotFoundError(m)
-        return super(PlantnoteDataProvider, self).sync(
-            insert=True,
-            update=True,
-            delete=True,
-            sync_occurrence=True,
-            sync_plot=True,
-            sync_plot_occurrence=True
-        )
+        try:
+            return super(PlantnoteDataProvider, self).sync(
+                insert=True,
+                update=True,
+                delete=True,
+                sync_occurrence=True,
+                sync_plot=True,
+                sync_plot_occurrence=True
+            )
+        finally:
+            self.plantnote_database.close()
 
     @property
     def occurrence_provider(self):
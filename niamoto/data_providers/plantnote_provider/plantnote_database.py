@@ -0,0 +1,119 @@
+# coding: utf-8
+
+import os
+import sqlite3
+from urllib.request import pathname2url
+
+from sqlalchemy import create_engine, MetaData
+from sqlalchemy.pool import StaticPool
+
+from niamoto.log import get_logger
+
+
+LOGGER = get_logger(__name__)
+
+
+class PlantnoteDatabase:
+    """
+    Shared access to a Pl@ntnote SQLite database, used by the occurrence,
+    plot and plot-occurrence providers of a Pl@ntnote data provider. A
+    single SQLite connection is opened on first use and reused until close
+    is called. The Pl@ntnote tables needed by the providers are reflected
+    once per database file: the reflected metadata is cached, keyed by the
+    path, the modification time and the size of the file.
+    Optionally, the database can be opened in read-only mode (the providers
+    never write to the Pl@ntnote database), with memory-mapped I/O enabled,
+    which is faster to scan large Pl@ntnote snapshots.
+    """
+
+    TABLES = [
+        'Individus',
+        'Observations',
+        'Déterminations',
+        'Inventaires',
+        'Localités',
+    ]
+
+    _METADATA = {}
+
+    def __init__(self, db_path, read_only=False, mmap_size=None):
+        """
+        :param db_path: The path to the Pl@ntnote SQLite database.
+        :param read_only: If True, open the database in read-only mode.
+        :param mmap_size: If not None, the maximum number of bytes of the
+            database file that SQLite accesses using memory-mapped I/O
+            (see PRAGMA mmap_size). Intended to be used with read_only.
+        """
+        self.db_path = db_path
+        self.read_only = read_only
+        self.mmap_size = mmap_size
+        self._engine = None
+        self._connection = None
+
+    def _create_connection(self):
+        if self.read_only:
+            uri = 'file:{}?mode=ro'.format(
+                pathname2url(os.path.abspath(self.db_path))
+            )
+            con = sqlite3.connect(uri, uri=True)
+        else:
+            con = sqlite3.connect(self.db_path)
+        if self.mmap_size is not None:
+            con.execute("PRAGMA mmap_size={:d};".format(self.mmap_size))
+        return con
+
+    def connect(self):
+        """
+        :return: The shared sqlalchemy connection to the Pl@ntnote database,
+            opened if needed.
+        """
+        if self._connection is None:
+            LOGGER.debug("Opening the Pl@ntnote database '{}'...".format(
+                self.db_path
+            ))
+            self._engine = create_engine(
+                'sqlite://',
+                creator=self._create_connection,
+                poolclass=StaticPool,
+            )
+            self._connection = self._engine.connect()
+        return self._connection
+
+    def close(self):
+        """
+        Close the shared connection, if it is open. The reflected metadata
+        remains cached.
+        """
+        if self._connection is not None:
+            self._connection.close()
+            self._engine.dispose()
+        self._connection = None
+        self._engine = None
+
+    @property
+    def tables(self):
+        """
+        :return: The reflected Pl@ntnote tables, as a dict (table name ->
+            Table).
+        """
+        stat = os.stat(self.db_path)
+        key = (os.path.realpath(self.db_path), stat.st_mtime_ns, stat.st_size)
+        metadata = self._METADATA.get(key, None)
+        if metadata is None:
+            LOGGER.debug("Reflecting the Pl@ntnote database '{}'...".format(
+                self.db_path
+            ))
+            metadata = MetaData()
+            metadata.reflect(bind=self.connect(), only=self.TABLES)
+            # Forget the metadata of the previous versions of the file
+            for k in [k for k in self._METADATA if k[0] == key[0]]:
+                del self._METADATA[k]
+            self._METADATA[key] = metadata
+        return metadata.tables
+
+    @classmethod
+    def clear_metadata_cache(cls):
+        """
+        Clear the reflected metadata cache.
+        """
+        cls._METADATA.clear()
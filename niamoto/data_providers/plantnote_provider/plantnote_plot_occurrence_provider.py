@@ -12,37 +12,30 @@ class PlantnotePlotOccurrenceProvider(BasePlotOccurrenceProvider):
     Pl@ntnote Plot-Occurrence provider.
     """
 
-    def __init__(self, data_provider, plantnote_db_path):
+    def __init__(self, data_provider, plantnote_database):
+        """
+        :param data_provider: The parent data provider.
+        :param plantnote_database: The PlantnoteDatabase shared with the
+            other providers of the parent data provider.
+        """
         super(PlantnotePlotOccurrenceProvider, self).__init__(data_provider)
-        self.plantnote_db_path = plantnote_db_path
+        self.plantnote_database = plantnote_database
 
     def get_provider_plot_occurrence_dataframe(self):
-        db_str = 'sqlite:///{}'.format(self.plantnote_db_path)
-        eng = create_engine(db_str)
-        connection = eng.connect()
-        try:
-            metadata = MetaData()
-            metadata.reflect(eng)
-            plot_occ_table = metadata.tables['Inventaires']
-            sel = select([
-                plot_occ_table.c["ID Parcelle"].label("plot_id"),
-                plot_occ_table.c["ID Individus"].label(
-                    "occurrence_id"
-                ),
-                plot_occ_table.c["Identifiant"].label(
-                    "occurrence_identifier"
-                ),
-            ])
-            df = pd.read_sql(
-                sel,
-                connection,
-                index_col=["plot_id", "occurrence_id"]
-            )
-            return df
-        except:
-            raise
-        finally:
-            if connection:
-                connection.close()
-                eng.dispose()
-
+        connection = self.plantnote_database.connect()
+        plot_occ_table = self.plantnote_database.tables['Inventaires']
+        sel = select([
+            plot_occ_table.c["ID Parcelle"].label("plot_id"),
+            plot_occ_table.c["ID Individus"].label(
+                "occurrence_id"
+            ),
+            plot_occ_table.c["Identifiant"].label(
+                "occurrence_identifier"
+            ),
+        ])
+        df = pd.read_sql(
+            sel,
+            connection,
+            index_col=["plot_id", "occurrence_id"]
+        )
+        return df
@@ -1,5 +1,10 @@
 # coding: utf-8
 
+import json
+
+from sqlalchemy import select, cast
+from sqlalchemy.dialects.postgresql import JSONB
+
 from niamoto.data_providers.base_data_provider import BaseDataProvider
 from niamoto.data_providers.sql_provider.sql_occurrence_provider import \
     SQLOccurrenceProvider
@@ -7,23 +12,51 @@ from niamoto.data_providers.sql_provider.sql_plot_provider import \
     SQLPlotProvider
 from niamoto.data_providers.sql_provider.sql_plot_occurrence_provider import \
     SQLPlotOccurrenceProvider
+from niamoto.db.metadata import data_provider
 
 
 class SQLDataProvider(BaseDataProvider):
     """
     SQL data provider.
+    The occurrences can be synced incrementally (change data capture): if
+    a monotonic column (e.g. 'updated_at', or a version number) is
+    declared, the high-water mark (the greatest value of this column that
+    had been synced) is stored in the data provider's properties, and the
+    following syncs only fetch and apply the records whose value is
+    greater than or equal to it. Deletions are captured by an optional
+    tombstone query.
     """
 
+    # The key of the high-water marks in the data provider's properties
+    CDC_PROPERTY = 'cdc_high_water_marks'
+
     def __init__(self, name, db_url, occurrence_sql=None, plot_sql=None,
-                 plot_occurrence_sql=None):
+                 plot_occurrence_sql=None, occurrence_cdc_column=None,
+                 occurrence_tombstone_sql=None):
+        """
+        :param name: The name of the data provider.
+        :param db_url: The url of the database to query.
+        :param occurrence_sql: The occurrence query.
+        :param plot_sql: The plot query.
+        :param plot_occurrence_sql: The plot-occurrence query.
+        :param occurrence_cdc_column: If not None, the monotonic column of
+            the occurrence query used to sync occurrences incrementally.
+        :param occurrence_tombstone_sql: The query returning the deleted
+            occurrences, used in incremental mode. It must return the
+            'id' of the deleted occurrences and the occurrence_cdc_column.
+        """
         super(SQLDataProvider, self).__init__(name)
         self.db_url = db_url
         self.occurrence_sql = occurrence_sql
         self.plot_sql = plot_sql
         self.plot_occurrence_sql = plot_occurrence_sql
+        self.occurrence_cdc_column = occurrence_cdc_column
+        self.occurrence_tombstone_sql = occurrence_tombstone_sql
         self._occurrence_provider = SQLOccurrenceProvider(
             self,
-            occurrence_sql
+            occurrence_sql,
+            cdc_column=occurrence_cdc_column,
+            tombstone_sql=occurrence_tombstone_sql,
         )
         self._plot_provider = SQLPlotProvider(
             self,
@@ -52,6 +85,47 @@ class SQLDataProvider(BaseDataProvider):
             sync_plot_occurrence=sync_plot_occurrence,
         )
 
+    def get_high_water_mark(self, key, connection):
+        """
+        :param key: The key of the high-water mark (e.g. 'occurrence').
+        :param connection: A connection to the database to work with.
+        :return: The high-water mark stored in the data provider's
+            properties, None if there is none.
+        """
+        marks = self._get_high_water_marks(connection)
+        return marks.get(key, None)
+
+    def set_high_water_mark(self, key, value, connection):
+        """
+        Store a high-water mark in the data provider's properties. The
+        other properties are preserved.
+        :param key: The key of the high-water mark (e.g. 'occurrence').
+        :param value: The high-water mark, must be JSON serializable. If
+            None, the high-water mark is removed (the next sync will be a
+            full sync).
+        :param connection: A connection to the database to work with.
+        """
+        marks = self._get_high_water_marks(connection)
+        if value is None:
+            marks.pop(key, None)
+        else:
+            marks[key] = value
+        upd = data_provider.update().values({
+            'properties': data_provider.c.properties.op('||')(
+                cast(json.dumps({self.CDC_PROPERTY: marks}), JSONB)
+            ),
+        }).where(data_provider.c.id == self.db_id)
+        connection.execute(upd)
+
+    def _get_high_water_marks(self, connection):
+        sel = select([data_provider.c.properties]).where(
+            data_provider.c.id == self.db_id
+        )
+        properties = connection.execute(sel).scalar()
+        if properties is None:
+            return {}
+        return dict(properties.get(self.CDC_PROPERTY, {}))
+
     @classmethod
     def get_type_name(cls):
         raise NotImplementedError()
@@ -1,11 +1,19 @@
 # coding: utf-8
 
+import time
+import datetime
+
 import sqlalchemy as sa
+import numpy as np
 import pandas as pd
 
 from niamoto.data_providers.base_occurrence_provider import \
     BaseOccurrenceProvider
 from niamoto.exceptions import MalformedDataSourceError
+from niamoto.log import get_logger
+
+
+LOGGER = get_logger(__name__)
 
 
 class SQLOccurrenceProvider(BaseOccurrenceProvider):
@@ -17,17 +25,84 @@ class SQLOccurrenceProvider(BaseOccurrenceProvider):
         x -> The longitude of the occurrence (WGS84).
         y -> The latitude of the occurrence (WGS84).
     All the remaining column will be stored as properties.
+    If a cdc column is declared, it must also be returned by the query (it
+    is not stored as a property), and the occurrences are synced
+    incrementally: only the records whose cdc column is greater than or
+    equal to the high-water mark of the previous sync are fetched (the
+    records at the boundary are fetched again, since records with the same
+    value may have been written after the previous sync, re-applying them
+    is harmless). The optional tombstone query must return the 'id' of the
+    deleted occurrences and the cdc column, its records greater than or
+    equal to the high-water mark are deleted.
+    The high-water mark is stored with its type ('timestamp', stored in
+    ISO-8601 format, 'number' or 'string'), and compared as a typed value.
     """
 
     REQUIRED_COLUMNS = set(['id', 'taxon_id', 'x', 'y'])
 
-    def __init__(self, data_provider, occurrence_sql):
+    # The key of the occurrence high-water mark in the provider's properties
+    CDC_KEY = 'occurrence'
+
+    # The types of the stored high-water marks
+    TIMESTAMP = 'timestamp'
+    NUMBER = 'number'
+    STRING = 'string'
+
+    def __init__(self, data_provider, occurrence_sql, cdc_column=None,
+                 tombstone_sql=None):
         super(SQLOccurrenceProvider, self).__init__(data_provider)
         self.occurrence_sql = occurrence_sql
+        self.cdc_column = cdc_column
+        self.tombstone_sql = tombstone_sql
+
+    def _read_sql(self, sql, index_col, high_water_mark=None):
+        """
+        Run a query against the provider's database.
+        :param sql: The query.
+        :param index_col: The index column of the returned DataFrame.
+        :param high_water_mark: If not None, only return the records whose
+            cdc column is greater than or equal to the (typed) high-water
+            mark.
+        :return: The resulting DataFrame.
+        """
+        engine = sa.create_engine(self.data_provider.db_url)
+        connection = engine.connect()
+        try:
+            if high_water_mark is None:
+                return pd.read_sql(sql, connection, index_col=index_col)
+            sql = "SELECT * FROM ({}) AS cdc_source " \
+                  "WHERE {} >= :high_water_mark".format(
+                      sql.strip().rstrip(';'),
+                      engine.dialect.identifier_preparer.quote(
+                          self.cdc_column
+                      ),
+                  )
+            return pd.read_sql(
+                sa.text(sql),
+                connection,
+                params={
+                    'high_water_mark': self._to_sql_value(high_water_mark)
+                },
+                index_col=index_col,
+            )
+        finally:
+            connection.close()
+            engine.dispose()
 
-    def get_provider_occurrence_dataframe(self):
-        connection = sa.create_engine(self.data_provider.db_url).connect()
-        df = pd.read_sql(self.occurrence_sql, connection, index_col='id')
+    def get_provider_occurrence_dataframe(self, high_water_mark=None):
+        """
+        :param high_water_mark: If not None, only return the occurrences
+            whose cdc column is greater than or equal to the (typed)
+            high-water mark.
+        :return: The provider's occurrence DataFrame, see
+            BaseOccurrenceProvider.get_provider_occurrence_dataframe. If a
+            cdc column is declared, it is returned as a column.
+        """
+        df = self._read_sql(
+            self.occurrence_sql,
+            'id',
+            high_water_mark=high_water_mark
+        )
         cols = set(list(df.columns) + ['id', ])
         inter = cols.intersection(self.REQUIRED_COLUMNS)
         if not inter == self.REQUIRED_COLUMNS:
@@ -35,9 +110,17 @@ class SQLOccurrenceProvider(BaseOccurrenceProvider):
                 "('id', 'taxon_id', 'x', 'y'), " \
                 "queried data has: {}".format(cols)
             raise MalformedDataSourceError(m)
+        cdc_cols = set()
+        if self.cdc_column is not None:
+            if self.cdc_column not in cols:
+                m = "The queried data does not contains the cdc column " \
+                    "'{}', queried data has: {}".format(self.cdc_column, cols)
+                raise MalformedDataSourceError(m)
+            cdc_cols.add(self.cdc_column)
         if len(df) == 0:
             return df
         property_cols = cols.difference(self.REQUIRED_COLUMNS)
+        property_cols = property_cols.difference(cdc_cols)
         if len(property_cols) > 0:
             properties = df[list(property_cols)].apply(
                 lambda x: x.to_json(),
@@ -54,3 +137,192 @@ class SQLOccurrenceProvider(BaseOccurrenceProvider):
         df['location'] = location
         df.drop(['x', 'y'], axis=1, inplace=True)
         return df
+
+    def get_provider_deleted_occurrences(self, high_water_mark):
+        """
+        :param high_water_mark: The (typed) high-water mark of the previous
+            sync.
+        :return: A Series indexed by the provider's pks of the occurrences
+            deleted since the high-water mark, with the cdc column as
+            values. Empty if there is no tombstone query.
+        """
+        if self.tombstone_sql is None:
+            return pd.Series([], dtype=object)
+        df = self._read_sql(
+            self.tombstone_sql,
+            'id',
+            high_water_mark=high_water_mark
+        )
+        if self.cdc_column not in df.columns:
+            m = "The tombstone query does not return the cdc column " \
+                "'{}', queried data has: {}".format(
+                    self.cdc_column,
+                    list(df.columns)
+                )
+            raise MalformedDataSourceError(m)
+        return df[self.cdc_column]
+
+    @classmethod
+    def encode_high_water_mark(cls, value):
+        """
+        :param value: A typed high-water mark (pandas Timestamp, number or
+            string), or None.
+        :return: The JSON serializable representation of the high-water
+            mark, stored in the data provider's properties.
+        """
+        if value is None:
+            return None
+        if isinstance(value, pd.Timestamp):
+            return {'type': cls.TIMESTAMP, 'value': value.isoformat()}
+        if isinstance(value, str):
+            return {'type': cls.STRING, 'value': value}
+        return {'type': cls.NUMBER, 'value': value}
+
+    @classmethod
+    def decode_high_water_mark(cls, mark):
+        """
+        :param mark: The stored representation of a high-water mark, see
+            encode_high_water_mark, or None.
+        :return: The typed high-water mark.
+        """
+        if mark is None:
+            return None
+        if mark['type'] == cls.TIMESTAMP:
+            return pd.Timestamp(mark['value'])
+        return mark['value']
+
+    @staticmethod
+    def _to_sql_value(value):
+        if isinstance(value, pd.Timestamp):
+            return value.to_pydatetime()
+        return value
+
+    @classmethod
+    def _coerce_cdc_values(cls, series, like=None):
+        """
+        :param series: A Series of cdc column values, without null values.
+        :param like: If not None, a typed high-water mark: the values are
+            converted to its type.
+        :return: The Series of typed values.
+        """
+        if like is None:
+            if pd.api.types.is_numeric_dtype(series):
+                return series
+            if pd.api.types.is_datetime64_any_dtype(series):
+                return pd.to_datetime(series)
+            if all(isinstance(v, (datetime.date, pd.Timestamp))
+                   for v in series):
+                return pd.to_datetime(series)
+            return series.astype(str)
+        try:
+            if isinstance(like, pd.Timestamp):
+                return pd.to_datetime(series)
+            if isinstance(like, str):
+                return series.astype(str)
+            return pd.to_numeric(series)
+        except (ValueError, TypeError):
+            m = "The values of the cdc column '{}' can not be compared " \
+                "with the stored high-water mark ({}).".format(
+                    series.name,
+                    like
+                )
+            raise MalformedDataSourceError(m)
+
+    @classmethod
+    def get_new_high_water_mark(cls, values, current=None):
+        """
+        :param values: A list of Series of cdc column values.
+        :param current: The current (typed) high-water mark.
+        :return: The greatest value (or current if there are no values), as
+            a typed value (pandas Timestamp, number or string).
+        """
+        mark = current
+        for series in values:
+            series = series.dropna()
+            if len(series) == 0:
+                continue
+            value = cls._coerce_cdc_values(series, like=mark).max()
+            if isinstance(value, np.generic):
+                value = value.item()
+            if mark is None or value > mark:
+                mark = value
+        return mark
+
+    def sync(self, connection, insert=True, update=True, delete=True):
+        """
+        Sync Niamoto database with provider. If a cdc column is declared
+        and a high-water mark had been stored by a previous sync, only the
+        records changed or deleted since then are applied, otherwise all the
+        records are synced. The new high-water mark is stored in the same
+        transaction.
+        :param connection: A connection to the database to work with.
+        :param insert: if False, skip insert operation.
+        :param update: if False, skip update operation.
+        :param delete: if False, skip delete operation.
+        :return: The insert, update, delete DataFrames.
+        """
+        if self.cdc_column is None:
+            return super(SQLOccurrenceProvider, self).sync(
+                connection,
+                insert=insert,
+                update=update,
+                delete=delete,
+            )
+        t = time.time()
+        LOGGER.info("** Occurrence sync starting ('{}' - {})...".format(
+            self.data_provider.name, self.data_provider.get_type_name()
+        ))
+        high_water_mark = self.decode_high_water_mark(
+            self.data_provider.get_high_water_mark(self.CDC_KEY, connection)
+        )
+        LOGGER.debug(
+            "Getting provider's occurrence dataframe (high-water mark: "
+            "{})...".format(high_water_mark)
+        )
+        dataframe = self.get_provider_occurrence_dataframe(
+            high_water_mark=high_water_mark
+        )
+        values = [dataframe[self.cdc_column]]
+        dataframe.drop(self.cdc_column, axis=1, inplace=True)
+        if high_water_mark is None:
+            self.map_provider_taxon_ids(dataframe)
+            sync_result = self._sync(
+                dataframe,
+                connection,
+                insert=insert,
+                update=update,
+                delete=delete,
+            )
+        else:
+            deleted = self.get_provider_deleted_occurrences(high_water_mark)
+            values.append(deleted)
+            LOGGER.debug(
+                "{} changed and {} deleted occurrences since the "
+                "high-water mark.".format(len(dataframe), len(deleted))
+            )
+            if len(dataframe) == 0 and len(deleted) == 0:
+                sync_result = ([], [], [])
+            else:
+                self.map_provider_taxon_ids(dataframe)
+                sync_result = self._sync_changes(
+                    dataframe,
+                    deleted.index,
+                    connection,
+                    insert=insert,
+                    update=update,
+                    delete=delete,
+                )
+        with connection.begin():
+            new_mark = self.get_new_high_water_mark(
+                values,
+                current=high_water_mark
+            )
+            self.data_provider.set_high_water_mark(
+                self.CDC_KEY,
+                self.encode_high_water_mark(new_mark),
+                connection
+            )
+        LOGGER.info("** Occurrence sync with '{}' done ({:.2f} s)!".format(
+            self.data_provider.name, time.time() - t
+        ))
+        return sync_result
@@ -1,17 +1,18 @@
 # coding: utf-8
 
+"""
+Data publishers. Publisher modules are imported on demand: importing this
+package does not import the built-in publishers, nor the R and Python
+publisher scripts of NIAMOTO_HOME. Use load_publishers to import all of
+them, or load_publisher to only import the one corresponding to a key
+(resolved with the publisher manifest, see publisher_manifest).
+"""
+
 import os
 import platform
+import importlib
 
 from niamoto.conf import NIAMOTO_HOME
-from niamoto.data_publishers.occurrence_data_publisher import \
-    OccurrenceDataPublisher
-from niamoto.data_publishers.plot_data_publisher import PlotDataPublisher
-from niamoto.data_publishers.taxon_data_publisher import TaxonDataPublisher
-from niamoto.data_publishers.plot_occurrence_data_publisher import \
-    PlotOccurrenceDataPublisher
-from niamoto.data_publishers.r_data_publisher import RDataPublisher
-from niamoto.data_publishers.raster_data_publisher import RasterDataPublisher
 
 R_SCRIPTS_HOME = os.path.join(NIAMOTO_HOME, 'R')
 PYTHON_SCRIPTS_HOME = os.path.join(NIAMOTO_HOME, 'python', 'publishers')
@@ -22,44 +23,131 @@ if not os.path.exists(R_SCRIPTS_HOME):
 if not os.path.exists(PYTHON_SCRIPTS_HOME):
     os.makedirs(PYTHON_SCRIPTS_HOME)
 
+#  Modules of the built-in publishers
+BUILTIN_PUBLISHER_MODULES = [
+    'niamoto.data_publishers.occurrence_data_publisher',
+    'niamoto.data_publishers.plot_data_publisher',
+    'niamoto.data_publishers.taxon_data_publisher',
+    'niamoto.data_publishers.plot_occurrence_data_publisher',
+    'niamoto.data_publishers.r_data_publisher',
+    'niamoto.data_publishers.raster_data_publisher',
+    'niamoto.data_publishers.occurrence_vector_publisher',
+]
+
+R_SCRIPT = 'r_script'
+PYTHON_SCRIPT = 'python_script'
+MODULE = 'module'
+
+#  Source of the publishers loaded from the NIAMOTO_HOME scripts, by key:
+#  (R_SCRIPT or PYTHON_SCRIPT, file name)
+PUBLISHER_SOURCES = {}
+
+_LOADED_SCRIPTS = set()
+_ALL_LOADED = False
+
 
 def create_r_publisher(file_path):
+    from niamoto.data_publishers.r_data_publisher import RDataPublisher
+
     key = "R_" + file_path[:-2]
+    r_script_path = os.path.join(R_SCRIPTS_HOME, file_path)
+    exchange = RDataPublisher.get_script_exchange(r_script_path)
 
     class RPublisher(RDataPublisher):
 
         def __init__(self):
             super(RPublisher, self).__init__(
-                os.path.join(R_SCRIPTS_HOME, file_path)
+                r_script_path,
+                exchange=exchange
             )
 
         @classmethod
         def get_key(cls):
             return key
 
+    PUBLISHER_SOURCES[key] = (R_SCRIPT, file_path)
+    _LOADED_SCRIPTS.add((R_SCRIPT, file_path))
+    return RPublisher
 
-# Load R data publishers
-for file in os.listdir(R_SCRIPTS_HOME):
-    if file.endswith(".R"):
-        create_r_publisher(file)
 
+def load_python_publisher(file_path):
+    """
+    Load a Python publisher script of NIAMOTO_HOME.
+    :param file_path: The file name of the script.
+    """
+    from niamoto.data_publishers.base_data_publisher import \
+        PUBLISHER_REGISTRY
+    if (PYTHON_SCRIPT, file_path) in _LOADED_SCRIPTS:
+        return
+    keys = set(PUBLISHER_REGISTRY.keys())
+    py_version = platform.python_version_tuple()
+    if int(py_version[1]) >= 5:
+        import importlib.util
+        spec = importlib.util.spec_from_file_location(
+            file_path[:-3],
+            os.path.join(PYTHON_SCRIPTS_HOME, file_path)
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    else:
+        from importlib.machinery import SourceFileLoader
+        SourceFileLoader(
+            file_path[:-3],
+            os.path.join(PYTHON_SCRIPTS_HOME, file_path)
+        ).load_module()
+    for key in set(PUBLISHER_REGISTRY.keys()).difference(keys):
+        PUBLISHER_SOURCES[key] = (PYTHON_SCRIPT, file_path)
+    _LOADED_SCRIPTS.add((PYTHON_SCRIPT, file_path))
 
-# Load Python data publishers
-py_version = platform.python_version_tuple()
-for file in os.listdir(PYTHON_SCRIPTS_HOME):
-    if file.endswith(".py"):
-        if int(py_version[1]) >= 5:
-            import importlib
-            import importlib.util
-            spec = importlib.util.spec_from_file_location(
-                file[:-3],
-                os.path.join(PYTHON_SCRIPTS_HOME, file)
-            )
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
-        else:
-            from importlib.machinery import SourceFileLoader
-            module = SourceFileLoader(
-                file[:-3],
-                os.path.join(PYTHON_SCRIPTS_HOME, file)
-            ).load_module()
+
+def load_source(source_type, name):
+    """
+    Load a publisher source.
+    :param source_type: MODULE, R_SCRIPT or PYTHON_SCRIPT.
+    :param name: The module name or the script file name.
+    """
+    if source_type == MODULE:
+        importlib.import_module(name)
+    elif source_type == R_SCRIPT:
+        if (R_SCRIPT, name) not in _LOADED_SCRIPTS:
+            create_r_publisher(name)
+    elif source_type == PYTHON_SCRIPT:
+        load_python_publisher(name)
+    else:
+        raise ValueError("Unknown publisher source '{}'.".format(source_type))
+
+
+def load_publishers():
+    """
+    Load the built-in publishers and the R and Python publisher scripts of
+    NIAMOTO_HOME.
+    """
+    global _ALL_LOADED
+    if _ALL_LOADED:
+        return
+    for module in BUILTIN_PUBLISHER_MODULES:
+        load_source(MODULE, module)
+    # Load R data publishers
+    for file in sorted(os.listdir(R_SCRIPTS_HOME)):
+        if file.endswith(".R"):
+            load_source(R_SCRIPT, file)
+    # Load Python data publishers
+    for file in sorted(os.listdir(PYTHON_SCRIPTS_HOME)):
+        if file.endswith(".py"):
+            load_source(PYTHON_SCRIPT, file)
+    _ALL_LOADED = True
+
+
+def load_publisher(publisher_key):
+    """
+    Load the publisher corresponding to a key, using the publisher manifest
+    to only import its source. If the key is not in the manifest, load all
+    the publishers.
+    :param publisher_key: The key of the publisher.
+    """
+    from niamoto.data_publishers.publisher_manifest import get_manifest
+    publisher = get_manifest()['publishers'].get(publisher_key, None)
+    if publisher is None:
+        load_publishers()
+        return
+    load_source(*publisher['source'])
@@ -1,16 +1,31 @@
 # coding: utf-8
 
 import sys
+import itertools
+import collections.abc
 
 from sqlalchemy import create_engine
+import pandas as pd
 from geopandas import GeoDataFrame, GeoSeries
 
 from niamoto.data_publishers.utils.geo_pandas_sql import to_postgis
+from niamoto.data_publishers.utils.copy_sql import copy_to_postgres
+from niamoto.data_publishers.publisher_cache import PUBLISHER_CACHE
 from niamoto.db.connector import Connector
+from niamoto.db.revision import DatabaseRevision
+from niamoto.exceptions import UnavailablePublishFormat, \
+    IncompatibleSchemaError
+from niamoto.log import get_logger
 
 
+LOGGER = get_logger(__name__)
+
 PUBLISHER_REGISTRY = {}
 
+#  The maximum number of slices read ahead to infer the arrow schema of
+#  streamed data (see BaseDataPublisher._iter_record_batches).
+SCHEMA_INFERENCE_SLICES = 10
+
 
 class PublisherMeta(type):
 
@@ -33,12 +48,21 @@ class BaseDataPublisher(metaclass=PublisherMeta):
     CSV = 'csv'
     SQL = 'sql'
     TIFF = 'tiff'
-    PUBLISH_FORMATS = [CSV, SQL, TIFF]
+    PARQUET = 'parquet'
+    ARROW = 'arrow'
+    PUBLISH_FORMATS = [CSV, SQL, TIFF, PARQUET, ARROW]
     PUBLISH_FORMATS_DESCRIPTION = {
         CSV: "Publish the data using the csv format.",
         SQL: "Publish the data as a table to a SQL database",
         TIFF: "Publish the data as a tiff raster file.",
+        PARQUET: "Publish the data using the parquet columnar format.",
+        ARROW: "Publish the data using the arrow IPC file format.",
     }
+    #  If True, the results are memoized in the publisher cache, until the
+    #  database revision changes. Only suitable for publishers whose results
+    #  only depend on their arguments and on the data covered by the
+    #  database revision (occurrences, plots, taxa).
+    MEMOIZE = False
 
     def __init__(self):
         self.last_data = None
@@ -55,15 +79,33 @@ class BaseDataPublisher(metaclass=PublisherMeta):
     def get_description(cls):
         raise NotImplementedError()
 
-    def process(self, *args, **kwargs):
+    def process(self, *args, memoize=None, **kwargs):
         """
         Process the data, memoize and return the result to be published.
+        :param memoize: If True, reuse the cached result of a previous call
+            with the same arguments, if the database revision did not change
+            since. Streamed results are never cached. If None, use the
+            MEMOIZE class attribute.
         :return: The data to be published after processing, the publish args
             and the publish kwargs.
         """
-        r = self._process(*args, **kwargs)
-        if not isinstance(r, (list, tuple)):
-            r = [r, [], {}]
+        if memoize is None:
+            memoize = self.MEMOIZE
+        r = None
+        if memoize:
+            key = PUBLISHER_CACHE.make_key(self.get_key(), args, kwargs)
+            revision = DatabaseRevision.get_tag()
+            found, r = PUBLISHER_CACHE.get(key, revision)
+            if found:
+                LOGGER.debug("Using cached result for '{}'.".format(
+                    self.get_key()
+                ))
+        if r is None:
+            r = self._process(*args, **kwargs)
+            if not isinstance(r, (list, tuple)):
+                r = [r, [], {}]
+            if memoize and not isinstance(r[0], collections.abc.Iterator):
+                PUBLISHER_CACHE.set(key, revision, tuple(r))
         self.last_data = r[0]
         self.last_publish_args = r[1]
         self.last_publish_kwargs = r[2]
@@ -103,25 +145,50 @@ class BaseDataPublisher(metaclass=PublisherMeta):
             **kwargs
         )
 
+    @staticmethod
+    def _as_chunks(data):
+        """
+        :param data: A pandas DataFrame (or GeoSeries) or an iterator over
+            pandas DataFrames.
+        :return: An iterable over DataFrames and a boolean which is True if
+            the data is streamed (i.e. is an iterator over DataFrames).
+        """
+        if isinstance(data, (pd.DataFrame, GeoSeries)):
+            return [data], False
+        return data, True
+
     @staticmethod
     def _publish_csv(data, *args, destination=sys.stdout, index_label=None,
                      **kwargs):
         """
         Publish the data in a csv file.
-        :param data: The data to publish, assume that it is a pandas DataFrame.
+        :param data: The data to publish, assume that it is a pandas DataFrame
+            or an iterator over pandas DataFrames.
         :param destination_path: The destination file path.
         """
-        data.to_csv(destination, index_label=index_label)
+        chunks = BaseDataPublisher._as_chunks(data)[0]
+        for i, chunk in enumerate(chunks):
+            chunk.to_csv(
+                destination,
+                index_label=index_label,
+                header=(i == 0),
+                mode='w' if i == 0 else 'a',
+            )
 
     @staticmethod
     def _publish_sql(data, destination, *args, db_url=None, schema='public',
                      if_exists='fail', truncate_cascade=False,
-                     set_pk=None, **kwargs):
+                     set_pk=None, index_label=None, method='copy',
+                     **kwargs):
         """
         Publish a DataFrame as a table to a SQL database.
-        Rely on pandas 'to_sql' method. c.f. :
+        With the 'copy' method, the table is created from the schema
+        inferred by pandas and the rows are streamed with COPY, geometries
+        being encoded as hex EWKB. With the 'insert' method, rely on pandas
+        'to_sql' method. c.f. :
         https://pandas.pydata.org/pandas-docs/stable/generated/pandas.DataFrame.to_sql.html
-        :param data: A pandas DataFrame.
+        :param data: A pandas DataFrame or an iterator over pandas
+            DataFrames, appended one after the other.
         :param destination: The name of the destination table.
         :param db_url: A sqlalchemy database url.
         :param schema: The name of the schema where to write the table. If
@@ -130,11 +197,18 @@ class BaseDataPublisher(metaclass=PublisherMeta):
             default ‘fail’.
         :param truncate_cascade: Truncate in cascade, default is False. Only
             active if if_exists is 'truncate'
+        :param index_label: The name of the index column.
+        :param method: {'copy', 'insert'}, default 'copy'. 'copy' is only
+            available with PostgreSQL, 'insert' is used with other databases.
         """
         if db_url is None:
             connection = Connector.get_engine().connect()
         else:
             connection = create_engine(db_url).connect()
+        if method not in ('copy', 'insert'):
+            raise ValueError("Unknown sql publish method '{}'.".format(method))
+        if connection.dialect.name != 'postgresql':
+            method = 'insert'
         with connection.begin():
             if if_exists == 'truncate':
                 test = \
@@ -153,21 +227,39 @@ class BaseDataPublisher(metaclass=PublisherMeta):
                         sql += " CASCADE"
                     connection.execute(sql)
                 if_exists = 'append'
-            if isinstance(data, (GeoDataFrame, GeoSeries)):
-                return to_postgis(
-                    data,
-                    destination,
-                    con=connection,
-                    schema=schema,
-                    if_exists=if_exists
-                )
-            data.to_sql(
-                destination,
-                con=connection,
-                schema=schema,
-                if_exists=if_exists
-            )
-            if set_pk is not None:
+            chunks = BaseDataPublisher._as_chunks(data)[0]
+            is_geo = False
+            for chunk in chunks:
+                if isinstance(chunk, (GeoDataFrame, GeoSeries)):
+                    is_geo = True
+                if method == 'copy':
+                    copy_to_postgres(
+                        chunk,
+                        destination,
+                        connection,
+                        schema=schema,
+                        if_exists=if_exists,
+                        index_label=index_label
+                    )
+                elif is_geo:
+                    to_postgis(
+                        chunk,
+                        destination,
+                        con=connection,
+                        schema=schema,
+                        if_exists=if_exists,
+                        index_label=index_label
+                    )
+                else:
+                    chunk.to_sql(
+                        destination,
+                        con=connection,
+                        schema=schema,
+                        if_exists=if_exists,
+                        index_label=index_label
+                    )
+                if_exists = 'append'
+            if set_pk is not None and not is_geo:
                 if isinstance(set_pk, (list, tuple)):
                     set_pk = ",".join(set_pk)
                 connection.execute(
@@ -180,7 +272,204 @@ class BaseDataPublisher(metaclass=PublisherMeta):
                     )
                 )
 
+    @staticmethod
+    def _iter_record_batches(data, index_label=None, row_group_size=100000,
+                             dictionary_columns=None):
+        """
+        Convert a DataFrame into arrow record batches, slice by slice, in
+        order to avoid converting the whole DataFrame at once.
+        :param data: A pandas DataFrame or an iterator over pandas
+            DataFrames. Geometries are converted to WKB.
+        :param index_label: The name of the index column.
+        :param row_group_size: The number of rows of each record batch.
+        :param dictionary_columns: Columns to dictionary encode. Can be a
+            python list or a comma (',') separated string. When the data is
+            streamed, the columns are dictionary encoded batch by batch.
+        :return: The arrow schema and an iterator over the record batches.
+            When the data is streamed, the schema is inferred from the
+            first slices (up to SCHEMA_INFERENCE_SLICES slices are read
+            ahead to type the columns that are null in the first ones, the
+            columns that remain untyped are strings), and every batch is
+            converted to it (e.g. integers with missing values are written
+            as integers with nulls). IncompatibleSchemaError is raised by the
+            iterator if a batch can not be converted without loss.
+        """
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise UnavailablePublishFormat(
+                "The pyarrow package is required by the columnar publish "
+                "formats."
+            )
+        if isinstance(dictionary_columns, str):
+            dictionary_columns = dictionary_columns.split(',')
+        chunks, streamed = BaseDataPublisher._as_chunks(data)
+
+        def prepare(df):
+            if isinstance(df, GeoSeries):
+                df = GeoDataFrame(geometry=df)
+            if isinstance(df, GeoDataFrame):
+                geom_col = df.geometry.name
+                df = df.copy()
+                df[geom_col] = [
+                    None if g is None else g.wkb for g in df[geom_col]
+                ]
+                df = pd.DataFrame(df)
+            if dictionary_columns is not None:
+                df = df.copy()
+                for col in dictionary_columns:
+                    if col in df.columns:
+                        df[col] = df[col].astype('category')
+            if index_label is not None:
+                df = df.rename_axis(index_label)
+            return df
+
+        def slices(frames):
+            for frame in frames:
+                for start in range(0, len(frame), row_group_size):
+                    yield frame.iloc[start:start + row_group_size]
+
+        if streamed:
+            sliced = slices(prepare(c) for c in chunks)
+            read_ahead = []
+            schema = None
+            for frame in sliced:
+                read_ahead.append(frame)
+                frame_schema = pa.Schema.from_pandas(
+                    frame,
+                    preserve_index=True
+                )
+                if schema is None:
+                    schema = frame_schema
+                else:
+                    for i, field in enumerate(schema):
+                        if not pa.types.is_null(field.type):
+                            continue
+                        j = frame_schema.get_field_index(field.name)
+                        if j >= 0:
+                            schema = schema.set(i, frame_schema[j])
+                untyped = [f for f in schema if pa.types.is_null(f.type)]
+                if len(untyped) == 0 or \
+                        len(read_ahead) >= SCHEMA_INFERENCE_SLICES:
+                    break
+            if schema is None:
+                return pa.schema([]), iter([])
+            for i, field in enumerate(schema):
+                if pa.types.is_null(field.type):
+                    # Entirely null in the read ahead slices, assumed to
+                    # be strings.
+                    schema = schema.set(i, pa.field(field.name, pa.string()))
+                elif pa.types.is_dictionary(field.type):
+                    # The dictionaries, hence the number of values, change
+                    # from a batch to another.
+                    value_type = field.type.value_type
+                    if pa.types.is_null(value_type):
+                        value_type = pa.string()
+                    schema = schema.set(i, pa.field(
+                        field.name,
+                        pa.dictionary(pa.int32(), value_type)
+                    ))
+            sliced = itertools.chain(read_ahead, sliced)
+        else:
+            frames = [prepare(c) for c in chunks]
+            schema = pa.Schema.from_pandas(frames[0], preserve_index=True)
+            sliced = slices(frames)
+
+        def batches():
+            for chunk in sliced:
+                try:
+                    table = pa.Table.from_pandas(
+                        chunk,
+                        schema=schema,
+                        preserve_index=True
+                    )
+                except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+                    raise IncompatibleSchemaError(
+                        "A chunk of the data can not be converted to the "
+                        "published schema, which has been inferred from the "
+                        "first chunks ({}): {}".format(
+                            ', '.join([
+                                '{}: {}'.format(f.name, f.type) for f in schema
+                            ]),
+                            e
+                        )
+                    )
+                for batch in table.to_batches():
+                    yield batch
+        return schema, batches()
+
+    @staticmethod
+    def _publish_parquet(data, *args, destination=sys.stdout,
+                         index_label=None, row_group_size=100000,
+                         compression='snappy', dictionary_columns=None,
+                         **kwargs):
+        """
+        Publish the data in a parquet file, one row group at a time.
+        :param data: The data to publish, assume that it is a pandas DataFrame
+            or an iterator over pandas DataFrames.
+        :param destination: The destination file path.
+        :param row_group_size: The number of rows per row group.
+        :param compression: The compression codec ('snappy', 'gzip',
+            'brotli', 'zstd' or 'none').
+        :param dictionary_columns: Columns to dictionary encode, as a comma
+            (',') separated string.
+        """
+        schema, batches = BaseDataPublisher._iter_record_batches(
+            data,
+            index_label=index_label,
+            row_group_size=row_group_size,
+            dictionary_columns=dictionary_columns,
+        )
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if destination is sys.stdout:
+            destination = sys.stdout.buffer
+        writer = pq.ParquetWriter(destination, schema, compression=compression)
+        try:
+            for batch in batches:
+                writer.write_table(pa.Table.from_batches([batch]))
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _publish_arrow(data, *args, destination=sys.stdout, index_label=None,
+                       row_group_size=100000, dictionary_columns=None,
+                       **kwargs):
+        """
+        Publish the data in an arrow IPC file, one record batch at a time.
+        :param data: The data to publish, assume that it is a pandas DataFrame
+            or an iterator over pandas DataFrames.
+        :param destination: The destination file path.
+        :param row_group_size: The number of rows per record batch.
+        :param dictionary_columns: Columns to dictionary encode, as a comma
+            (',') separated string. Not supported for streamed data, since
+            the arrow file format requires a single dictionary per column.
+        """
+        if dictionary_columns is not None \
+                and BaseDataPublisher._as_chunks(data)[1]:
+            raise ValueError(
+                "dictionary_columns is not supported when publishing streamed "
+                "data in the arrow format, use the parquet format instead."
+            )
+        schema, batches = BaseDataPublisher._iter_record_batches(
+            data,
+            index_label=index_label,
+            row_group_size=row_group_size,
+            dictionary_columns=dictionary_columns,
+        )
+        import pyarrow as pa
+        if destination is sys.stdout:
+            destination = sys.stdout.buffer
+        writer = pa.ipc.new_file(destination, schema)
+        try:
+            for batch in batches:
+                writer.write_batch(batch)
+        finally:
+            writer.close()
+
     FORMAT_TO_METHOD = {
         CSV: _publish_csv.__func__,
         SQL: _publish_sql.__func__,
+        PARQUET: _publish_parquet.__func__,
+        ARROW: _publish_arrow.__func__,
     }
@@ -1,6 +1,9 @@
 # coding: utf-8
 
+from sqlalchemy import select
+
 from niamoto.data_publishers.base_data_publisher import BaseDataPublisher
+from niamoto.db.property_catalog import PropertyCatalog
 
 
 class BaseFactTablePublisher(BaseDataPublisher):
@@ -14,6 +17,28 @@ class BaseFactTablePublisher(BaseDataPublisher):
     def _process(self, *args, **kwargs):
         raise NotImplementedError()
 
+    @staticmethod
+    def get_properties_select(entity, keys, connection=None):
+        """
+        Build a select of the typed properties of occurrences or plots, to
+        be used by fact-table publishers reading properties. The properties
+        are extracted with the expressions of PropertyCatalog, hence the
+        promoted properties use their indexed expression.
+        :param entity: 'occurrence' or 'plot'.
+        :param keys: The property keys to extract.
+        :param connection: If not None, use an existing connection.
+        :return: A sqlalchemy select of the 'id' column and one column per
+            property key.
+        """
+        table = PropertyCatalog.ENTITY_TABLES[entity]
+        return select(
+            [table.c.id] + PropertyCatalog.get_typed_properties(
+                entity,
+                keys,
+                connection=connection
+            )
+        )
+
     @classmethod
     def get_description(cls):
         pass
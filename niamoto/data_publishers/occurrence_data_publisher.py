@@ -1,12 +1,14 @@
 # coding: utf-8
 
-from sqlalchemy import select, func, cast, String, distinct
+from sqlalchemy import select, func, cast, String, distinct, and_, text
 import pandas as pd
 import geopandas as gpd
 
 from niamoto.data_publishers.base_data_publisher import BaseDataPublisher
 from niamoto.db import metadata as meta
 from niamoto.db.connector import Connector
+from niamoto.db.property_catalog import PropertyCatalog
+from niamoto.taxonomy.taxonomy_manager import TaxonomyManager
 
 
 class OccurrenceDataPublisher(BaseDataPublisher):
@@ -23,50 +25,103 @@ class OccurrenceDataPublisher(BaseDataPublisher):
         return "Publish the occurrence dataframe with properties as columns."
 
     def _process(self, *args, properties=None, drop_null_properties=False,
-                 **kwargs):
+                 where=None, taxon_id=None, chunksize=0, **kwargs):
         """
         Return the occurrence dataframe.
         :param properties: List of properties to retain. Can be a python list
-            or a comma (',') separated string.
+            or a comma (',') separated string. Only the retained properties
+            are extracted from the database, numeric, boolean and string
+            properties are extracted with their SQL type.
+        :param drop_null_properties: If True, drop the occurrences having a
+            null value for one of the retained properties.
+        :param where: A SQL boolean expression filtering the occurrences,
+            evaluated in the database. It can reference the properties and
+            the 'taxon_id', 'rank', 'full_name', 'x' and 'y' columns
+            (e.g. "dbh > 10 AND rank = 'SPECIES'").
+        :param taxon_id: If not None, only publish the occurrences of the
+            subtree of this taxon (the taxon and its descendants).
+        :param chunksize: If greater than 0, the occurrences are read using
+            a server side cursor and a generator of DataFrames of at most
+            chunksize rows is returned instead of a single DataFrame. The
+            publish formats write the chunks incrementally.
         """
-        with Connector.get_connection() as connection:
-            sel_keys = select([
-                func.jsonb_object_keys(
-                    meta.occurrence.c.properties
-                ).distinct(),
-            ])
-            if properties is None:
-                keys = [i[0] for i in connection.execute(sel_keys).fetchall()]
-            else:
-                if isinstance(properties, str):
-                    properties = properties.split(',')
-                keys = properties
-            props = [meta.occurrence.c.properties[k].label(k) for k in keys]
-            sel = select([
-                meta.occurrence.c.id.label('id'),
-                meta.occurrence.c.taxon_id.label('taxon_id'),
-                cast(meta.taxon.c.rank.label('rank'), String).label('rank'),
-                meta.taxon.c.full_name.label('full_name'),
-                func.st_x(meta.occurrence.c.location).label('x'),
-                func.st_y(meta.occurrence.c.location).label('y'),
-            ] + props).select_from(
-                meta.occurrence.outerjoin(
-                    meta.taxon,
-                    meta.taxon.c.id == meta.occurrence.c.taxon_id
-                )
+        if properties is None:
+            keys = PropertyCatalog.get_keys(PropertyCatalog.OCCURRENCE)
+        else:
+            if isinstance(properties, str):
+                properties = properties.split(',')
+            keys = properties
+        props = PropertyCatalog.get_typed_properties(
+            PropertyCatalog.OCCURRENCE,
+            keys
+        )
+        sel = select([
+            meta.occurrence.c.id.label('id'),
+            meta.occurrence.c.taxon_id.label('taxon_id'),
+            cast(meta.taxon.c.rank.label('rank'), String).label('rank'),
+            meta.taxon.c.full_name.label('full_name'),
+            func.st_x(meta.occurrence.c.location).label('x'),
+            func.st_y(meta.occurrence.c.location).label('y'),
+        ] + props).select_from(
+            meta.occurrence.outerjoin(
+                meta.taxon,
+                meta.taxon.c.id == meta.occurrence.c.taxon_id
             )
+        )
+        if drop_null_properties and len(keys) > 0:
+            sel = sel.where(and_(*[
+                meta.occurrence.c.properties[k].astext.isnot(None)
+                for k in keys
+            ]))
+        if taxon_id is not None:
+            sel = sel.where(TaxonomyManager.get_subtree_condition(taxon_id))
+        id_col = meta.occurrence.c.id
+        if where is not None:
+            # The query is wrapped in order to expose the labels to the
+            # filter, the planner pushes the filter down to the scan.
+            sub = sel.alias('occurrence_data')
+            sel = select([sub]).where(text(where))
+            id_col = sub.c.id
+        publish_kwargs = {
+            'index_label': 'id',
+            'dictionary_columns': ['rank', 'full_name'],
+        }
+        if chunksize > 0:
+            sel = sel.order_by(id_col)
+            return self._iter_chunks(sel, chunksize), [], publish_kwargs
+        with Connector.get_connection() as connection:
             df = pd.read_sql(sel, connection, index_col='id')
-            df['taxon_id'] = df['taxon_id'].apply(pd.to_numeric)
-            #  Replace None values with nan
-            df.fillna(value=pd.np.NAN, inplace=True)
-            if drop_null_properties:
-                for k in keys:
-                    df = df[df[k].notnull()]
-            return df, [], {'index_label': 'id'}
+        return self._format_chunk(df), [], publish_kwargs
+
+    @classmethod
+    def _iter_chunks(cls, sel, chunksize):
+        """
+        Generator reading the occurrences with a server side cursor.
+        :return: An iterator over DataFrames of at most chunksize rows.
+        """
+        with Connector.get_connection() as connection:
+            streaming = connection.execution_options(stream_results=True)
+            chunks = pd.read_sql(
+                sel,
+                streaming,
+                index_col='id',
+                chunksize=chunksize
+            )
+            for chunk in chunks:
+                yield cls._format_chunk(chunk)
+
+    @staticmethod
+    def _format_chunk(df):
+        df['taxon_id'] = pd.to_numeric(df['taxon_id'])
+        #  Replace None values with nan, typed columns already use nan
+        obj_cols = df.columns[df.dtypes == object]
+        if len(obj_cols) > 0:
+            df[obj_cols] = df[obj_cols].fillna(value=pd.np.NAN)
+        return df
 
     @classmethod
     def get_publish_formats(cls):
-        return [cls.CSV, cls.SQL]
+        return [cls.CSV, cls.SQL, cls.PARQUET, cls.ARROW]
 
 
 class OccurrenceLocationPublisher(BaseDataPublisher):
@@ -0,0 +1,249 @@
+# coding: utf-8
+
+import pandas as pd
+import geopandas as gpd
+from shapely.geometry import Point
+
+from niamoto.conf import settings
+from niamoto.data_publishers.base_data_publisher import BaseDataPublisher
+from niamoto.vector.vector_manager import VectorManager
+from niamoto.db import metadata as meta
+from niamoto.db.connector import Connector
+from niamoto.log import get_logger
+
+
+LOGGER = get_logger(__name__)
+
+
+class OccurrenceVectorPublisher(BaseDataPublisher):
+    """
+    Assign to every occurrence the key of the vector dimension features
+    containing it, for several vector dimensions in one pass. The resulting
+    '<dimension_name>_id' columns correspond to the foreign key columns
+    expected by the fact tables.
+    """
+
+    DATABASE = 'database'
+    LOCAL = 'local'
+    AUTO = 'auto'
+
+    @classmethod
+    def get_key(cls):
+        return 'occurrence_vector_keys'
+
+    @classmethod
+    def get_description(cls):
+        return "Publish the vector dimension keys containing each occurrence."
+
+    @classmethod
+    def get_publish_formats(cls):
+        return [cls.CSV, cls.SQL, cls.PARQUET, cls.ARROW]
+
+    def _process(self, vector_names, *args, chunk_size=100000,
+                 method=AUTO, local_max_features=1000, fill_ns=True,
+                 **kwargs):
+        """
+        :param vector_names: The names of the vector dimensions to join with
+            occurrences. Can be a python list or a comma (',') separated
+            string.
+        :param chunk_size: The number of occurrences processed at once.
+        :param method: 'database' performs the point in polygon test in
+            PostGIS with a GiST indexed ST_Contains, 'local' loads the layers
+            and performs the test with the geopandas spatial index, 'auto'
+            (default) uses 'local' for layers having at most
+            local_max_features features and 'database' for the others.
+        :param local_max_features: The feature count threshold used by
+            the 'auto' method.
+        :param fill_ns: If True, occurrences that are not contained by any
+            feature of a dimension get the key of its NS row.
+        :return: A DataFrame indexed by occurrence id, with one
+            '<dimension_name>_id' column per vector dimension.
+        """
+        if isinstance(vector_names, str):
+            vector_names = vector_names.split(',')
+        layers = {}
+        for name in vector_names:
+            geom_col, geom_type, srid = VectorManager.get_geometry_column(
+                name
+            )
+            layers[name] = {'geom_col': geom_col, 'srid': srid}
+        with Connector.get_connection() as connection:
+            for name, layer in layers.items():
+                layer_method = method
+                if method == self.AUTO:
+                    count = connection.execute(
+                        "SELECT COUNT(*) FROM {}.{};".format(
+                            settings.NIAMOTO_DIMENSIONS_SCHEMA,
+                            name
+                        )
+                    ).scalar()
+                    layer_method = self.LOCAL \
+                        if count <= local_max_features else self.DATABASE
+                if layer_method == self.LOCAL:
+                    layer['features'] = self._get_local_features(
+                        name,
+                        layer['geom_col'],
+                        connection
+                    )
+                elif layer_method != self.DATABASE:
+                    raise ValueError(
+                        "Unknown spatial join method '{}'.".format(method)
+                    )
+                layer['method'] = layer_method
+                layer['ns_id'] = self._get_ns_id(
+                    name,
+                    layer['geom_col'],
+                    connection
+                ) if fill_ns else None
+            chunks = []
+            last_id = None
+            while True:
+                chunk = self._process_chunk(
+                    layers,
+                    last_id,
+                    chunk_size,
+                    connection
+                )
+                if len(chunk) == 0:
+                    break
+                chunks.append(chunk)
+                last_id = chunk.index.max()
+                LOGGER.debug("{} occurrences processed.".format(
+                    sum([len(c) for c in chunks])
+                ))
+        cols = ['{}_id'.format(name) for name in vector_names]
+        if len(chunks) == 0:
+            df = pd.DataFrame(columns=cols)
+            df.index.name = 'id'
+            return df, [], {'index_label': 'id'}
+        df = pd.concat(chunks)[cols]
+        for name in vector_names:
+            ns_id = layers[name]['ns_id']
+            if ns_id is not None:
+                col = '{}_id'.format(name)
+                df[col] = df[col].fillna(ns_id)
+        return df, [], {'index_label': 'id'}
+
+    @staticmethod
+    def _process_chunk(layers, last_id, chunk_size, connection):
+        """
+        Process a chunk of occurrences, ordered by id.
+        :param layers: The layers description dict.
+        :param last_id: The greatest occurrence id of the previous chunk,
+            None for the first chunk.
+        :param chunk_size: The maximum number of occurrences in the chunk.
+        :return: A DataFrame indexed by occurrence id.
+        """
+        occurrence_table = '{}.{}'.format(
+            settings.NIAMOTO_SCHEMA,
+            meta.occurrence.name
+        )
+        db_cols = []
+        db_joins = []
+        for i, (name, layer) in enumerate(layers.items()):
+            if layer['method'] != OccurrenceVectorPublisher.DATABASE:
+                continue
+            location = "occ.location"
+            if int(layer['srid']) != 4326:
+                location = "ST_Transform(occ.location, {})".format(
+                    layer['srid']
+                )
+            db_cols.append("l{}.id AS {}_id".format(i, name))
+            db_joins.append(
+                """
+                LEFT JOIN LATERAL (
+                    SELECT dim.id
+                    FROM {schema}.{tb} AS dim
+                    WHERE dim.{geom} && {location}
+                        AND ST_Contains(dim.{geom}, {location})
+                    LIMIT 1
+                ) AS l{i} ON TRUE
+                """.format(**{
+                    'schema': settings.NIAMOTO_DIMENSIONS_SCHEMA,
+                    'tb': name,
+                    'geom': layer['geom_col'],
+                    'location': location,
+                    'i': i,
+                })
+            )
+        where_clause = ""
+        if last_id is not None:
+            where_clause = "WHERE occ.id > {}".format(int(last_id))
+        sql = \
+            """
+            SELECT occ.id AS id,
+                ST_X(occ.location) AS x,
+                ST_Y(occ.location) AS y
+                {db_cols}
+            FROM (
+                SELECT id, location
+                FROM {occurrence_table} AS occ
+                {where_clause}
+                ORDER BY id
+                LIMIT {chunk_size}
+            ) AS occ
+            {db_joins}
+            ORDER BY occ.id;
+            """.format(**{
+                'db_cols': ''.join([', ' + c for c in db_cols]),
+                'occurrence_table': occurrence_table,
+                'where_clause': where_clause,
+                'chunk_size': int(chunk_size),
+                'db_joins': '\n'.join(db_joins),
+            })
+        df = pd.read_sql(sql, connection, index_col='id')
+        if len(df) == 0:
+            return df
+        local_layers = [
+            (name, layer) for name, layer in layers.items()
+            if layer['method'] == OccurrenceVectorPublisher.LOCAL
+        ]
+        for name, layer in local_layers:
+            df['{}_id'.format(name)] = pd.np.NaN
+        located = df[df['x'].notnull() & df['y'].notnull()]
+        if len(local_layers) > 0 and len(located) > 0:
+            points = gpd.GeoDataFrame(
+                index=located.index,
+                geometry=[Point(xy) for xy in zip(located['x'], located['y'])]
+            )
+            for name, layer in local_layers:
+                joined = gpd.sjoin(
+                    points,
+                    layer['features'],
+                    how='inner',
+                    op='within'
+                )
+                joined = joined[~joined.index.duplicated(keep='first')]
+                df['{}_id'.format(name)] = joined['dim_id']
+        return df
+
+    @staticmethod
+    def _get_local_features(dimension_name, geom_col, connection):
+        """
+        Load the features of a vector dimension, reprojected in WGS84.
+        :return: A GeoDataFrame with a 'dim_id' column.
+        """
+        sql = \
+            """
+            SELECT id AS dim_id, ST_Transform({geom}, 4326) AS geom
+            FROM {schema}.{tb}
+            WHERE {geom} IS NOT NULL;
+            """.format(**{
+                'schema': settings.NIAMOTO_DIMENSIONS_SCHEMA,
+                'tb': dimension_name,
+                'geom': geom_col,
+            })
+        return gpd.read_postgis(sql, connection, geom_col='geom')
+
+    @staticmethod
+    def _get_ns_id(dimension_name, geom_col, connection):
+        """
+        :return: The key of the NS row of a vector dimension (the row
+            without geometry), None if there is no such row.
+        """
+        sql = "SELECT MAX(id) FROM {}.{} WHERE {} IS NULL;".format(
+            settings.NIAMOTO_DIMENSIONS_SCHEMA,
+            dimension_name,
+            geom_col
+        )
+        return connection.execute(sql).scalar()
@@ -1,11 +1,12 @@
 # coding: utf-8
 
-from sqlalchemy import select, func
+from sqlalchemy import select, func, and_, text
 import pandas as pd
 
 from niamoto.data_publishers.base_data_publisher import BaseDataPublisher
 from niamoto.db import metadata as meta
 from niamoto.db.connector import Connector
+from niamoto.db.property_catalog import PropertyCatalog
 
 
 class PlotDataPublisher(BaseDataPublisher):
@@ -21,37 +22,51 @@ class PlotDataPublisher(BaseDataPublisher):
     def get_description(cls):
         return "Publish the plot dataframe with properties as columns."
 
-    def _process(self, *args, properties=None, **kwargs):
+    def _process(self, *args, properties=None, drop_null_properties=False,
+                 where=None, **kwargs):
         """
         Return the plot dataframe.
         :param properties: List of properties to retain. Can be a python list
-            or a comma (',') separated string.
+            or a comma (',') separated string. Numeric, boolean and string
+            properties are extracted with their SQL type.
+        :param drop_null_properties: If True, drop the plots having a null
+            value for one of the retained properties.
+        :param where: A SQL boolean expression filtering the plots,
+            evaluated in the database. It can reference the properties and
+            the 'name', 'x' and 'y' columns (e.g. "elevation > 500").
         """
+        if properties is None:
+            keys = PropertyCatalog.get_keys(PropertyCatalog.PLOT)
+        else:
+            if isinstance(properties, str):
+                properties = properties.split(',')
+            keys = properties
+        props = PropertyCatalog.get_typed_properties(
+            PropertyCatalog.PLOT,
+            keys
+        )
+        sel = select([
+            meta.plot.c.id.label('id'),
+            meta.plot.c.name.label('name'),
+            func.st_x(meta.plot.c.location).label('x'),
+            func.st_y(meta.plot.c.location).label('y'),
+        ] + props)
+        if drop_null_properties and len(keys) > 0:
+            sel = sel.where(and_(*[
+                meta.plot.c.properties[k].astext.isnot(None)
+                for k in keys
+            ]))
+        if where is not None:
+            sel = select([sel.alias('plot_data')]).where(text(where))
         with Connector.get_connection() as connection:
-            sel_keys = select([
-                func.jsonb_object_keys(
-                    meta.plot.c.properties
-                ).distinct(),
-            ])
-            if properties is None:
-                keys = [i[0] for i in connection.execute(sel_keys).fetchall()]
-            else:
-                if isinstance(properties, str):
-                    properties = properties.split(',')
-                keys = properties
-            props = [meta.plot.c.properties[k].label(k) for k in keys]
-            sel = select([
-                meta.plot.c.id.label('id'),
-                meta.plot.c.name.label('name'),
-                func.st_x(meta.plot.c.location).label('x'),
-                func.st_y(meta.plot.c.location).label('y'),
-            ] + props)
             df = pd.read_sql(sel, connection, index_col='id')
-            #  Replace None values with nan
-            df.fillna(value=pd.np.NAN, inplace=True)
-            return df, [], {'index_label': 'id'}
+        #  Replace None values with nan, typed columns already use nan
+        obj_cols = df.columns[df.dtypes == object]
+        if len(obj_cols) > 0:
+            df[obj_cols] = df[obj_cols].fillna(value=pd.np.NAN)
+        return df, [], {'index_label': 'id'}
 
     @classmethod
     def get_publish_formats(cls):
-        return [cls.CSV, cls.SQL]
+        return [cls.CSV, cls.SQL, cls.PARQUET, cls.ARROW]
 
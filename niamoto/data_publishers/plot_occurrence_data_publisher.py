@@ -41,5 +41,5 @@ class PlotOccurrenceDataPublisher(BaseDataPublisher):
 
     @classmethod
     def get_publish_formats(cls):
-        return [cls.CSV, cls.SQL]
+        return [cls.CSV, cls.SQL, cls.PARQUET, cls.ARROW]
 
@@ -0,0 +1,124 @@
+# coding: utf-8
+
+"""
+On-disk cache of the publishers results. Results are pickled under
+NIAMOTO_HOME and keyed on the publisher key and its arguments. Each entry
+is tagged with the database revision it was computed at, entries of
+previous revisions are stale and are purged.
+"""
+
+import os
+import json
+import pickle
+import hashlib
+import tempfile
+
+from niamoto import conf
+from niamoto.log import get_logger
+
+
+LOGGER = get_logger(__name__)
+
+
+class PublisherCache:
+    """
+    Cache of the publishers results, stored in pickle files.
+    """
+
+    EXTENSION = '.pickle'
+
+    def __init__(self, cache_dir=None):
+        """
+        :param cache_dir: The directory of the cache files, if None use the
+            'cache/publishers' directory of NIAMOTO_HOME.
+        """
+        self._cache_dir = cache_dir
+
+    @property
+    def cache_dir(self):
+        if self._cache_dir is not None:
+            return self._cache_dir
+        return os.path.join(conf.NIAMOTO_HOME, 'cache', 'publishers')
+
+    @staticmethod
+    def make_key(publisher_key, args, kwargs):
+        """
+        :return: A key (hex digest) for a publisher call.
+        """
+        dump = json.dumps(
+            [publisher_key, list(args), kwargs],
+            sort_keys=True,
+            default=repr,
+        )
+        return hashlib.sha1(dump.encode('utf-8')).hexdigest()
+
+    def _get_path(self, key, revision):
+        return os.path.join(
+            self.cache_dir,
+            '{}-{}{}'.format(revision, key, self.EXTENSION)
+        )
+
+    def get(self, key, revision):
+        """
+        :param key: The key of the result.
+        :param revision: The current database revision tag.
+        :return: A tuple (found, result).
+        """
+        path = self._get_path(key, revision)
+        try:
+            with open(path, 'rb') as f:
+                return True, pickle.load(f)
+        except FileNotFoundError:
+            return False, None
+        except (pickle.UnpicklingError, EOFError, AttributeError,
+                ImportError) as e:
+            LOGGER.debug("Unreadable cache file '{}': {}".format(path, e))
+            return False, None
+
+    def set(self, key, revision, result):
+        """
+        Store a result, and purge the entries of previous revisions.
+        :param key: The key of the result.
+        :param revision: The database revision tag the result was computed
+            at.
+        :param result: The result to store.
+        :return: True if the result had been stored.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.purge(keep_revision=revision)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._get_path(key, revision))
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            os.remove(tmp_path)
+            LOGGER.debug("Unable to cache publisher result: {}".format(e))
+            return False
+        return True
+
+    def purge(self, keep_revision=None):
+        """
+        Delete the cache files.
+        :param keep_revision: If not None, keep the files of this revision.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return
+        prefix = None
+        if keep_revision is not None:
+            prefix = '{}-'.format(keep_revision)
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(self.EXTENSION):
+                continue
+            if prefix is not None and name.startswith(prefix):
+                continue
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        self.purge()
+
+
+PUBLISHER_CACHE = PublisherCache()
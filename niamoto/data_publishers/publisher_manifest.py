@@ -0,0 +1,175 @@
+# coding: utf-8
+
+"""
+Manifest of the available publishers, cached in a json file under
+NIAMOTO_HOME. The manifest describes each publisher (key, description,
+publish formats, parameters and source) and each publish format, allowing
+the command line interface to be built and a publisher to be resolved
+without importing every publisher module. The manifest is rebuilt whenever
+a publisher module or script is modified, added or removed.
+"""
+
+import os
+import json
+import inspect
+import tempfile
+
+import niamoto
+from niamoto import conf
+from niamoto import data_publishers
+from niamoto.log import get_logger
+
+
+LOGGER = get_logger(__name__)
+
+MANIFEST_VERSION = 1
+
+_MANIFEST = None
+
+
+def get_manifest_path():
+    return os.path.join(conf.NIAMOTO_HOME, 'cache', 'publishers.json')
+
+
+def get_fingerprint():
+    """
+    :return: The fingerprint of the publisher sources: the modification
+        times of the built-in publisher modules and of the publisher
+        scripts of NIAMOTO_HOME.
+    """
+    package_dir = os.path.dirname(data_publishers.__file__)
+    files = [
+        os.path.join(package_dir, m.rsplit('.', 1)[1] + '.py')
+        for m in data_publishers.BUILTIN_PUBLISHER_MODULES
+    ]
+    files.append(os.path.join(package_dir, 'base_data_publisher.py'))
+    for directory, extension in [
+            (data_publishers.R_SCRIPTS_HOME, '.R'),
+            (data_publishers.PYTHON_SCRIPTS_HOME, '.py')]:
+        files += [
+            os.path.join(directory, f) for f in sorted(os.listdir(directory))
+            if f.endswith(extension)
+        ]
+    return {
+        'manifest_version': MANIFEST_VERSION,
+        'niamoto_version': niamoto.__version__,
+        'files': [[f, os.path.getmtime(f)] for f in files],
+    }
+
+
+def _get_parameters(func, exclude=()):
+    """
+    :return: The description of the parameters of a function, used to
+        build the command line options and arguments.
+    """
+    from niamoto.utils import parse_docstring
+    signature = inspect.signature(func)
+    doc = parse_docstring(func.__doc__)
+    parameters = []
+    for name, p in signature.parameters.items():
+        if name == 'self' or name in exclude:
+            continue
+        if p.kind == inspect.Parameter.POSITIONAL_OR_KEYWORD:
+            parameters.append({'name': name, 'kind': 'argument'})
+        elif p.kind == inspect.Parameter.KEYWORD_ONLY:
+            default = p.default
+            if not isinstance(default, (str, int, float, bool)):
+                default = None
+            parameters.append({
+                'name': name,
+                'kind': 'option',
+                'type': type(default).__name__ if default is not None
+                else 'str',
+                'default': default,
+                'help': doc['params'].get(name, "").replace("\n", " "),
+            })
+    return parameters
+
+
+def build_manifest():
+    """
+    Load every publisher and build the manifest.
+    :return: The manifest, as a dict.
+    """
+    from niamoto.utils import parse_docstring
+    from niamoto.data_publishers.base_data_publisher import \
+        PUBLISHER_REGISTRY, BaseDataPublisher
+    data_publishers.load_publishers()
+    publishers = {}
+    for key, entry in PUBLISHER_REGISTRY.items():
+        cls = entry['class']
+        try:
+            formats = cls.get_publish_formats()
+        except NotImplementedError:
+            formats = []
+        source = data_publishers.PUBLISHER_SOURCES.get(
+            key,
+            (data_publishers.MODULE, cls.__module__)
+        )
+        publishers[key] = {
+            'description': entry['description'],
+            'source': list(source),
+            'publish_formats': list(formats),
+            'parameters': _get_parameters(cls._process),
+        }
+    publish_formats = {}
+    for publish_format, method in BaseDataPublisher.FORMAT_TO_METHOD.items():
+        publish_formats[publish_format] = {
+            'description': BaseDataPublisher.PUBLISH_FORMATS_DESCRIPTION.get(
+                publish_format,
+                ""
+            ),
+            'help': parse_docstring(method.__doc__)['short_description'],
+            'parameters': _get_parameters(
+                method,
+                exclude=('data', 'destination')
+            ),
+        }
+    return {
+        'fingerprint': get_fingerprint(),
+        'publishers': publishers,
+        'publish_formats': publish_formats,
+    }
+
+
+def _write_manifest(manifest, path):
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        LOGGER.debug("Unable to write the publisher manifest: {}".format(e))
+
+
+def get_manifest(rebuild=False):
+    """
+    :param rebuild: If True, rebuild the manifest even if it is up to date.
+    :return: The publisher manifest. It is read from its cache file, and
+        rebuilt if it is missing or out of date.
+    """
+    global _MANIFEST
+    path = get_manifest_path()
+    fingerprint = get_fingerprint()
+    if not rebuild and _MANIFEST is not None \
+            and _MANIFEST[0] == path \
+            and _MANIFEST[1]['fingerprint'] == fingerprint:
+        return _MANIFEST[1]
+    manifest = None
+    if not rebuild and os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            LOGGER.debug("Unreadable publisher manifest: {}".format(e))
+        if manifest is not None \
+                and manifest.get('fingerprint', None) != fingerprint:
+            manifest = None
+    if manifest is None:
+        LOGGER.debug("Building the publisher manifest...")
+        manifest = build_manifest()
+        _write_manifest(manifest, path)
+    _MANIFEST = (path, manifest)
+    return manifest
@@ -1,5 +1,9 @@
 # coding: utf-8
 
+import os
+import re
+import tempfile
+
 from rpy2.robjects import conversion
 from rpy2.robjects import r
 from rpy2.robjects import pandas2ri
@@ -19,14 +23,116 @@ from niamoto.data_publishers.taxon_data_publisher import TaxonDataPublisher
 from niamoto.data_publishers.raster_data_publisher import RasterDataPublisher
 
 
+# R definitions of the data access functions when the arrow exchange is
+# used: the python callbacks write the data in arrow IPC (feather) files,
+# which are read by R using the arrow package.
+R_ARROW_BRIDGE = """
+.niamoto_read <- function(path) {
+    as.data.frame(arrow::read_feather(path))
+}
+get_occurrence_dataframe <- function(properties=NULL) {
+    if (is.null(properties)) {
+        return(.niamoto_read(.niamoto_occurrence_path()))
+    }
+    return(.niamoto_read(.niamoto_occurrence_path(properties)))
+}
+get_plot_dataframe <- function(properties=NULL) {
+    if (is.null(properties)) {
+        return(.niamoto_read(.niamoto_plot_path()))
+    }
+    return(.niamoto_read(.niamoto_plot_path(properties)))
+}
+get_plot_occurrence_dataframe <- function() {
+    return(.niamoto_read(.niamoto_plot_occurrence_path()))
+}
+get_taxon_dataframe <- function(include_mptt=FALSE) {
+    return(.niamoto_read(.niamoto_taxon_path(include_mptt)))
+}
+"""
+
+#  Exchange mode directive of the R scripts, e.g. '# niamoto: exchange=arrow'
+EXCHANGE_DIRECTIVE = re.compile(
+    r'^#\s*niamoto:\s*exchange\s*=\s*(rpy2|arrow|auto)\s*$'
+)
+
+
 class RDataPublisher(BaseDataPublisher):
     """
     R script data publisher.
+    Two exchange modes are available for passing DataFrames between Python
+    and R: 'rpy2' converts the DataFrames with the rpy2 pandas converter,
+    'arrow' exchanges them through arrow IPC (feather) files, which are
+    read and written by R using the arrow package. The arrow exchange
+    avoids the per column conversions and fixups, and keeps the column
+    types (missing strings are nulls rather than empty strings), but the
+    DataFrames passed to R differ (the ids are passed as an 'id' column
+    instead of row names, missing strings are NA), hence scripts must opt
+    in to it: either by passing exchange='arrow', or, for the scripts of
+    NIAMOTO_HOME, with a '# niamoto: exchange=arrow' comment line at the top
+    of the script.
     """
 
-    def __init__(self, r_script_path):
+    RPY2 = 'rpy2'
+    ARROW = 'arrow'
+    AUTO = 'auto'
+
+    _ARROW_AVAILABLE = None
+    #  Per R interpreter state: the environments of the sourced scripts,
+    #  keyed on (path, modification time, exchange mode), the environment
+    #  of the arrow bridge functions and the current exchange directory.
+    _SCRIPT_ENVIRONMENTS = {}
+    _ARROW_BRIDGE_ENVIRONMENT = None
+    _CALLBACKS_BOUND = False
+    _EXCHANGE_DIR = None
+
+    def __init__(self, r_script_path, exchange=RPY2):
+        """
+        :param r_script_path: The path of the R script.
+        :param exchange: The exchange mode, 'rpy2' (default), 'arrow' or
+            'auto' ('arrow' if pyarrow and the R arrow package are
+            available, 'rpy2' otherwise).
+        """
         super(RDataPublisher, self).__init__()
         self.r_script_path = r_script_path
+        if exchange == self.AUTO:
+            exchange = self.ARROW if self.is_arrow_available() \
+                else self.RPY2
+        self.exchange = exchange
+
+    @classmethod
+    def is_arrow_available(cls):
+        """
+        :return: True if both pyarrow and the R arrow package are available.
+        """
+        if cls._ARROW_AVAILABLE is None:
+            try:
+                import pyarrow  # noqa: F401
+                cls._ARROW_AVAILABLE = bool(r(
+                    'requireNamespace("arrow", quietly=TRUE)'
+                )[0])
+            except ImportError:
+                cls._ARROW_AVAILABLE = False
+        return cls._ARROW_AVAILABLE
+
+    @classmethod
+    def get_script_exchange(cls, r_script_path):
+        """
+        Read the exchange mode declared in the leading comment lines of a R
+        script ('# niamoto: exchange=arrow').
+        :param r_script_path: The path of the R script.
+        :return: The declared exchange mode, 'rpy2' if none is declared.
+        """
+        with open(r_script_path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                if not line.startswith('#'):
+                    break
+                match = EXCHANGE_DIRECTIVE.match(line)
+                if match is not None:
+                    return match.group(1)
+        return cls.RPY2
 
     @classmethod
     def get_key(cls):
@@ -37,37 +143,191 @@ class RDataPublisher(BaseDataPublisher):
         return "R script."
 
     def _process(self, *args, **kwargs):
+        if self.exchange == self.ARROW:
+            return self._process_arrow()
         with localconverter(default_converter + pandas2ri.converter):
-            globalenv['get_occurrence_dataframe'] = \
-                self.get_occurrence_dataframe
-            globalenv['get_plot_dataframe'] = self.get_plot_dataframe
-            globalenv['get_plot_occurrence_dataframe'] = \
-                self.get_plot_occurrence_dataframe
-            globalenv['get_taxon_dataframe'] = self.get_taxon_dataframe
-            globalenv['get_raster'] = self.get_raster
-            r.source(self.r_script_path)
-            process_func = r['process']
-            df = pandas2ri.ri2py(process_func())
+            env = self.get_script_environment(self.r_script_path, self.RPY2)
+            df = pandas2ri.ri2py(env['process']())
             if isinstance(df, pd.DataFrame):
                 return int32_to_int64(fill_str_empty_with_nan(df)), [], {}
             if len(df) == 1:
                 return df[0], [], {}
             return df, [], {}
 
+    def _process_arrow(self):
+        """
+        Run the R script, exchanging the DataFrames through arrow IPC files
+        stored in a temporary directory.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            RDataPublisher._EXCHANGE_DIR = tmp_dir
+            try:
+                with localconverter(default_converter):
+                    env = self.get_script_environment(
+                        self.r_script_path,
+                        self.ARROW
+                    )
+                    result = env['process']()
+                    if not r['is.data.frame'](result)[0]:
+                        with localconverter(pandas2ri.converter):
+                            result = pandas2ri.ri2py(result)
+                        if len(result) == 1:
+                            return result[0], [], {}
+                        return result, [], {}
+                    result_path = os.path.join(tmp_dir, 'result.arrow')
+                    r('arrow::write_feather')(
+                        result,
+                        result_path,
+                        compression='uncompressed'
+                    )
+                return read_arrow_file(result_path), [], {}
+            finally:
+                RDataPublisher._EXCHANGE_DIR = None
+
+    @classmethod
+    def get_script_environment(cls, r_script_path, exchange):
+        """
+        Return the R environment in which the R script had been sourced.
+        Scripts are sourced once per R interpreter and exchange mode, in
+        their own environment, and are sourced again only if they had been
+        modified: the libraries they load and the objects they define stay
+        loaded between two runs.
+        :param r_script_path: The path of the R script.
+        :param exchange: The exchange mode, 'rpy2' or 'arrow'.
+        :return: The R environment of the script.
+        """
+        path = os.path.abspath(r_script_path)
+        key = (path, os.path.getmtime(path), exchange)
+        env = cls._SCRIPT_ENVIRONMENTS.get(key, None)
+        if env is not None:
+            return env
+        cls._bind_callbacks()
+        parent = globalenv
+        if exchange == cls.ARROW:
+            parent = cls._get_arrow_bridge_environment()
+        env = r['new.env'](parent=parent)
+        r['sys.source'](path, envir=env)
+        stale = [k for k in cls._SCRIPT_ENVIRONMENTS
+                 if k[0] == path and k[2] == exchange]
+        for k in stale:
+            del cls._SCRIPT_ENVIRONMENTS[k]
+        cls._SCRIPT_ENVIRONMENTS[key] = env
+        return env
+
+    @classmethod
+    def _bind_callbacks(cls):
+        """
+        Bind the python callbacks in the R global environment, once per R
+        interpreter.
+        """
+        if cls._CALLBACKS_BOUND:
+            return
+        with localconverter(default_converter):
+            globalenv['get_occurrence_dataframe'] = \
+                RDataPublisher.get_occurrence_dataframe
+            globalenv['get_plot_dataframe'] = \
+                RDataPublisher.get_plot_dataframe
+            globalenv['get_plot_occurrence_dataframe'] = \
+                RDataPublisher.get_plot_occurrence_dataframe
+            globalenv['get_taxon_dataframe'] = \
+                RDataPublisher.get_taxon_dataframe
+            globalenv['get_raster'] = RDataPublisher.get_raster
+            globalenv['.niamoto_occurrence_path'] = \
+                RDataPublisher._get_occurrence_path
+            globalenv['.niamoto_plot_path'] = RDataPublisher._get_plot_path
+            globalenv['.niamoto_plot_occurrence_path'] = \
+                RDataPublisher._get_plot_occurrence_path
+            globalenv['.niamoto_taxon_path'] = RDataPublisher._get_taxon_path
+        cls._CALLBACKS_BOUND = True
+
+    @classmethod
+    def _get_arrow_bridge_environment(cls):
+        """
+        :return: The R environment defining the arrow exchange functions,
+            whose names mask the rpy2 callbacks of the global environment.
+        """
+        if cls._ARROW_BRIDGE_ENVIRONMENT is None:
+            env = r['new.env'](parent=globalenv)
+            r['eval'](r['parse'](text=R_ARROW_BRIDGE), envir=env)
+            cls._ARROW_BRIDGE_ENVIRONMENT = env
+        return cls._ARROW_BRIDGE_ENVIRONMENT
+
+    @staticmethod
+    def _to_exchange_file(name, df):
+        """
+        Write a DataFrame in an arrow IPC file of the exchange directory.
+        :return: The path of the file, as a R character vector.
+        """
+        path = os.path.join(
+            RDataPublisher._EXCHANGE_DIR,
+            '{}.arrow'.format(name)
+        )
+        BaseDataPublisher._publish_arrow(df, destination=path)
+        return StrSexpVector((path, ))
+
+    @staticmethod
+    @rternalize
+    def _get_occurrence_path(properties=None):
+        if properties is not None:
+            properties = list(properties)
+        df = OccurrenceDataPublisher().process(
+            properties=properties,
+            memoize=True,
+        )[0]
+        return RDataPublisher._to_exchange_file('occurrences', df)
+
+    @staticmethod
+    @rternalize
+    def _get_plot_path(properties=None):
+        if properties is not None:
+            properties = list(properties)
+        df = PlotDataPublisher().process(
+            properties=properties,
+            memoize=True,
+        )[0]
+        return RDataPublisher._to_exchange_file('plots', df)
+
+    @staticmethod
+    @rternalize
+    def _get_plot_occurrence_path():
+        df = PlotOccurrenceDataPublisher().process(memoize=True)[0]
+        return RDataPublisher._to_exchange_file('plots_occurrences', df)
+
+    @staticmethod
+    @rternalize
+    def _get_taxon_path(include_mptt=False):
+        if include_mptt is not False:
+            include_mptt = bool(include_mptt[0])
+        df = TaxonDataPublisher().process(
+            include_mptt=include_mptt,
+            memoize=True,
+        )[0]
+        return RDataPublisher._to_exchange_file('taxa', df)
+
     @staticmethod
     @rternalize
     def get_occurrence_dataframe(properties=None):
+        if properties is not None:
+            properties = list(properties)
         convert = default_converter + pandas2ri.converter
         with conversion.localconverter(convert):
-            df = OccurrenceDataPublisher().process(properties=properties)[0]
+            df = OccurrenceDataPublisher().process(
+                properties=properties,
+                memoize=True,
+            )[0]
             return pandas2ri.py2ri(fill_str_nan_with_empty(df))
 
     @staticmethod
     @rternalize
     def get_plot_dataframe(properties=None):
+        if properties is not None:
+            properties = list(properties)
         convert = default_converter + pandas2ri.converter
         with conversion.localconverter(convert):
-            df = PlotDataPublisher().process(properties=properties)[0]
+            df = PlotDataPublisher().process(
+                properties=properties,
+                memoize=True,
+            )[0]
             return pandas2ri.py2ri(fill_str_nan_with_empty(df))
 
     @staticmethod
@@ -75,15 +335,20 @@ class RDataPublisher(BaseDataPublisher):
     def get_plot_occurrence_dataframe():
         convert = default_converter + pandas2ri.converter
         with conversion.localconverter(convert):
-            df = PlotOccurrenceDataPublisher().process()[0]
+            df = PlotOccurrenceDataPublisher().process(memoize=True)[0]
             return pandas2ri.py2ri(fill_str_nan_with_empty(df))
 
     @staticmethod
     @rternalize
     def get_taxon_dataframe(include_mptt=False):
+        if include_mptt is not False:
+            include_mptt = bool(include_mptt[0])
         convert = default_converter + pandas2ri.converter
         with conversion.localconverter(convert):
-            df = TaxonDataPublisher().process(include_mptt=include_mptt)[0]
+            df = TaxonDataPublisher().process(
+                include_mptt=include_mptt,
+                memoize=True,
+            )[0]
             return pandas2ri.py2ri(fill_str_nan_with_empty(df))
 
     @staticmethod
@@ -96,7 +361,25 @@ class RDataPublisher(BaseDataPublisher):
 
     @classmethod
     def get_publish_formats(cls):
-        return [cls.CSV, cls.SQL]
+        return [cls.CSV, cls.SQL, cls.PARQUET, cls.ARROW]
+
+
+def read_arrow_file(path):
+    """
+    Read a DataFrame from an arrow IPC file, using a memory map. The 32 bits
+    integer columns written by R are cast to 64 bits integers on the arrow
+    table, before the conversion to pandas.
+    :param path: The path of the arrow IPC file.
+    :return: A pandas DataFrame.
+    """
+    import pyarrow as pa
+    with pa.memory_map(path) as source:
+        table = pa.ipc.open_file(source).read_all()
+        schema = pa.schema([
+            pa.field(f.name, pa.int64()) if pa.types.is_int32(f.type) else f
+            for f in table.schema
+        ])
+        return table.cast(schema).to_pandas()
 
 
 def fill_str_nan_with_empty(df):
@@ -0,0 +1,134 @@
+# coding: utf-8
+
+"""
+Pool of long-lived worker processes running R publishers. Each worker
+embeds its own R interpreter, in which the R scripts are sourced once (see
+RDataPublisher.get_script_environment): the libraries they load stay warm
+between jobs, and independent R publishers run in parallel instead of
+sharing the single embedded interpreter of the main process. Jobs and
+results are exchanged with the workers through pipes.
+"""
+
+import atexit
+import multiprocessing
+
+from niamoto import conf
+from niamoto.log import get_logger
+
+
+LOGGER = get_logger(__name__)
+
+
+def _init_worker(niamoto_home, settings_module_path):
+    """
+    Initialize a worker process with the niamoto home and settings of the
+    parent process.
+    """
+    conf.set_niamoto_home(niamoto_home)
+    conf.set_settings(settings_module_path)
+
+
+def _run_r_script(r_script_path, exchange):
+    """
+    Process a R script in a worker process.
+    :return: The data to be published, the publish args and the publish
+        kwargs.
+    """
+    from niamoto.data_publishers.r_data_publisher import RDataPublisher
+    return RDataPublisher(r_script_path, exchange=exchange).process()
+
+
+class RWorkerPool:
+    """
+    Pool of R worker processes.
+    """
+
+    def __init__(self, processes=None):
+        """
+        :param processes: The number of worker processes, if None use the
+            number of CPUs.
+        """
+        # Workers are spawned rather than forked: the embedded R
+        # interpreter and the database connections of the parent process
+        # must not be shared.
+        context = multiprocessing.get_context('spawn')
+        self._pool = context.Pool(
+            processes=processes,
+            initializer=_init_worker,
+            initargs=(conf.NIAMOTO_HOME, conf.settings.settings_module_path),
+        )
+
+    def submit(self, r_script_path, exchange='rpy2'):
+        """
+        Submit a R script to the pool.
+        :param r_script_path: The path of the R script.
+        :param exchange: The exchange mode, see RDataPublisher.
+        :return: An AsyncResult, whose get method returns the data to be
+            published, the publish args and the publish kwargs.
+        """
+        LOGGER.debug("Submitting '{}' to the R worker pool.".format(
+            r_script_path
+        ))
+        return self._pool.apply_async(
+            _run_r_script,
+            (r_script_path, exchange)
+        )
+
+    def process(self, r_script_path, exchange='rpy2'):
+        """
+        Process a R script in a worker process and wait for the result.
+        :return: The data to be published, the publish args and the publish
+            kwargs.
+        """
+        return self.submit(r_script_path, exchange=exchange).get()
+
+    def process_many(self, r_script_paths, exchange='rpy2'):
+        """
+        Process several R scripts in parallel.
+        :param r_script_paths: The paths of the R scripts.
+        :return: The list of the results, in the order of the scripts.
+        """
+        results = [self.submit(p, exchange=exchange) for p in r_script_paths]
+        return [result.get() for result in results]
+
+    def close(self):
+        """
+        Stop the worker processes, once the submitted jobs are done.
+        """
+        self._pool.close()
+        self._pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+_R_WORKER_POOL = None
+
+
+def get_r_worker_pool(processes=None):
+    """
+    :param processes: The number of worker processes, only used when the
+        shared pool is created.
+    :return: The shared R worker pool, created on first call and closed at
+        exit.
+    """
+    global _R_WORKER_POOL
+    if _R_WORKER_POOL is None:
+        _R_WORKER_POOL = RWorkerPool(processes=processes)
+    return _R_WORKER_POOL
+
+
+def close_r_worker_pool():
+    """
+    Close the shared R worker pool, if it exists.
+    """
+    global _R_WORKER_POOL
+    if _R_WORKER_POOL is not None:
+        _R_WORKER_POOL.close()
+        _R_WORKER_POOL = None
+
+
+atexit.register(close_r_worker_pool)
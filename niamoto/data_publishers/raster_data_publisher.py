@@ -141,4 +141,4 @@ class RasterValueCountPublisher(BaseDataPublisher):
 
     @classmethod
     def get_publish_formats(cls):
-        return [cls.CSV, cls.SQL]
+        return [cls.CSV, cls.SQL, cls.PARQUET, cls.ARROW]
@@ -0,0 +1,127 @@
+# coding: utf-8
+
+"""
+Bulk publishing of DataFrames and GeoDataFrames to PostgreSQL using COPY.
+The destination table is created from the schema inferred by pandas (or by
+GeoSQLTable for geometry columns), then the rows are streamed with
+'COPY ... FROM STDIN' in csv format. Geometries are encoded as hex EWKB in
+a vectorized way.
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+import shapely
+from pandas.io.sql import SQLDatabase, SQLTable
+from geopandas import GeoSeries, GeoDataFrame
+
+from niamoto.data_publishers.utils.geo_pandas_sql import GeoSQLTable, \
+    get_srid
+
+
+NULL = '\\N'
+
+
+def to_hex_ewkb(geometries, srid=None):
+    """
+    Encode geometries as hex EWKB.
+    :param geometries: An array-like of shapely geometries (or None).
+    :param srid: The srid to include in the EWKB, if None or not positive,
+        no srid is included.
+    :return: A numpy object array of hex strings (None for missing
+        geometries).
+    """
+    values = np.asarray(geometries, dtype=object)
+    if srid is not None and int(srid) <= 0:
+        srid = None
+    if hasattr(shapely, 'to_wkb'):
+        # Shapely >= 2.0, vectorized
+        if srid is not None:
+            values = shapely.set_srid(values, int(srid))
+        return shapely.to_wkb(
+            values,
+            hex=True,
+            include_srid=srid is not None
+        )
+    from shapely import wkb
+    if srid is None:
+        return np.array(
+            [None if g is None else wkb.dumps(g, hex=True) for g in values],
+            dtype=object
+        )
+    return np.array(
+        [None if g is None else wkb.dumps(g, hex=True, srid=int(srid))
+         for g in values],
+        dtype=object
+    )
+
+
+def copy_to_postgres(frame, name, con, schema=None, if_exists='fail',
+                     index=True, index_label=None, chunksize=100000):
+    """
+    Publish a DataFrame, a GeoDataFrame or a GeoSeries to a PostgreSQL
+    table using COPY.
+    :param frame: The data to publish.
+    :param name: The name of the destination table.
+    :param con: A sqlalchemy connection to a PostgreSQL database. The rows
+        are copied within its current transaction.
+    :param schema: The schema of the destination table.
+    :param if_exists: {'fail', 'replace', 'append'}, default 'fail'.
+    :param index: If True, write the index as a column.
+    :param index_label: The name of the index column.
+    :param chunksize: The number of rows serialized and copied at once.
+    :return: The number of copied rows.
+    """
+    if if_exists not in ('fail', 'replace', 'append'):
+        raise ValueError("'{0}' is not valid for if_exists".format(if_exists))
+    if isinstance(frame, GeoSeries):
+        frame = GeoDataFrame({'geometry': frame}, geometry='geometry')
+    pandas_sql = SQLDatabase(con, schema=schema)
+    table_class = SQLTable
+    if isinstance(frame, GeoDataFrame):
+        table_class = GeoSQLTable
+    table = table_class(
+        name,
+        pandas_sql,
+        frame=frame,
+        index=index,
+        if_exists=if_exists,
+        index_label=index_label,
+        schema=schema,
+    )
+    table.create()
+    df = pd.DataFrame(frame, copy=False)
+    if table.index is not None:
+        df = df.rename_axis(table.index).reset_index()
+    else:
+        df = df.copy(deep=False)
+    if isinstance(frame, GeoDataFrame):
+        geom_col = frame.geometry.name
+        df[geom_col] = to_hex_ewkb(
+            frame.geometry.values,
+            srid=get_srid(frame.geometry.crs)
+        )
+    columns = [str(c) for c in df.columns]
+    sql = "COPY {table} ({columns}) FROM STDIN " \
+          "WITH (FORMAT csv, NULL '{null}');".format(**{
+              'table': '"{}"."{}"'.format(schema, name) if schema
+              else '"{}"'.format(name),
+              'columns': ', '.join(['"{}"'.format(c) for c in columns]),
+              'null': NULL,
+          })
+    cursor = con.connection.cursor()
+    try:
+        for start in range(0, len(df), chunksize):
+            buffer = io.StringIO()
+            df.iloc[start:start + chunksize].to_csv(
+                buffer,
+                header=False,
+                index=False,
+                na_rep=NULL,
+            )
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+    finally:
+        cursor.close()
+    return len(df)
@@ -10,7 +10,6 @@ from pandas.compat import text_type
 from geopandas import GeoSeries, GeoDataFrame
 from geoalchemy2 import Geometry
 from geoalchemy2.shape import from_shape
-from shapely.geometry import *
 
 
 class GeoSQLDatabase(SQLDatabase):
@@ -72,23 +71,8 @@ class GeoSQLTable(SQLTable):
 
     def _sqlalchemy_type(self, col):
         if isinstance(col, GeoSeries):
-            srid = get_srid(col.crs)
-            if all(isinstance(item, Point) or not item for item in col):
-                return Geometry('POINT', srid)
-            elif all(isinstance(item, LineString) or not item for item in col):
-                return Geometry('LINESTRING', srid)
-            elif all(isinstance(item, Polygon) or not item for item in col):
-                return Geometry('POLYGON', srid)
-            elif all(isinstance(item, MultiPoint) or not item for item in col):
-                return Geometry('MULTIPOINT', srid)
-            elif all(isinstance(item, MultiLineString) or not item for item in col):
-                return Geometry('MULTILINESTRING', srid)
-            elif all(isinstance(item, MultiPolygon) or not item for item in col):
-                return Geometry('MULTIPOLYGON', srid)
-            elif all(isinstance(item, GeometryCollection) or not item for item in col):
-                return Geometry('GEOMETRYCOLLECTION', srid)
-            else:
-                return Geometry('GEOMETRY', srid)
+            geometry_type, srid = get_geometry_type_and_srid(col)
+            return Geometry(geometry_type, srid)
         else:
             return super(GeoSQLTable, self)._sqlalchemy_type(col)
 
@@ -118,9 +102,49 @@ def to_postgis(frame, name, con, schema=None, if_exists='fail',
                       chunksize=chunksize, dtype=dtype)
 
 
+#  PostGIS geometry types, by shapely geometry type
+GEOMETRY_TYPES = {
+    'Point': 'POINT',
+    'LineString': 'LINESTRING',
+    'LinearRing': 'LINESTRING',
+    'Polygon': 'POLYGON',
+    'MultiPoint': 'MULTIPOINT',
+    'MultiLineString': 'MULTILINESTRING',
+    'MultiPolygon': 'MULTIPOLYGON',
+    'GeometryCollection': 'GEOMETRYCOLLECTION',
+}
+
+
+def get_geometry_type_and_srid(geoseries):
+    """
+    Infer the PostGIS geometry type and the srid of a GeoSeries, in one
+    vectorized pass over the geometry types. Missing and empty geometries
+    are ignored.
+    :param geoseries: The GeoSeries.
+    :return: A tuple (geometry_type, srid). The geometry type is 'GEOMETRY'
+        if the GeoSeries contains several geometry types, and 'POINT' if it
+        does not contain any geometry.
+    """
+    present = geoseries.notnull() & ~geoseries.is_empty
+    geom_types = geoseries.geom_type[present].unique()
+    pg_types = set([GEOMETRY_TYPES.get(t, 'GEOMETRY') for t in geom_types])
+    if len(pg_types) == 0:
+        geometry_type = 'POINT'
+    elif len(pg_types) == 1:
+        geometry_type = pg_types.pop()
+    else:
+        geometry_type = 'GEOMETRY'
+    return geometry_type, get_srid(geoseries.crs)
+
+
 def get_srid(crs):
     srid = -1
-    if isinstance(crs, dict):
+    if hasattr(crs, 'to_epsg'):
+        # pyproj CRS
+        epsg = crs.to_epsg()
+        if epsg is not None:
+            srid = epsg
+    elif isinstance(crs, dict):
         if 'init' in crs:
             s = crs['init'].split('epsg:')
             if len(s) > 0:
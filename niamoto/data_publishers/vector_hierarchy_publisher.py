@@ -1,10 +1,12 @@
 # coding: utf-8
 
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 
 from niamoto.conf import settings
 from niamoto.data_publishers.base_data_publisher import BaseDataPublisher
-from niamoto.data_marts.dimensions.vector_dimension import VectorDimension
+from niamoto.vector.vector_manager import VectorManager
 from niamoto.db.connector import Connector
 from niamoto.log import get_logger
 
@@ -19,6 +21,9 @@ class VectorHierarchyPublisher(BaseDataPublisher):
     Uses the data from published vector dimensions.
     """
 
+    POINT_ON_SURFACE = 'point_on_surface'
+    BUFFER = 'buffer'
+
     @classmethod
     def get_key(cls):
         return 'vector_hierarchy'
@@ -31,58 +36,101 @@ class VectorHierarchyPublisher(BaseDataPublisher):
     def get_publish_formats(cls):
         return []
 
-    def _process(self, vector_names, *args, buffer_size=0.001, **kwargs):
+    def _process(self, vector_names, *args, buffer_size=0.001,
+                 representative=BUFFER, max_workers=1, **kwargs):
         """
         :param vector_names: List of the vector names for the hierarchy.
             Ordering is important, the first element corresponds to the
             highest level of the hierarchy while the last element corresponds
             to the smallest level of the hierarchy.
-        :return: A GeoDataFrame corresponding to the vector to publish.
+        :param buffer_size: The negative buffer size applied to the child
+            features when representative is 'buffer'.
+        :param representative: How a child feature is represented when
+            testing its containment in a parent feature. 'buffer' (default)
+            uses a negatively buffered geometry, 'point_on_surface' uses
+            ST_PointOnSurface, which is cheaper but may produce different
+            results (e.g. a child feature spanning several parents is
+            associated with the parent containing its point).
+        :param max_workers: The number of level pairs processed
+            concurrently, each one with its own database connection.
+        :return: A DataFrame containing the identifiers of the nested
+            features, one column per level ('<level>_id').
         """
-        level_ids = ','.join(
-            ["{}.id AS {}_id".format(v, v) for v in vector_names]
-        )
-        where_clause = "WHERE " + " AND ".join(
-            ["{}.id IS NOT NULL".format(v) for v in vector_names]
-        )
-        highest_level = vector_names.pop(0)
-        dim_tables = "{schema}.{tb} AS {tb}".format(**{
-            'schema': settings.NIAMOTO_DIMENSIONS_SCHEMA,
-            'tb': highest_level,
-        })
-        previous_level = highest_level
-        previous_geom = VectorDimension(highest_level).geom_col[0]
-        for level in vector_names:
-            geom = VectorDimension(level).geom_col[0]
-            dim_tables += \
-                """
-                LEFT JOIN {schema}.{tb} AS {tb}
-                    ON ST_Within(
-                        ST_Buffer({tb}.{geom}, -{buffer}),
-                        {prev_tb}.{prev_geom}
-                    )
-                """.format(**{
-                    'schema': settings.NIAMOTO_DIMENSIONS_SCHEMA,
-                    'tb': level,
-                    'prev_tb': previous_level,
-                    'geom': geom,
-                    'prev_geom': previous_geom,
-                    'buffer': buffer_size,
-                })
-            previous_level = level
-            previous_geom = geom
+        vector_names = list(vector_names)
+        geom_cols = {
+            v: VectorManager.get_geometry_column(v)[0] for v in vector_names
+        }
+        if len(vector_names) == 1:
+            level = vector_names[0]
+            sql = "SELECT id AS {tb}_id FROM {schema}.{tb};".format(**{
+                'schema': settings.NIAMOTO_DIMENSIONS_SCHEMA,
+                'tb': level,
+            })
+            with Connector.get_connection() as connection:
+                return pd.read_sql(sql, connection)
+        pairs = [
+            (
+                parent, geom_cols[parent],
+                child, geom_cols[child],
+                representative, buffer_size,
+            ) for parent, child in zip(vector_names[:-1], vector_names[1:])
+        ]
+        if max_workers > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                mappings = list(executor.map(
+                    lambda p: self._get_level_pair_mapping(*p),
+                    pairs
+                ))
+        else:
+            mappings = [self._get_level_pair_mapping(*p) for p in pairs]
+        df = mappings[0]
+        for mapping in mappings[1:]:
+            df = df.merge(mapping, on=mapping.columns[0], how='inner')
+        return df[["{}_id".format(v) for v in vector_names]]
+
+    @classmethod
+    def _get_level_pair_mapping(cls, parent, parent_geom, child, child_geom,
+                                representative=BUFFER,
+                                buffer_size=0.001):
+        """
+        Compute the containment relation between two consecutive levels of
+        the hierarchy. The representative geometry of each child feature is
+        computed once and joined against the parent features using the
+        bounding box operator, which is served by the GiST index on the
+        parent geometry column.
+        :return: A DataFrame with the '<parent>_id' and '<child>_id' columns.
+        """
+        if representative == cls.BUFFER:
+            rep = "ST_Buffer({}, -{})".format(child_geom, buffer_size)
+        elif representative == cls.POINT_ON_SURFACE:
+            rep = "ST_PointOnSurface({})".format(child_geom)
+        else:
+            raise ValueError(
+                "Unknown representative geometry '{}'.".format(representative)
+            )
         sql = \
             """
-            SELECT {level_ids}
-            FROM {dim_tables}
-            {where_clause};
-            """.format(
-                **{
-                    'level_ids': level_ids,
-                    'dim_tables': dim_tables,
-                    'where_clause': where_clause,
-                }
+            WITH child_rep AS (
+                SELECT id, {rep} AS rep
+                FROM {schema}.{child}
+                WHERE {child_geom} IS NOT NULL
             )
+            SELECT parent.id AS {parent}_id, child_rep.id AS {child}_id
+            FROM child_rep
+            JOIN {schema}.{parent} AS parent
+                ON parent.{parent_geom} && child_rep.rep
+                AND ST_Within(child_rep.rep, parent.{parent_geom});
+            """.format(**{
+                'schema': settings.NIAMOTO_DIMENSIONS_SCHEMA,
+                'rep': rep,
+                'parent': parent,
+                'parent_geom': parent_geom,
+                'child': child,
+                'child_geom': child_geom,
+            })
         with Connector.get_connection() as connection:
             df = pd.read_sql(sql, connection)
-            return df
+        LOGGER.debug("{} '{}' features nested in '{}'.".format(
+            len(df), child, parent
+        ))
+        return df
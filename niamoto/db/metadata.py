@@ -111,6 +111,8 @@ taxon = Table(
     CheckConstraint('mptt_left >= 0', name='mptt_left_gt_0'),
     CheckConstraint('mptt_right >= 0', name='mptt_right_gt_0'),
     CheckConstraint('mptt_tree_id >= 0', name='mptt_tree_id_gt_0'),
+    #  Index for the MPTT interval queries (subtrees and ancestors)
+    Index('ix_taxon_mptt', 'mptt_tree_id', 'mptt_left', 'mptt_right'),
     schema=settings.NIAMOTO_SCHEMA,
 )
 
@@ -241,6 +243,73 @@ data_provider = Table(
 )
 
 
+# --------------------------- #
+#  Property key catalog table #
+# --------------------------- #
+
+property_key_catalog = Table(
+    'property_key_catalog',
+    metadata,
+    Column('id', Integer, primary_key=True),
+    Column('entity', String(50), nullable=False),
+    Column(
+        'provider_id',
+        ForeignKey(
+            '{}.data_provider.id'.format(settings.NIAMOTO_SCHEMA),
+            onupdate="CASCADE",
+            ondelete="CASCADE",
+        ),
+        nullable=False,
+        index=True,
+    ),
+    Column('key', Text, nullable=False),
+    Column('value_count', Integer, nullable=False),
+    Column('value_type', String(20), nullable=False),
+    Column('date_update', DateTime, nullable=False),
+    UniqueConstraint(
+        'entity',
+        'provider_id',
+        'key',
+        name='entity__provider_id__key'
+    ),
+    schema=settings.NIAMOTO_SCHEMA,
+)
+
+
+# ------------------------- #
+#  Promoted property table  #
+# ------------------------- #
+
+promoted_property = Table(
+    'promoted_property',
+    metadata,
+    Column('id', Integer, primary_key=True),
+    Column('entity', String(50), nullable=False),
+    Column('key', Text, nullable=False),
+    Column('value_type', String(20), nullable=False),
+    Column('index_name', String(63), nullable=False),
+    Column('date_create', DateTime, nullable=False),
+    UniqueConstraint('entity', 'key', name='entity__key'),
+    schema=settings.NIAMOTO_SCHEMA,
+)
+
+
+# ------------------------- #
+#  Database revision table  #
+# ------------------------- #
+
+database_revision = Table(
+    'database_revision',
+    metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String(50), nullable=False),
+    Column('revision', BigInteger, nullable=False),
+    Column('date_update', DateTime, nullable=False),
+    UniqueConstraint('name', name='name'),
+    schema=settings.NIAMOTO_SCHEMA,
+)
+
+
 # ---------------------- #
 #  Raster registry table #
 # ---------------------- #
@@ -0,0 +1,442 @@
+# coding: utf-8
+
+import re
+import hashlib
+from datetime import datetime
+
+from sqlalchemy import select, func, cast, case, and_, Float, Boolean
+import pandas as pd
+
+from niamoto.conf import settings
+from niamoto.db import metadata as meta
+from niamoto.db.connector import Connector
+from niamoto.db.revision import DatabaseRevision
+from niamoto.exceptions import NoRecordFoundError, RecordAlreadyExistsError
+from niamoto.log import get_logger
+
+
+LOGGER = get_logger(__name__)
+
+
+class PropertyCatalog:
+    """
+    Class managing the catalog of the JSONB property keys of occurrences and
+    plots. For each provider, the catalog stores the known keys, the number
+    of non null values and the JSON type of the values ('number', 'string',
+    'boolean', 'object', 'array', 'mixed' if the values are of several
+    types, 'null' if every value is null). The catalog is updated during
+    the provider sync and the raster values extraction, allowing publishers
+    to resolve the property keys without scanning the whole table.
+    """
+
+    OCCURRENCE = 'occurrence'
+    PLOT = 'plot'
+    ENTITY_TABLES = {
+        OCCURRENCE: meta.occurrence,
+        PLOT: meta.plot,
+    }
+    MIXED_TYPE = 'mixed'
+    NULL_TYPE = 'null'
+    NUMBER_TYPE = 'number'
+    STRING_TYPE = 'string'
+    BOOLEAN_TYPE = 'boolean'
+    TYPE_CASTS = {
+        NUMBER_TYPE: Float,
+        BOOLEAN_TYPE: Boolean,
+    }
+    SQL_TYPES = {
+        NUMBER_TYPE: 'FLOAT',
+        BOOLEAN_TYPE: 'BOOLEAN',
+    }
+    PROMOTABLE_TYPES = [NUMBER_TYPE, BOOLEAN_TYPE, STRING_TYPE]
+
+    @classmethod
+    def refresh(cls, entity, provider_id=None, keys=None, connection=None):
+        """
+        Refresh the catalog entries of an entity from its properties.
+        :param entity: 'occurrence' or 'plot'.
+        :param provider_id: If not None, only refresh the entries of this
+            provider.
+        :param keys: If not None, only refresh the entries of these keys.
+        :param connection: If not None, use an existing connection.
+        """
+        table = cls.ENTITY_TABLES[entity]
+        catalog = meta.property_key_catalog
+        conditions = ["TRUE"]
+        if provider_id is not None:
+            conditions.append("provider_id = {}".format(int(provider_id)))
+        if keys is not None:
+            conditions.append("key = ANY(%(keys)s)")
+        sql_delete = \
+            """
+            DELETE FROM {catalog}
+            WHERE entity = '{entity}' AND {conditions};
+            """.format(**{
+                'catalog': '{}.{}'.format(
+                    settings.NIAMOTO_SCHEMA,
+                    catalog.name
+                ),
+                'entity': entity,
+                'conditions': ' AND '.join(conditions),
+            })
+        sql_insert = \
+            """
+            INSERT INTO {catalog} (
+                entity, provider_id, key, value_count, value_type, date_update
+            )
+            SELECT '{entity}', provider_id, key,
+                COUNT(*) FILTER (WHERE value_type <> 'null'),
+                CASE COUNT(DISTINCT value_type) FILTER (
+                    WHERE value_type <> 'null'
+                )
+                    WHEN 0 THEN '{null_type}'
+                    WHEN 1 THEN MAX(value_type) FILTER (
+                        WHERE value_type <> 'null'
+                    )
+                    ELSE '{mixed_type}'
+                END,
+                %(date_update)s
+            FROM (
+                SELECT entity_table.provider_id AS provider_id,
+                    props.key AS key,
+                    jsonb_typeof(props.value) AS value_type
+                FROM {entity_table} AS entity_table,
+                    jsonb_each(entity_table.properties) AS props
+            ) AS entity_props
+            WHERE {conditions}
+            GROUP BY provider_id, key;
+            """.format(**{
+                'catalog': '{}.{}'.format(
+                    settings.NIAMOTO_SCHEMA,
+                    catalog.name
+                ),
+                'entity': entity,
+                'entity_table': '{}.{}'.format(
+                    settings.NIAMOTO_SCHEMA,
+                    table.name
+                ),
+                'conditions': ' AND '.join(conditions),
+                'null_type': cls.NULL_TYPE,
+                'mixed_type': cls.MIXED_TYPE,
+            })
+        params = {
+            'keys': list(keys) if keys is not None else None,
+            'date_update': datetime.now(),
+        }
+        close_after = False
+        if connection is None:
+            connection = Connector.get_engine().connect()
+            close_after = True
+        with connection.begin():
+            connection.execute(sql_delete, params)
+            connection.execute(sql_insert, params)
+        if close_after:
+            connection.close()
+        LOGGER.debug("Property catalog refreshed ({}, provider: {})".format(
+            entity,
+            provider_id
+        ))
+
+    @classmethod
+    def is_populated(cls, entity, connection=None):
+        """
+        :param entity: 'occurrence' or 'plot'.
+        :param connection: If not None, use an existing connection.
+        :return: True if the catalog contains entries for the entity, or if
+            the entity table has no row.
+        """
+        table = cls.ENTITY_TABLES[entity]
+        catalog = meta.property_key_catalog
+        sel = select([
+            select([func.count()]).where(
+                catalog.c.entity == entity
+            ).as_scalar(),
+            select([table.c.id]).limit(1).as_scalar(),
+        ])
+        if connection is not None:
+            count, row_id = connection.execute(sel).fetchone()
+        else:
+            with Connector.get_connection() as connection:
+                count, row_id = connection.execute(sel).fetchone()
+        return count > 0 or row_id is None
+
+    @classmethod
+    def get_key_types(cls, entity, provider_id=None, connection=None):
+        """
+        Return the catalogued property keys of an entity, with their type.
+        If the catalog has not been populated yet (the migration creating
+        the catalog table fills it, but the table may have been created
+        otherwise), the catalog is built from the properties first.
+        :param entity: 'occurrence' or 'plot'.
+        :param provider_id: If not None, only return the keys of this
+            provider.
+        :param connection: If not None, use an existing connection.
+        :return: A dict {key: value_type}, sorted by key. If the values of
+            a key have different types across providers, its type is
+            'mixed'.
+        """
+        if not cls.is_populated(entity, connection=connection):
+            LOGGER.debug("Building the property catalog for '{}'".format(
+                entity
+            ))
+            cls.refresh(entity, connection=connection)
+        catalog = meta.property_key_catalog
+        types = func.array_agg(catalog.c.value_type.distinct())
+        sel = select([catalog.c.key, types]).where(
+            catalog.c.entity == entity
+        ).group_by(catalog.c.key).order_by(catalog.c.key)
+        if provider_id is not None:
+            sel = sel.where(catalog.c.provider_id == provider_id)
+        if connection is not None:
+            rows = connection.execute(sel).fetchall()
+        else:
+            with Connector.get_connection() as connection:
+                rows = connection.execute(sel).fetchall()
+        key_types = {}
+        for key, value_types in rows:
+            value_types = [t for t in value_types if t != cls.NULL_TYPE]
+            if len(value_types) == 0:
+                key_types[key] = cls.NULL_TYPE
+            elif len(value_types) == 1:
+                key_types[key] = value_types[0]
+            else:
+                key_types[key] = cls.MIXED_TYPE
+        return key_types
+
+    @classmethod
+    def get_keys(cls, entity, provider_id=None, connection=None):
+        """
+        :param entity: 'occurrence' or 'plot'.
+        :param provider_id: If not None, only return the keys of this
+            provider.
+        :param connection: If not None, use an existing connection.
+        :return: The sorted list of the catalogued property keys.
+        """
+        return list(cls.get_key_types(
+            entity,
+            provider_id=provider_id,
+            connection=connection
+        ).keys())
+
+    @classmethod
+    def get_catalog(cls, entity=None):
+        """
+        :param entity: If not None, only return the entries of this entity.
+        :return: A DataFrame containing the catalog entries.
+        """
+        catalog = meta.property_key_catalog
+        sel = select([catalog])
+        if entity is not None:
+            sel = sel.where(catalog.c.entity == entity)
+        with Connector.get_connection() as connection:
+            return pd.read_sql(sel, connection, index_col='id')
+
+    @classmethod
+    def get_typed_property(cls, properties_column, key, value_type=None):
+        """
+        Build the typed extraction expression of a property: numbers and
+        booleans are extracted as text ('->>') and cast to the
+        corresponding SQL type (values of another JSON type are extracted
+        as NULL), strings are extracted as text, the other values (objects,
+        arrays, mixed types) are extracted as JSONB. The expression is the
+        same as the one indexed when a property is promoted, so that the
+        promoted property indexes are used by the queries.
+        :param properties_column: The JSONB properties column.
+        :param key: The property key.
+        :param value_type: The catalogued type of the property.
+        :return: A sqlalchemy column expression, labeled with the key.
+        """
+        if value_type in cls.TYPE_CASTS:
+            expression = case([(
+                func.jsonb_typeof(properties_column[key]) == value_type,
+                cast(
+                    properties_column[key].astext,
+                    cls.TYPE_CASTS[value_type]
+                )
+            )])
+        elif value_type == cls.STRING_TYPE:
+            expression = properties_column[key].astext
+        else:
+            expression = properties_column[key]
+        return expression.label(key)
+
+    @classmethod
+    def get_typed_property_sql(cls, key, value_type):
+        """
+        :param key: The property key.
+        :param value_type: The type of the property.
+        :return: The SQL text of the typed extraction expression of a
+            property, see get_typed_property.
+        """
+        literal_key = "'{}'".format(key.replace("'", "''"))
+        if value_type in cls.TYPE_CASTS:
+            return \
+                "CASE WHEN jsonb_typeof(properties -> {key}) = '{type}' " \
+                "THEN CAST(properties ->> {key} AS {sql_type}) END".format(**{
+                    'key': literal_key,
+                    'type': value_type,
+                    'sql_type': cls.SQL_TYPES[value_type],
+                })
+        if value_type == cls.STRING_TYPE:
+            return "properties ->> {}".format(literal_key)
+        return "properties -> {}".format(literal_key)
+
+    @classmethod
+    def get_typed_properties(cls, entity, keys, connection=None):
+        """
+        :param entity: 'occurrence' or 'plot'.
+        :param keys: The property keys to extract.
+        :param connection: If not None, use an existing connection.
+        :return: The list of the typed extraction expressions of the keys,
+            see get_typed_property. Promoted properties are extracted with
+            their promoted type.
+        """
+        table = cls.ENTITY_TABLES[entity]
+        key_types = cls.get_key_types(entity, connection=connection)
+        key_types.update(cls.get_promoted_types(entity, connection=connection))
+        return [
+            cls.get_typed_property(table.c.properties, k, key_types.get(k))
+            for k in keys
+        ]
+
+    @classmethod
+    def get_promoted_types(cls, entity, connection=None):
+        """
+        :param entity: 'occurrence' or 'plot'.
+        :param connection: If not None, use an existing connection.
+        :return: A dict {key: value_type} of the promoted properties.
+        """
+        promoted = meta.promoted_property
+        sel = select([promoted.c.key, promoted.c.value_type]).where(
+            promoted.c.entity == entity
+        )
+        if connection is not None:
+            return dict(connection.execute(sel).fetchall())
+        with Connector.get_connection() as connection:
+            return dict(connection.execute(sel).fetchall())
+
+    @classmethod
+    def get_promoted_properties(cls, entity=None):
+        """
+        :param entity: If not None, only return the promoted properties of
+            this entity.
+        :return: A DataFrame containing the promoted properties.
+        """
+        promoted = meta.promoted_property
+        sel = select([promoted])
+        if entity is not None:
+            sel = sel.where(promoted.c.entity == entity)
+        with Connector.get_connection() as connection:
+            return pd.read_sql(sel, connection, index_col='id')
+
+    @classmethod
+    def promote(cls, entity, key, value_type=None, connection=None):
+        """
+        Promote a property to an indexed typed column: an expression index
+        is created on the typed extraction expression of the property. The
+        index is maintained by PostgreSQL whenever the properties are
+        written (sync, raster extraction), and is used by any query using
+        the typed extraction expression (e.g. publishers).
+        :param entity: 'occurrence' or 'plot'.
+        :param key: The property key.
+        :param value_type: The type of the property ('number', 'boolean' or
+            'string'). If None, use the catalogued type.
+        :param connection: If not None, use an existing connection.
+        :return: The name of the created index.
+        """
+        if connection is None:
+            with Connector.get_connection() as connection:
+                return cls.promote(
+                    entity,
+                    key,
+                    value_type=value_type,
+                    connection=connection
+                )
+        table = cls.ENTITY_TABLES[entity]
+        promoted = meta.promoted_property
+        if key in cls.get_promoted_types(entity, connection=connection):
+            raise RecordAlreadyExistsError(
+                "The '{}' property of '{}' is already promoted.".format(
+                    key,
+                    entity
+                )
+            )
+        if value_type is None:
+            key_types = cls.get_key_types(entity, connection=connection)
+            if key not in key_types:
+                raise NoRecordFoundError(
+                    "The '{}' property of '{}' does not exist.".format(
+                        key,
+                        entity
+                    )
+                )
+            value_type = key_types[key]
+        if value_type not in cls.PROMOTABLE_TYPES:
+            raise ValueError(
+                "The type of a promoted property must be one of {}, "
+                "got '{}'.".format(cls.PROMOTABLE_TYPES, value_type)
+            )
+        index_name = "ix_{}_property_{}".format(
+            table.name,
+            re.sub(r'[^a-z0-9_]', '_', key.lower())
+        )[:50]
+        index_name = "{}_{}".format(
+            index_name,
+            hashlib.md5(key.encode('utf-8')).hexdigest()[:8]
+        )
+        sql = "CREATE INDEX {index} ON {schema}.{tb} (({expression}));"
+        with connection.begin():
+            connection.execute(sql.format(**{
+                'index': index_name,
+                'schema': settings.NIAMOTO_SCHEMA,
+                'tb': table.name,
+                'expression': cls.get_typed_property_sql(key, value_type),
+            }))
+            connection.execute(promoted.insert().values({
+                'entity': entity,
+                'key': key,
+                'value_type': value_type,
+                'index_name': index_name,
+                'date_create': datetime.now(),
+            }))
+            DatabaseRevision.bump(connection=connection)
+        LOGGER.debug("'{}' property of '{}' promoted ({})".format(
+            key,
+            entity,
+            index_name
+        ))
+        return index_name
+
+    @classmethod
+    def demote(cls, entity, key, connection=None):
+        """
+        Demote a promoted property, i.e. drop its expression index.
+        :param entity: 'occurrence' or 'plot'.
+        :param key: The property key.
+        :param connection: If not None, use an existing connection.
+        """
+        if connection is None:
+            with Connector.get_connection() as connection:
+                return cls.demote(entity, key, connection=connection)
+        promoted = meta.promoted_property
+        condition = and_(
+            promoted.c.entity == entity,
+            promoted.c.key == key
+        )
+        row = connection.execute(
+            select([promoted.c.index_name]).where(condition)
+        ).fetchone()
+        if row is None:
+            raise NoRecordFoundError(
+                "The '{}' property of '{}' is not promoted.".format(
+                    key,
+                    entity
+                )
+            )
+        with connection.begin():
+            connection.execute("DROP INDEX IF EXISTS {}.{};".format(
+                settings.NIAMOTO_SCHEMA,
+                row['index_name']
+            ))
+            connection.execute(promoted.delete().where(condition))
+            DatabaseRevision.bump(connection=connection)
@@ -0,0 +1,106 @@
+# coding: utf-8
+
+from datetime import datetime
+
+from sqlalchemy import select
+
+from niamoto.conf import settings
+from niamoto.db import metadata as meta
+from niamoto.db.connector import Connector
+from niamoto.log import get_logger
+
+
+LOGGER = get_logger(__name__)
+
+
+class DatabaseRevision:
+    """
+    Class managing the database revision counters. A revision counter is
+    bumped whenever the data it covers is modified (e.g. provider sync,
+    taxonomy set, raster values extraction), allowing caches built from the
+    database to be invalidated by comparing revisions.
+    """
+
+    DATA = 'data'
+    TAXONOMY = 'taxonomy'
+    DATA_MART = 'data_mart'
+
+    @classmethod
+    def get(cls, name=DATA, connection=None):
+        """
+        :param name: The name of the revision counter.
+        :param connection: If not None, use an existing connection.
+        :return: The current value of the revision counter, 0 if it has
+            never been bumped.
+        """
+        sel = select([meta.database_revision.c.revision]).where(
+            meta.database_revision.c.name == name
+        )
+        if connection is not None:
+            revision = connection.execute(sel).scalar()
+        else:
+            with Connector.get_connection() as connection:
+                revision = connection.execute(sel).scalar()
+        return 0 if revision is None else revision
+
+    @classmethod
+    def get_tag(cls, name=DATA, connection=None):
+        """
+        :param name: The name of the revision counter.
+        :param connection: If not None, use an existing connection.
+        :return: A string identifying the current revision, made of the
+            counter value and of its last update timestamp, so that a
+            recreated database does not reuse the tags of a previous one.
+        """
+        sel = select([
+            meta.database_revision.c.revision,
+            meta.database_revision.c.date_update,
+        ]).where(meta.database_revision.c.name == name)
+        if connection is not None:
+            row = connection.execute(sel).fetchone()
+        else:
+            with Connector.get_connection() as connection:
+                row = connection.execute(sel).fetchone()
+        if row is None:
+            return '0'
+        return '{}_{}'.format(
+            row['revision'],
+            row['date_update'].strftime('%Y%m%d%H%M%S%f')
+        )
+
+    @classmethod
+    def bump(cls, *names, connection=None):
+        """
+        Increment revision counters.
+        :param names: The names of the revision counters to bump, if empty
+            bump the 'data' counter.
+        :param connection: If not None, use an existing connection, the
+            counters are then bumped within the current transaction.
+        """
+        if len(names) == 0:
+            names = (cls.DATA, )
+        sql = \
+            """
+            INSERT INTO {revision_table} (name, revision, date_update)
+            VALUES (%(name)s, 1, %(date_update)s)
+            ON CONFLICT (name) DO UPDATE
+            SET revision = {revision_table}.revision + 1,
+                date_update = EXCLUDED.date_update;
+            """.format(**{
+                'revision_table': '{}.{}'.format(
+                    settings.NIAMOTO_SCHEMA,
+                    meta.database_revision.name
+                ),
+            })
+        params = [
+            {'name': name, 'date_update': datetime.now()} for name in names
+        ]
+        if connection is not None:
+            connection.execute(sql, params)
+        else:
+            with Connector.get_connection() as connection:
+                with connection.begin():
+                    connection.execute(sql, params)
+        LOGGER.debug("Database revision bumped ({}).".format(
+            ', '.join(names)
+        ))
@@ -0,0 +1,138 @@
+# coding: utf-8
+
+import io
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from niamoto.log import get_logger
+
+
+LOGGER = get_logger(__name__)
+
+NULL = '\\N'
+
+INTEGER_TYPES = {'smallint', 'integer', 'bigint'}
+
+_COUNTER = itertools.count()
+
+
+class StagingTable:
+    """
+    Temporary table used to stage rows loaded with COPY before applying them
+    to a Niamoto table with a single set-based statement. The table is
+    created with 'CREATE TEMP TABLE ... ON COMMIT DROP' on the caller's
+    connection: it is only visible to its session and dropped at the end of
+    the transaction, concurrent syncs and remappings can therefore stage
+    their data at the same time. The columns are typed (e.g. integer), no
+    cast is needed when applying the staged rows.
+    Usage:
+        with StagingTable(connection, [('id', 'integer'), ...]) as staging:
+            staging.copy_from(dataframe)
+            connection.execute("UPDATE ... FROM {} ...".format(staging.name))
+    If the connection is not in a transaction when entering the context, a
+    transaction is begun and committed (or rolled back) when exiting it.
+    """
+
+    def __init__(self, connection, columns, prefix='niamoto_staging'):
+        """
+        :param connection: A sqlalchemy connection to a PostgreSQL database.
+        :param columns: A list of (column name, sql type) tuples.
+        :param prefix: The prefix of the table name, a counter is appended
+            to make it unique within the session.
+        """
+        self.connection = connection
+        self.columns = list(columns)
+        self.name = "{}_{}".format(prefix, next(_COUNTER))
+        self._transaction = None
+
+    def create(self):
+        """
+        Create the temporary table. The connection must be in a
+        transaction, otherwise the table would be dropped right away.
+        """
+        if not self.connection.in_transaction():
+            raise ValueError(
+                "A staging table must be created within a transaction."
+            )
+        sql = "CREATE TEMP TABLE {} ({}) ON COMMIT DROP;".format(
+            self.name,
+            ', '.join(['{} {}'.format(c, t) for c, t in self.columns])
+        )
+        self.connection.execute(sql)
+        LOGGER.debug("Staging table '{}' created.".format(self.name))
+
+    def copy_from(self, dataframe, chunksize=100000):
+        """
+        Load the rows of a DataFrame into the staging table using COPY. The
+        DataFrame must contain a column for each column of the staging table
+        (its index is ignored). Missing values are loaded as null, and
+        integer columns holding floats or objects (because of missing
+        values) are written as integers.
+        :param dataframe: The DataFrame to load.
+        :param chunksize: The number of rows serialized and copied at once.
+        :return: The number of loaded rows.
+        """
+        names = [c for c, t in self.columns]
+        df = pd.DataFrame({
+            c: self._format_column(dataframe[c], t) for c, t in self.columns
+        }, columns=names)
+        sql = "COPY {} ({}) FROM STDIN WITH (FORMAT csv, NULL '{}');".format(
+            self.name,
+            ', '.join(names),
+            NULL,
+        )
+        cursor = self.connection.connection.cursor()
+        try:
+            for start in range(0, len(df), chunksize):
+                buffer = io.StringIO()
+                df.iloc[start:start + chunksize].to_csv(
+                    buffer,
+                    header=False,
+                    index=False,
+                    na_rep=NULL,
+                )
+                buffer.seek(0)
+                cursor.copy_expert(sql, buffer)
+        finally:
+            cursor.close()
+        return len(df)
+
+    @staticmethod
+    def _format_column(series, sql_type):
+        if sql_type.lower() not in INTEGER_TYPES \
+                or series.dtype.kind not in ('f', 'O'):
+            return series.values
+        # Object columns may hold None and floats
+        values = pd.to_numeric(series).values
+        if values.dtype.kind != 'f':
+            return values
+        null = np.isnan(values)
+        formatted = np.full(len(values), NULL, dtype=object)
+        formatted[~null] = values[~null].astype(np.int64).astype(str)
+        return formatted
+
+    def __enter__(self):
+        if not self.connection.in_transaction():
+            self._transaction = self.connection.begin()
+        try:
+            self.create()
+        except Exception:
+            self._rollback()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._transaction is None:
+            return
+        if exc_type is None:
+            self._transaction.commit()
+        else:
+            self._rollback()
+        self._transaction = None
+
+    def _rollback(self):
+        if self._transaction is not None:
+            self._transaction.rollback()
+            self._transaction = None
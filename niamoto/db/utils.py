@@ -61,3 +61,56 @@ def fix_db_sequences_ownership():
         statements = res.fetchall()
         for s in statements:
             connection.execute(s[0])
+
+
+def create_gist_index(schema, table_name, geom_col, connection=None):
+    """
+    Create a GiST index on a geometry column if it is not already indexed
+    by a GiST index (e.g. the index created by ogr2ogr). Meant to be called
+    once, when the table is written, not before reading it.
+    :param schema: The schema of the table.
+    :param table_name: The name of the table.
+    :param geom_col: The name of the geometry column to index.
+    :param connection: If passed, use an existing connection.
+    :return: True if the index was created, False if the column was
+        already indexed.
+    """
+    sql_exists = \
+        """
+        SELECT EXISTS (
+            SELECT 1
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            JOIN pg_am am ON am.oid = c.relam
+            JOIN pg_attribute a ON a.attrelid = i.indrelid
+                AND a.attnum = ANY(i.indkey)
+            WHERE i.indrelid = '{schema}.{tb}'::regclass
+                AND am.amname = 'gist'
+                AND a.attname = '{geom}'
+        );
+        """.format(**{
+            'schema': schema,
+            'tb': table_name,
+            'geom': geom_col,
+        })
+    sql = \
+        """
+        CREATE INDEX IF NOT EXISTS {tb}_{geom}_gist
+        ON {schema}.{tb} USING GIST ({geom});
+        """.format(**{
+            'schema': schema,
+            'tb': table_name,
+            'geom': geom_col,
+        })
+    if connection is None:
+        with Connector.get_connection() as connection:
+            return create_gist_index(
+                schema,
+                table_name,
+                geom_col,
+                connection=connection
+            )
+    if connection.execute(sql_exists).scalar():
+        return False
+    connection.execute(sql)
+    return True
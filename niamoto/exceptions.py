@@ -71,6 +71,12 @@ class UnavailablePublishFormat(BaseDataPublisherException):
     """
 
 
+class IncompatibleSchemaError(BaseDataPublisherException):
+    """
+    Error to raise when streamed data does not match the published schema.
+    """
+
+
 class BaseDataMartException(NiamotoException):
     """
     Base class for errors related to data marts.
@@ -0,0 +1,88 @@
+"""Add property_key_catalog table
+
+Revision ID: a3c5e1f27b94
+Revises: 5bd039f6f1b0
+Create Date: 2026-10-18 10:12:41.318530
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c5e1f27b94'
+down_revision = '5bd039f6f1b0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('property_key_catalog',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(length=50), nullable=False),
+        sa.Column('provider_id', sa.Integer(), nullable=False),
+        sa.Column('key', sa.Text(), nullable=False),
+        sa.Column('value_count', sa.Integer(), nullable=False),
+        sa.Column('value_type', sa.String(length=20), nullable=False),
+        sa.Column('date_update', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['provider_id'],
+            ['niamoto.data_provider.id'],
+            onupdate='CASCADE',
+            ondelete='CASCADE',
+        ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(
+            'entity',
+            'provider_id',
+            'key',
+            name=op.f('uq_property_key_catalog_entity__provider_id__key')
+        ),
+        schema='niamoto'
+    )
+    op.create_index(
+        op.f('ix_property_key_catalog_niamoto_property_key_catalog_provider_id'),
+        'property_key_catalog',
+        ['provider_id'],
+        unique=False,
+        schema='niamoto'
+    )
+    # Backfill the catalog from the existing occurrence and plot properties,
+    # for every provider (the catalog is otherwise only updated by syncs).
+    for entity in ('occurrence', 'plot'):
+        op.execute(
+            """
+            INSERT INTO niamoto.property_key_catalog (
+                entity, provider_id, key, value_count, value_type, date_update
+            )
+            SELECT '{entity}', provider_id, key,
+                COUNT(*) FILTER (WHERE value_type <> 'null'),
+                CASE COUNT(DISTINCT value_type) FILTER (
+                    WHERE value_type <> 'null'
+                )
+                    WHEN 0 THEN 'null'
+                    WHEN 1 THEN MAX(value_type) FILTER (
+                        WHERE value_type <> 'null'
+                    )
+                    ELSE 'mixed'
+                END,
+                NOW()
+            FROM (
+                SELECT entity_table.provider_id AS provider_id,
+                    props.key AS key,
+                    jsonb_typeof(props.value) AS value_type
+                FROM niamoto.{entity} AS entity_table,
+                    jsonb_each(entity_table.properties) AS props
+            ) AS entity_props
+            GROUP BY provider_id, key;
+            """.format(entity=entity)
+        )
+
+
+def downgrade():
+    op.drop_index(
+        op.f('ix_property_key_catalog_niamoto_property_key_catalog_provider_id'),
+        table_name='property_key_catalog',
+        schema='niamoto'
+    )
+    op.drop_table('property_key_catalog', schema='niamoto')
@@ -0,0 +1,30 @@
+"""Add taxon mptt index
+
+Revision ID: b7d3e5a92c14
+Revises: c4f2a9d81e37
+Create Date: 2026-10-18 16:02:47.531207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d3e5a92c14'
+down_revision = 'c4f2a9d81e37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'ix_taxon_mptt',
+        'taxon',
+        ['mptt_tree_id', 'mptt_left', 'mptt_right'],
+        unique=False,
+        schema='niamoto'
+    )
+
+
+def downgrade():
+    op.drop_index('ix_taxon_mptt', table_name='taxon', schema='niamoto')
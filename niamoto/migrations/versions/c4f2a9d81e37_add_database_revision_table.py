@@ -0,0 +1,35 @@
+"""Add database_revision table
+
+Revision ID: c4f2a9d81e37
+Revises: e81f0c7d4a26
+Create Date: 2026-10-18 14:21:09.318460
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4f2a9d81e37'
+down_revision = 'e81f0c7d4a26'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('database_revision',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=50), nullable=False),
+        sa.Column('revision', sa.BigInteger(), nullable=False),
+        sa.Column('date_update', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(
+            'name',
+            name=op.f('uq_database_revision_name')
+        ),
+        schema='niamoto'
+    )
+
+
+def downgrade():
+    op.drop_table('database_revision', schema='niamoto')
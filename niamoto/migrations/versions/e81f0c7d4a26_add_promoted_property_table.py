@@ -0,0 +1,45 @@
+"""Add promoted_property table
+
+Revision ID: e81f0c7d4a26
+Revises: a3c5e1f27b94
+Create Date: 2026-10-18 11:03:27.541902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e81f0c7d4a26'
+down_revision = 'a3c5e1f27b94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('promoted_property',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(length=50), nullable=False),
+        sa.Column('key', sa.Text(), nullable=False),
+        sa.Column('value_type', sa.String(length=20), nullable=False),
+        sa.Column('index_name', sa.String(length=63), nullable=False),
+        sa.Column('date_create', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(
+            'entity',
+            'key',
+            name=op.f('uq_promoted_property_entity__key')
+        ),
+        schema='niamoto'
+    )
+
+
+def downgrade():
+    # Drop the expression indexes of the promoted properties
+    connection = op.get_bind()
+    rows = connection.execute(
+        "SELECT index_name FROM niamoto.promoted_property;"
+    ).fetchall()
+    for row in rows:
+        op.execute("DROP INDEX IF EXISTS niamoto.{};".format(row[0]))
+    op.drop_table('promoted_property', schema='niamoto')
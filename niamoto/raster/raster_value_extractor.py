@@ -3,6 +3,8 @@
 from niamoto.conf import settings
 from niamoto.db import metadata as meta
 from niamoto.db.connector import Connector
+from niamoto.db.property_catalog import PropertyCatalog
+from niamoto.db.revision import DatabaseRevision
 from niamoto.raster.raster_manager import RasterManager
 from niamoto.log import get_logger
 
@@ -56,6 +58,12 @@ class RasterValueExtractor:
                         'prefix': RASTER_PROPERTY_PREFIX,
                     })
                 connection.execute(sql)
+                PropertyCatalog.refresh(
+                    PropertyCatalog.OCCURRENCE,
+                    keys=[RASTER_PROPERTY_PREFIX + raster_name],
+                    connection=connection
+                )
+                DatabaseRevision.bump(connection=connection)
 
     @classmethod
     def extract_raster_values_to_plots(cls, raster_name):
@@ -96,3 +104,9 @@ class RasterValueExtractor:
                         'prefix': RASTER_PROPERTY_PREFIX,
                     })
                 connection.execute(sql)
+                PropertyCatalog.refresh(
+                    PropertyCatalog.PLOT,
+                    keys=[RASTER_PROPERTY_PREFIX + raster_name],
+                    connection=connection
+                )
+                DatabaseRevision.bump(connection=connection)
@@ -0,0 +1,96 @@
+# coding: utf-8
+
+import numpy as np
+import pandas as pd
+
+
+class SynonymMap:
+    """
+    Compact mapping from the taxon ids of a provider's referential to
+    Niamoto's taxon ids, for a given synonym key. The provider taxon ids are
+    stored in a sorted int64 array and the Niamoto taxon ids in an aligned
+    int64 array: a lookup is a vectorized binary search (searchsorted),
+    which maps millions of ids in a few milliseconds.
+    """
+
+    def __init__(self, provider_taxon_ids, taxon_ids):
+        """
+        :param provider_taxon_ids: An array-like of the provider taxon ids.
+            The ids that are not integers (e.g. non numeric strings) can
+            not be matched and are ignored.
+        :param taxon_ids: An array-like of the corresponding Niamoto taxon
+            ids, aligned with provider_taxon_ids.
+        """
+        keys, valid = self._to_int64(provider_taxon_ids)
+        keys = keys[valid]
+        values = np.asarray(taxon_ids)[valid].astype(np.int64)
+        order = np.argsort(keys, kind='mergesort')
+        self.keys = keys[order]
+        self.values = values[order]
+
+    @staticmethod
+    def _to_int64(ids):
+        """
+        :param ids: An array-like of ids, possibly containing null, non
+            numeric or non integer values.
+        :return: An int64 array of the ids and a boolean array which is
+            False where the id is not an integer (the int64 value is then
+            meaningless).
+        """
+        ids = np.asarray(ids)
+        if ids.dtype.kind not in ('i', 'u', 'f'):
+            # Object arrays may hold None or non numeric values
+            ids = pd.to_numeric(pd.Series(ids), errors='coerce').values
+        if ids.dtype.kind == 'f':
+            valid = np.isfinite(ids)
+            valid[valid] = ids[valid] == np.floor(ids[valid])
+            ids = np.where(valid, ids, 0)
+        else:
+            valid = np.ones(len(ids), dtype=bool)
+        return ids.astype(np.int64), valid
+
+    @classmethod
+    def from_series(cls, synonyms):
+        """
+        :param synonyms: A Series indexed by provider taxon id, with the
+            Niamoto taxon ids as values (e.g. from
+            TaxonomyManager.get_synonyms_for_key). Null values are ignored.
+        :return: The corresponding SynonymMap.
+        """
+        synonyms = synonyms[synonyms.index.notnull() & synonyms.notnull()]
+        return cls(synonyms.index.values, synonyms.values)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def map(self, provider_taxon_ids):
+        """
+        Map provider taxon ids to Niamoto taxon ids.
+        :param provider_taxon_ids: An array-like (or Series) of provider
+            taxon ids, possibly containing null values.
+        :return: A float array of the corresponding Niamoto taxon ids, NaN
+            where the provider taxon id is null, is not an integer or has no
+            synonym (as Series.map would do).
+        """
+        ids, valid = self._to_int64(provider_taxon_ids)
+        result = np.full(len(ids), np.nan)
+        if len(self.keys) == 0 or len(ids) == 0:
+            return result
+        keys = ids[valid]
+        idx = np.searchsorted(self.keys, keys)
+        idx[idx == len(self.keys)] = 0
+        found = self.keys[idx] == keys
+        positions = np.flatnonzero(valid)[found]
+        result[positions] = self.values[idx[found]]
+        return result
+
+    def map_series(self, provider_taxon_ids):
+        """
+        :param provider_taxon_ids: A Series of provider taxon ids.
+        :return: A Series with the same index, containing the corresponding
+            Niamoto taxon ids.
+        """
+        return pd.Series(
+            self.map(provider_taxon_ids.values),
+            index=provider_taxon_ids.index,
+        )
@@ -3,12 +3,16 @@
 from datetime import datetime
 import time
 
-from sqlalchemy import select, func, bindparam, Index, cast
+from sqlalchemy import select, func, bindparam, Index, cast, and_
 from sqlalchemy.dialects.postgresql import JSONB
 import pandas as pd
 
+from niamoto.conf import settings
 from niamoto.db.connector import Connector
 from niamoto.db import metadata as meta
+from niamoto.db.revision import DatabaseRevision
+from niamoto.db.staging import StagingTable
+from niamoto.taxonomy.synonym_map import SynonymMap
 from niamoto.exceptions import MalformedDataSourceError, \
     NoRecordFoundError, RecordAlreadyExistsError
 from niamoto.log import get_logger
@@ -24,6 +28,10 @@ class TaxonomyManager:
 
     IDENTITY_SYNONYM_KEY = 'niamoto'
 
+    #  Process-level cache of the synonym maps, by synonym key:
+    #  (taxonomy revision tag, SynonymMap)
+    _SYNONYM_MAPS = {}
+
     @classmethod
     def get_raw_taxon_dataframe(cls):
         """
@@ -48,16 +56,27 @@ class TaxonomyManager:
         delete = meta.taxon.delete()
         if bind is not None:
             result = bind.execute(delete)
+            DatabaseRevision.bump(
+                DatabaseRevision.DATA,
+                DatabaseRevision.TAXONOMY,
+                connection=bind
+            )
         else:
             with Connector.get_connection() as connection:
-                result = connection.execute(delete)
+                with connection.begin():
+                    result = connection.execute(delete)
+                    DatabaseRevision.bump(
+                        DatabaseRevision.DATA,
+                        DatabaseRevision.TAXONOMY,
+                        connection=connection
+                    )
         LOGGER.debug("{} taxa had been deleted.".format(result.rowcount))
 
     @classmethod
-    def set_taxonomy(cls, taxon_dataframe):
+    def set_taxonomy(cls, taxon_dataframe, differential=True):
         """
-        Set the taxonomy. If a taxonomy already exist, delete it and set the
-        new one.
+        Set the taxonomy. If a taxonomy already exist, replace it by the new
+        one.
         :param taxon_dataframe: A dataframe containing the taxonomy to set.
         The dataframe must contain at least the following columns:
             taxon_id  -> The id of the taxon (must be the index of the
@@ -70,6 +89,11 @@ class TaxonomyManager:
             rank_name -> The rank name of the taxon.
         The remaining columns will be stored as synonyms, using the column
         name.
+        :param differential: If True, only apply the differences between
+        the current taxonomy and the new one (see _merge_taxonomy): the taxa
+        that did not change are not touched, nor the occurrences referencing
+        them. Otherwise, delete all the taxa and insert the new ones.
+        :return: (number of taxa inserted or updated, synonym keys)
         """
         LOGGER.debug("Starting set_taxonomy...")
         required_columns = {'parent_id', 'rank', 'full_name', 'rank_name'}
@@ -103,7 +127,8 @@ class TaxonomyManager:
         mptt = ['mptt_tree_id', 'mptt_depth', 'mptt_left', 'mptt_right']
         for col in mptt:
             taxon_dataframe[col] = 0
-        taxon_dataframe = cls.construct_mptt(taxon_dataframe)
+        if not differential:
+            taxon_dataframe = cls.construct_mptt(taxon_dataframe)
         taxon_dataframe['taxon_id'] = taxon_dataframe.index
         taxon_dataframe = taxon_dataframe.astype(object).where(
             pd.notnull(taxon_dataframe), None
@@ -141,14 +166,25 @@ class TaxonomyManager:
                     bind=connection,
                     exclude=to_keep,
                 )
-                # Delete existing taxonomy
-                cls.delete_all_taxa(bind=connection)
+                if not differential:
+                    # Delete existing taxonomy
+                    cls.delete_all_taxa(bind=connection)
                 # Register synonym cols
                 for synonym_key in to_add:
                     cls.register_synonym_key(synonym_key, bind=connection)
+                # Without differential merge, the taxonomy is rewritten
+                changed = True
+                if differential:
+                    LOGGER.debug("Merging the taxonomy in database...")
+                    result, deleted = cls._merge_taxonomy(
+                        taxon_dataframe,
+                        connection
+                    )
+                    changed = result > 0 or deleted > 0 \
+                        or len(to_add) > 0 or len(to_delete) > 0
                 # Insert the data
-                LOGGER.debug("Inserting the taxonomy in database...")
-                if len(taxon_dataframe) > 0:
+                elif len(taxon_dataframe) > 0:
+                    LOGGER.debug("Inserting the taxonomy in database...")
                     ins = meta.taxon.insert().values(
                         id=bindparam('taxon_id'),
                         full_name=bindparam('full_name'),
@@ -167,13 +203,316 @@ class TaxonomyManager:
                     ).rowcount
                 else:
                     result = 0
+                if changed:
+                    DatabaseRevision.bump(
+                        DatabaseRevision.DATA,
+                        DatabaseRevision.TAXONOMY,
+                        connection=connection
+                    )
+                else:
+                    # Keep the revision keyed caches (e.g. synonym maps)
+                    LOGGER.debug("The taxonomy is unchanged.")
                 m = "The taxonomy had been successfully set ({} taxa " \
-                    "inserted)!"
+                    "inserted or updated)!"
                 LOGGER.debug(m.format(result))
         return result, synonym_cols
 
-    def set_synonym_data(self, synonym_key, data):
-        pass  # TODO
+    @classmethod
+    def _merge_taxonomy(cls, taxon_dataframe, connection):
+        """
+        Apply the differences between the current taxonomy and a new one.
+        The new taxonomy is staged with COPY, then the removed taxa are
+        deleted and the new or modified taxa are upserted, in SQL. The
+        MPTT is only rebuilt for the trees where taxa have been inserted,
+        removed or moved, the other taxa keep their current MPTT values.
+        Must be called within a transaction, with deferred constraints.
+        :param taxon_dataframe: The new taxonomy, prepared by set_taxonomy.
+        :param connection: The connection to use.
+        :return: The number of taxa inserted or updated and the number of
+            deleted taxa.
+        """
+        mptt = ['mptt_tree_id', 'mptt_depth', 'mptt_left', 'mptt_right']
+        current = pd.read_sql(
+            select([
+                meta.taxon.c.id,
+                meta.taxon.c.parent_id,
+            ] + [meta.taxon.c[col] for col in mptt]),
+            connection,
+            index_col=meta.taxon.c.id.name,
+        )
+        df = taxon_dataframe.copy()
+        df.index = pd.to_numeric(df.index)
+        parents = pd.to_numeric(df['parent_id'])
+        roots = cls._get_roots(parents)
+        # Affected trees: trees where taxa have been inserted, removed or
+        # moved, identified by their root (i.e. their mptt_tree_id)
+        inserted = df.index.difference(current.index)
+        removed = current.index.difference(df.index)
+        common = df.index.intersection(current.index)
+        old_parents = pd.to_numeric(current.loc[common, 'parent_id'])
+        new_parents = parents.loc[common]
+        moved = common[~(
+            (old_parents == new_parents)
+            | (old_parents.isnull() & new_parents.isnull())
+        )]
+        affected = set(roots.loc[inserted.union(moved)]).union(
+            current.loc[removed.union(moved), 'mptt_tree_id']
+        )
+        rebuilt = roots[roots.isin(affected)].index
+        m = "{} taxa inserted, {} removed, {} moved: rebuilding the MPTT " \
+            "of {} trees ({} taxa)."
+        LOGGER.debug(m.format(
+            len(inserted), len(removed), len(moved), len(affected),
+            len(rebuilt)
+        ))
+        kept = df.index.difference(rebuilt)
+        df.loc[kept, mptt] = current.loc[kept, mptt].values
+        if len(rebuilt) > 0:
+            df.loc[rebuilt, mptt] = cls.construct_mptt(
+                df.loc[rebuilt]
+            )[mptt].values
+        df['id'] = df.index
+        df['rank'] = df['rank'].apply(lambda r: getattr(r, 'name', r))
+        tables = {
+            'taxon': '{}.{}'.format(settings.NIAMOTO_SCHEMA, meta.taxon.name),
+        }
+        columns = [
+            'id', 'full_name', 'rank_name', 'rank', 'parent_id', 'synonyms',
+        ] + mptt
+        with StagingTable(connection, [
+                ('id', 'integer'),
+                ('full_name', 'text'),
+                ('rank_name', 'text'),
+                ('rank', meta.taxon.c.rank.type.name),
+                ('parent_id', 'integer'),
+                ('synonyms', 'jsonb'),
+                ('mptt_tree_id', 'integer'),
+                ('mptt_depth', 'integer'),
+                ('mptt_left', 'integer'),
+                ('mptt_right', 'integer')], prefix='niamoto_taxon') as stg:
+            stg.copy_from(df)
+            tables['staging'] = stg.name
+            deleted = connection.execute(
+                """
+                DELETE FROM {taxon} AS tax
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM {staging} AS stg WHERE stg.id = tax.id
+                );
+                """.format(**tables)
+            ).rowcount
+            # Clear the modified synonyms first, the unique synonym indexes
+            # are checked for each row and would reject synonyms exchanged
+            # between taxa.
+            connection.execute(
+                """
+                UPDATE {taxon} AS tax
+                SET synonyms = '{{}}'::jsonb
+                FROM {staging} AS stg
+                WHERE stg.id = tax.id
+                    AND tax.synonyms IS DISTINCT FROM stg.synonyms;
+                """.format(**tables)
+            )
+            result = connection.execute(
+                """
+                INSERT INTO {taxon} AS tax ({columns})
+                SELECT {columns} FROM {staging}
+                ON CONFLICT (id) DO UPDATE
+                SET {update}
+                WHERE ({current}) IS DISTINCT FROM ({excluded});
+                """.format(**{
+                    'taxon': tables['taxon'],
+                    'staging': tables['staging'],
+                    'columns': ', '.join(columns),
+                    'update': ', '.join(
+                        ['{0} = EXCLUDED.{0}'.format(c) for c in columns[1:]]
+                    ),
+                    'current': ', '.join(
+                        ['tax.{}'.format(c) for c in columns[1:]]
+                    ),
+                    'excluded': ', '.join(
+                        ['EXCLUDED.{}'.format(c) for c in columns[1:]]
+                    ),
+                })
+            ).rowcount
+        LOGGER.debug("{} taxa had been deleted.".format(deleted))
+        return result, deleted
+
+    @staticmethod
+    def _get_roots(parents):
+        """
+        :param parents: A Series indexed by taxon id, with the parent ids as
+            values (null for the roots).
+        :return: A Series indexed by taxon id, with the id of the root of
+            each taxon as values.
+        """
+        roots = pd.Series(parents.index.values, index=parents.index)
+        current = parents.copy()
+        for i in range(len(parents) + 1):
+            has_parent = current.notnull()
+            if not has_parent.any():
+                break
+            roots[has_parent] = current[has_parent]
+            current[has_parent] = parents.reindex(
+                current[has_parent].values
+            ).values
+        else:
+            raise MalformedDataSourceError(
+                "The taxonomy contains a cycle."
+            )
+        return roots
+
+    @classmethod
+    def set_synonym_data(cls, synonym_key, data, replace=False,
+                         connection=None):
+        """
+        Load the synonyms of a synonym key in bulk. The synonyms are staged
+        with COPY, validated in SQL and applied to the taxon table with a
+        set-based update.
+        :param synonym_key: The synonym key of the synonyms, it must be
+            registered.
+        :param data: A DataFrame with a 'taxon_id' column (the id of the
+            taxon in Niamoto's referential) and a 'provider_taxon_id' column
+            (the id of the taxon in the referential pointed by the synonym
+            key). Rows with a null provider_taxon_id are ignored.
+        :param replace: If True, the synonyms of the key that are not in
+            data are removed, otherwise they are kept.
+        :param connection: If passed, use an existing connection. The
+            synonyms are then loaded within its current transaction.
+        :return: The number of taxa whose synonym had been set.
+        """
+        if synonym_key == cls.IDENTITY_SYNONYM_KEY:
+            m = "The '{}' synonym key is a special key reserved by Niamoto."
+            raise MalformedDataSourceError(m.format(synonym_key))
+        required_columns = {'taxon_id', 'provider_taxon_id'}
+        if not required_columns.issubset(set(data.columns)):
+            m = "The synonym data does not contains the required " \
+                "columns {}, data has: {}"
+            raise MalformedDataSourceError(
+                m.format(required_columns, set(data.columns))
+            )
+        data = data[data['provider_taxon_id'].notnull()]
+        m = "Setting {} synonyms for the synonym key '{}'..."
+        LOGGER.debug(m.format(len(data), synonym_key))
+        params = {'synonym_key': synonym_key}
+        tables = {
+            'taxon': '{}.{}'.format(settings.NIAMOTO_SCHEMA, meta.taxon.name),
+        }
+
+        def _check(con, sql, message):
+            rows = con.execute(sql.format(**tables), params).fetchall()
+            if len(rows) > 0:
+                raise MalformedDataSourceError(message.format(
+                    ', '.join([str(r[0]) for r in rows])
+                ))
+
+        def _set(con):
+            cls.assert_synonym_key_exists(synonym_key, bind=con)
+            staging = StagingTable(con, [
+                ('taxon_id', 'integer'),
+                ('provider_taxon_id', 'integer'),
+            ], prefix='niamoto_synonym')
+            staging.create()
+            staging.copy_from(data)
+            tables['staging'] = staging.name
+            _check(
+                con,
+                """
+                SELECT taxon_id FROM {staging}
+                GROUP BY taxon_id
+                HAVING COUNT(DISTINCT provider_taxon_id) > 1
+                LIMIT 10;
+                """,
+                "The following taxa have several synonyms: {}."
+            )
+            _check(
+                con,
+                """
+                SELECT provider_taxon_id FROM {staging}
+                GROUP BY provider_taxon_id
+                HAVING COUNT(DISTINCT taxon_id) > 1
+                LIMIT 10;
+                """,
+                "The following synonyms are shared by several taxa: {}."
+            )
+            _check(
+                con,
+                """
+                SELECT DISTINCT stg.taxon_id FROM {staging} AS stg
+                LEFT JOIN {taxon} AS tax ON tax.id = stg.taxon_id
+                WHERE tax.id IS NULL
+                LIMIT 10;
+                """,
+                "The following taxa do not exist in database: {}."
+            )
+            if not replace:
+                # Synonyms already set for taxa that are not in the data
+                _check(
+                    con,
+                    """
+                    SELECT DISTINCT stg.provider_taxon_id
+                    FROM {staging} AS stg
+                    INNER JOIN {taxon} AS tax
+                        ON tax.synonyms -> %(synonym_key)s
+                            = to_jsonb(stg.provider_taxon_id)
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM {staging} AS s
+                        WHERE s.taxon_id = tax.id
+                    )
+                    LIMIT 10;
+                    """,
+                    "The following synonyms are already set for other "
+                    "taxa: {}."
+                )
+            # Remove the synonyms that are changed (or all of them when
+            # replacing), the unique synonym index is checked for each row
+            # and would reject synonyms exchanged between taxa.
+            con.execute(
+                """
+                UPDATE {taxon} AS tax
+                SET synonyms = tax.synonyms - %(synonym_key)s
+                WHERE tax.synonyms ? %(synonym_key)s
+                    AND {condition};
+                """.format(**{
+                    'taxon': tables['taxon'],
+                    'condition': "TRUE" if replace else
+                    """
+                    EXISTS (
+                        SELECT 1 FROM {staging} AS stg
+                        WHERE stg.taxon_id = tax.id
+                    )
+                    """.format(**tables),
+                }),
+                params
+            )
+            result = con.execute(
+                """
+                UPDATE {taxon} AS tax
+                SET synonyms = tax.synonyms || jsonb_build_object(
+                    %(synonym_key)s,
+                    stg.provider_taxon_id
+                )
+                FROM (
+                    SELECT DISTINCT taxon_id, provider_taxon_id
+                    FROM {staging}
+                ) AS stg
+                WHERE tax.id = stg.taxon_id;
+                """.format(**tables),
+                params
+            ).rowcount
+            DatabaseRevision.bump(
+                DatabaseRevision.DATA,
+                DatabaseRevision.TAXONOMY,
+                connection=con
+            )
+            m = "{} synonyms had been set for the synonym key '{}'."
+            LOGGER.debug(m.format(result, synonym_key))
+            return result
+
+        if connection is not None:
+            return _set(connection)
+        with Connector.get_connection() as connection:
+            with connection.begin():
+                return _set(connection)
 
     @classmethod
     def get_synonym_keys(cls):
@@ -346,7 +685,13 @@ class TaxonomyManager:
         )
         with Connector.get_connection() as connection:
             cls.assert_synonym_key_exists(synonym_key, bind=connection)
-            connection.execute(upd)
+            with connection.begin():
+                connection.execute(upd)
+                DatabaseRevision.bump(
+                    DatabaseRevision.DATA,
+                    DatabaseRevision.TAXONOMY,
+                    connection=connection
+                )
 
     @classmethod
     def get_synonyms_for_key(cls, synonym_key):
@@ -377,6 +722,151 @@ class TaxonomyManager:
             )["niamoto_taxon_id"]
             return synonyms[synonyms.index.notnull()]
 
+    @classmethod
+    def map_occurrence_synonyms(cls, provider_ids=None, connection=None):
+        """
+        Update the taxon_id of the stored occurrences from their
+        provider_taxon_id, using the synonym key of their data provider.
+        The mapping is entirely done by the database, in a single statement
+        for all the data providers: the synonyms of the taxon table are
+        expanded once and joined with the occurrences. Only the occurrences
+        whose taxon_id changes are updated, and the occurrences that cannot
+        be mapped get a null taxon_id.
+        :param provider_ids: If not None, an iterable of the ids of the data
+            providers whose occurrences must be mapped. Otherwise, map the
+            occurrences of every data provider.
+        :param connection: If passed, use an existing connection. The update
+            is then executed within its current transaction.
+        :return: A DataFrame indexed by provider id, with the number of
+            mapped occurrences ('mapped') and the total number of
+            occurrences ('total') of each data provider.
+        """
+        params = {'identity': cls.IDENTITY_SYNONYM_KEY}
+        provider_filter = ""
+        if provider_ids is not None:
+            provider_ids = [int(i) for i in provider_ids]
+            if len(provider_ids) == 0:
+                return pd.DataFrame(
+                    columns=['mapped', 'total'],
+                    index=pd.Index([], name='provider_id'),
+                )
+            provider_filter = "AND occ.provider_id IN ({})".format(
+                ', '.join(["%(provider_{})s".format(i)
+                           for i in range(len(provider_ids))])
+            )
+            params.update({
+                'provider_{}'.format(i): provider_id
+                for i, provider_id in enumerate(provider_ids)
+            })
+        sql_update = \
+            """
+            WITH synonym AS (
+                SELECT reg.id AS synonym_key_id,
+                    syn.value::numeric AS provider_taxon_id,
+                    tax.id AS taxon_id
+                FROM {taxon} AS tax
+                CROSS JOIN LATERAL jsonb_each_text(tax.synonyms) AS syn
+                INNER JOIN {registry} AS reg ON reg.name = syn.key
+                WHERE jsonb_typeof(tax.synonyms -> syn.key) = 'number'
+                UNION ALL
+                SELECT reg.id, tax.id, tax.id
+                FROM {taxon} AS tax
+                INNER JOIN {registry} AS reg ON reg.name = %(identity)s
+            ),
+            mapping AS (
+                SELECT occ.id, synonym.taxon_id
+                FROM {occurrence} AS occ
+                INNER JOIN {data_provider} AS prov
+                    ON prov.id = occ.provider_id
+                LEFT JOIN synonym
+                    ON synonym.synonym_key_id = prov.synonym_key_id
+                    AND synonym.provider_taxon_id = occ.provider_taxon_id
+                WHERE TRUE {provider_filter}
+            )
+            UPDATE {occurrence} AS occ
+            SET taxon_id = mapping.taxon_id
+            FROM mapping
+            WHERE occ.id = mapping.id
+                AND occ.taxon_id IS DISTINCT FROM mapping.taxon_id;
+            """.format(**{
+                'taxon': '{}.{}'.format(
+                    settings.NIAMOTO_SCHEMA, meta.taxon.name
+                ),
+                'registry': '{}.{}'.format(
+                    settings.NIAMOTO_SCHEMA, meta.synonym_key_registry.name
+                ),
+                'occurrence': '{}.{}'.format(
+                    settings.NIAMOTO_SCHEMA, meta.occurrence.name
+                ),
+                'data_provider': '{}.{}'.format(
+                    settings.NIAMOTO_SCHEMA, meta.data_provider.name
+                ),
+                'provider_filter': provider_filter,
+            })
+        sql_count = \
+            """
+            SELECT occ.provider_id,
+                COUNT(occ.taxon_id) AS mapped,
+                COUNT(*) AS total
+            FROM {occurrence} AS occ
+            WHERE TRUE {provider_filter}
+            GROUP BY occ.provider_id;
+            """.format(**{
+                'occurrence': '{}.{}'.format(
+                    settings.NIAMOTO_SCHEMA, meta.occurrence.name
+                ),
+                'provider_filter': provider_filter,
+            })
+
+        def _map(con):
+            updated = con.execute(sql_update, params).rowcount
+            if updated > 0:
+                DatabaseRevision.bump(connection=con)
+            LOGGER.debug(
+                "{} occurrences had been remapped.".format(updated)
+            )
+            return pd.read_sql(
+                sql_count,
+                con,
+                params=params,
+                index_col='provider_id'
+            )
+
+        if connection is not None:
+            return _map(connection)
+        with Connector.get_connection() as connection:
+            with connection.begin():
+                return _map(connection)
+
+    @classmethod
+    def get_synonym_map(cls, synonym_key):
+        """
+        :param synonym_key: The synonym key to consider. If synonym key is
+        'niamoto', return the identity synonym map.
+        :return: The SynonymMap of the synonym key. Synonym maps are cached
+        in the process, and rebuilt when the taxonomy revision changes
+        (i.e. when the taxonomy or a synonym has been modified).
+        """
+        revision = DatabaseRevision.get_tag(DatabaseRevision.TAXONOMY)
+        cached = cls._SYNONYM_MAPS.get(synonym_key, None)
+        if cached is not None and cached[0] == revision:
+            return cached[1]
+        LOGGER.debug(
+            "Building the synonym map of '{}'...".format(synonym_key)
+        )
+        synonym_map = SynonymMap.from_series(
+            cls.get_synonyms_for_key(synonym_key)
+        )
+        cls._SYNONYM_MAPS[synonym_key] = (revision, synonym_map)
+        return synonym_map
+
+    @classmethod
+    def clear_synonym_maps(cls):
+        """
+        Clear the synonym map cache.
+        """
+        cls._SYNONYM_MAPS.clear()
+
     @staticmethod
     def assert_synonym_key_exists(synonym_key, bind=None):
         """
@@ -443,6 +933,191 @@ class TaxonomyManager:
                 ]].to_dict(orient='records')
             )
 
+    @classmethod
+    def get_mptt_node(cls, taxon_id, connection=None):
+        """
+        :param taxon_id: The id of the taxon.
+        :param connection: If passed, use an existing connection.
+        :return: The MPTT attributes of the taxon, as a tuple
+            (mptt_tree_id, mptt_left, mptt_right).
+        """
+        sel = select([
+            meta.taxon.c.mptt_tree_id,
+            meta.taxon.c.mptt_left,
+            meta.taxon.c.mptt_right,
+        ]).where(meta.taxon.c.id == int(taxon_id))
+        if connection is not None:
+            row = connection.execute(sel).fetchone()
+        else:
+            with Connector.get_connection() as connection:
+                row = connection.execute(sel).fetchone()
+        if row is None:
+            m = "The taxon '{}' does not exist in database."
+            raise NoRecordFoundError(m.format(taxon_id))
+        return tuple(row)
+
+    @classmethod
+    def get_subtree_condition(cls, taxon_id, taxon_table=None,
+                              include_self=True, connection=None):
+        """
+        :param taxon_id: The id of the root taxon of the subtree.
+        :param taxon_table: The taxon table (or alias) the condition applies
+            to, by default the taxon table.
+        :param include_self: If True, the root taxon belongs to the subtree.
+        :param connection: If passed, use an existing connection.
+        :return: A sqlalchemy boolean expression selecting the taxa of the
+            subtree, as a range on the (mptt_tree_id, mptt_left, mptt_right)
+            index.
+        """
+        tree_id, left, right = cls.get_mptt_node(
+            taxon_id,
+            connection=connection
+        )
+        if taxon_table is None:
+            taxon_table = meta.taxon
+        if include_self:
+            return and_(
+                taxon_table.c.mptt_tree_id == tree_id,
+                taxon_table.c.mptt_left >= left,
+                taxon_table.c.mptt_right <= right,
+            )
+        return and_(
+            taxon_table.c.mptt_tree_id == tree_id,
+            taxon_table.c.mptt_left > left,
+            taxon_table.c.mptt_right < right,
+        )
+
+    @classmethod
+    def get_descendants(cls, taxon_id, include_self=False, connection=None):
+        """
+        :param taxon_id: The id of the taxon.
+        :param include_self: If True, include the taxon itself.
+        :param connection: If passed, use an existing connection.
+        :return: A DataFrame containing the descendants of the taxon, in
+            pre-order.
+        """
+        def _get(con):
+            sel = select([meta.taxon]).where(cls.get_subtree_condition(
+                taxon_id,
+                include_self=include_self,
+                connection=con
+            )).order_by(meta.taxon.c.mptt_left)
+            return pd.read_sql(sel, con, index_col=meta.taxon.c.id.name)
+
+        if connection is not None:
+            return _get(connection)
+        with Connector.get_connection() as connection:
+            return _get(connection)
+
+    @classmethod
+    def get_ancestors(cls, taxon_id, include_self=False, connection=None):
+        """
+        :param taxon_id: The id of the taxon.
+        :param include_self: If True, include the taxon itself.
+        :param connection: If passed, use an existing connection.
+        :return: A DataFrame containing the ancestors of the taxon, from the
+            root to the taxon.
+        """
+        def _get(con):
+            tree_id, left, right = cls.get_mptt_node(taxon_id, connection=con)
+            if include_self:
+                cond = and_(
+                    meta.taxon.c.mptt_left <= left,
+                    meta.taxon.c.mptt_right >= right,
+                )
+            else:
+                cond = and_(
+                    meta.taxon.c.mptt_left < left,
+                    meta.taxon.c.mptt_right > right,
+                )
+            sel = select([meta.taxon]).where(and_(
+                meta.taxon.c.mptt_tree_id == tree_id,
+                cond,
+            )).order_by(meta.taxon.c.mptt_left)
+            return pd.read_sql(sel, con, index_col=meta.taxon.c.id.name)
+
+        if connection is not None:
+            return _get(connection)
+        with Connector.get_connection() as connection:
+            return _get(connection)
+
+    @classmethod
+    def get_subtree_occurrences(cls, taxon_id, connection=None):
+        """
+        :param taxon_id: The id of the root taxon of the subtree.
+        :param connection: If passed, use an existing connection.
+        :return: A DataFrame containing the occurrences (id, provider_id,
+            provider_pk and taxon_id) whose taxon belongs to the subtree of
+            the taxon (the taxon included).
+        """
+        def _get(con):
+            sel = select([
+                meta.occurrence.c.id,
+                meta.occurrence.c.provider_id,
+                meta.occurrence.c.provider_pk,
+                meta.occurrence.c.taxon_id,
+            ]).select_from(
+                meta.occurrence.join(
+                    meta.taxon,
+                    meta.taxon.c.id == meta.occurrence.c.taxon_id
+                )
+            ).where(cls.get_subtree_condition(taxon_id, connection=con))
+            return pd.read_sql(
+                sel,
+                con,
+                index_col=meta.occurrence.c.id.name
+            )
+
+        if connection is not None:
+            return _get(connection)
+        with Connector.get_connection() as connection:
+            return _get(connection)
+
+    @classmethod
+    def get_subtree_occurrence_counts(cls, taxon_ids=None, connection=None):
+        """
+        Count the occurrences of each taxon subtree.
+        :param taxon_ids: If not None, an iterable of the ids of the taxa to
+            count the subtree occurrences of. Otherwise, count them for every
+            taxon.
+        :param connection: If passed, use an existing connection.
+        :return: A Series indexed by taxon id, with the number of
+            occurrences whose taxon belongs to the subtree of the taxon
+            (the taxon included) as values.
+        """
+        ancestor = meta.taxon.alias('ancestor')
+        descendant = meta.taxon.alias('descendant')
+        counts = select([
+            meta.occurrence.c.taxon_id,
+            func.count().label('nb'),
+        ]).where(
+            meta.occurrence.c.taxon_id.isnot(None)
+        ).group_by(meta.occurrence.c.taxon_id).alias('counts')
+        sel = select([
+            ancestor.c.id.label('taxon_id'),
+            func.coalesce(func.sum(counts.c.nb), 0).label('occurrences'),
+        ]).select_from(
+            ancestor.join(
+                descendant,
+                and_(
+                    descendant.c.mptt_tree_id == ancestor.c.mptt_tree_id,
+                    descendant.c.mptt_left >= ancestor.c.mptt_left,
+                    descendant.c.mptt_left < ancestor.c.mptt_right,
+                )
+            ).outerjoin(
+                counts,
+                counts.c.taxon_id == descendant.c.id
+            )
+        ).group_by(ancestor.c.id)
+        if taxon_ids is not None:
+            sel = sel.where(ancestor.c.id.in_([int(i) for i in taxon_ids]))
+        if connection is not None:
+            df = pd.read_sql(sel, connection, index_col='taxon_id')
+        else:
+            with Connector.get_connection() as connection:
+                df = pd.read_sql(sel, connection, index_col='taxon_id')
+        return df['occurrences'].astype(int)
+
     @staticmethod
     def construct_mptt(dataframe):
         """
@@ -7,6 +7,8 @@ from sqlalchemy.engine.reflection import Inspector
 from niamoto.conf import settings
 from niamoto.db.connector import Connector
 from niamoto.db import metadata as meta
+from niamoto.data_publishers.publisher_cache import PUBLISHER_CACHE
+from niamoto.taxonomy.taxonomy_manager import TaxonomyManager
 
 
 class BaseTest(unittest.TestCase):
@@ -20,6 +22,8 @@ class BaseTestNiamotoSchemaCreated(BaseTest):
 
     @classmethod
     def setUpClass(cls):
+        PUBLISHER_CACHE.clear()
+        TaxonomyManager.clear_synonym_maps()
         engine = Connector.get_engine()
         meta.metadata.create_all(engine, tables=[
             meta.occurrence,
@@ -33,10 +37,15 @@ class BaseTestNiamotoSchemaCreated(BaseTest):
             meta.dimension_registry,
             meta.fact_table_registry,
             meta.sdm_registry,
+            meta.property_key_catalog,
+            meta.promoted_property,
+            meta.database_revision,
         ])
 
     @classmethod
     def tearDownClass(cls):
+        PUBLISHER_CACHE.clear()
+        TaxonomyManager.clear_synonym_maps()
         engine = Connector.get_engine()
         meta.metadata.drop_all(engine)
         with Connector.get_connection() as connection:
@@ -11,6 +11,7 @@ import geopandas as gpd
 from niamoto.db.connector import Connector
 from niamoto.conf import settings
 from niamoto.db import metadata as meta
+from niamoto.db.utils import create_gist_index
 from niamoto.log import get_logger
 from niamoto.exceptions import NoRecordFoundError, RecordAlreadyExistsError, \
     IncoherentDatabaseStateError
@@ -24,6 +25,9 @@ class VectorManager:
     Class managing the vector registry (list, add, update, delete).
     """
 
+    # Cache of the vectors geometry columns, vector_name: (name, type, srid)
+    GEOMETRY_COLUMNS = {}
+
     @classmethod
     def get_vector_list(cls):
         """
@@ -89,6 +93,8 @@ class VectorManager:
         })
         with Connector.get_connection() as connection:
             connection.execute(ins)
+        cls.GEOMETRY_COLUMNS.pop(name, None)
+        cls.create_spatial_index(name)
 
     @classmethod
     def update_vector(cls, name, vector_file_path=None, new_name=None,
@@ -162,6 +168,26 @@ class VectorManager:
         with Connector.get_connection() as connection:
             if new_name != name:
                 connection.execute(upd)
+        cls.GEOMETRY_COLUMNS.pop(name, None)
+        cls.GEOMETRY_COLUMNS.pop(new_name, None)
+        if vector_file_path is not None:
+            cls.create_spatial_index(new_name)
+
+    @classmethod
+    def create_spatial_index(cls, vector_name):
+        """
+        Create a GiST index on the geometry column of a vector, if it is
+        not already indexed. Called when the vector is added or updated.
+        :param vector_name: The name of the vector.
+        """
+        geom_col = cls.get_geometry_column(vector_name)
+        if geom_col is None:
+            return
+        create_gist_index(
+            settings.NIAMOTO_VECTOR_SCHEMA,
+            vector_name,
+            geom_col[0]
+        )
 
     @classmethod
     def delete_vector(cls, name, connection=None):
@@ -188,6 +214,7 @@ class VectorManager:
             connection.execute(del_stmt)
         if close_after:
             connection.close()
+        cls.GEOMETRY_COLUMNS.pop(name, None)
 
     @staticmethod
     def assert_vector_does_not_exist(name):
@@ -238,9 +265,12 @@ class VectorManager:
         """
         Find the geometry column of a raster, inspecting the geometry_columns
         table. Assume that there is a single geometry column, if several are
-        queried return the first one.
+        queried return the first one. The result is cached until the vector
+        is updated or deleted.
         :return: The geometry column name, type and srid (name, type, srid).
         """
+        if vector_name in cls.GEOMETRY_COLUMNS:
+            return cls.GEOMETRY_COLUMNS[vector_name]
         with Connector.get_connection() as connection:
             cls.assert_vector_exists(vector_name, connection)
             sql = \
@@ -256,8 +286,11 @@ class VectorManager:
                     settings.NIAMOTO_VECTOR_SCHEMA,
                     vector_name
                 )
-            result = connection.execute(sql)
-            return result.fetchone()
+            result = connection.execute(sql).fetchone()
+        if result is None:
+            return None
+        cls.GEOMETRY_COLUMNS[vector_name] = tuple(result)
+        return cls.GEOMETRY_COLUMNS[vector_name]
 
     @classmethod
     def get_vector_primary_key_columns(cls, vector_name):
@@ -359,6 +392,7 @@ class VectorManager:
             meta_.reflect(
                 bind=connection,
                 schema=settings.NIAMOTO_VECTOR_SCHEMA,
+                only=[vector_name],
             )
             table_key = '{}.{}'.format(
                 settings.NIAMOTO_VECTOR_SCHEMA,
@@ -19,6 +19,9 @@ from niamoto.api.vector_api import add_vector, delete_vector
 from niamoto.api.data_marts_api import delete_dimension, delete_fact_table
 from niamoto.db.connector import Connector
 from niamoto.db import metadata as meta
+from niamoto.db.revision import DatabaseRevision
+from niamoto.data_marts.aggregation_cache import AGGREGATION_CACHE, \
+    AggregationCache
 
 
 SHP_TEST = os.path.join(
@@ -139,6 +142,72 @@ class TestDimensionalModel(BaseTestNiamotoSchemaCreated):
         browser = workspace.browser('fact_table_1')
         browser.aggregate(drilldown=['dim_1'])
 
+    def test_cached_aggregation(self):
+        model_dict = {
+            'dimensions': [
+                {
+                    'name': 'dim_1',
+                    'dimension_type': 'TEST_DIMENSION'
+                },
+            ],
+            'fact_tables': [
+                {
+                    'name': 'fact_table_1',
+                    'dimensions': ['dim_1'],
+                    'measures': ['measure_1'],
+                    'publisher_key': 'TEST_FACT_TABLE_PUBLISHER',
+                    "aggregates": [
+                        {
+                            "name": "record_count",
+                            "function": "count"
+                        }
+                    ],
+                }
+            ]
+        }
+        model = load_model_from_dict(model_dict)
+        model.create_model()
+        model.populate_dimensions()
+        model.populate_fact_tables()
+        AGGREGATION_CACHE.clear()
+        browser = model.get_cubes_workspace().browser('fact_table_1')
+        r1 = browser.aggregate(drilldown=['dim_1'])
+        self.assertEqual(len(AGGREGATION_CACHE), 1)
+        r2 = browser.aggregate(drilldown=['dim_1'])
+        self.assertIs(r1, r2)
+        self.assertEqual(list(r1.cells), list(r2.cells))
+        # Populating invalidates the cache
+        fact_table = model.fact_tables['fact_table_1']
+        fact_table.truncate()
+        self.assertEqual(len(AGGREGATION_CACHE), 0)
+        r3 = browser.aggregate(drilldown=['dim_1'])
+        self.assertIsNot(r1, r3)
+        # A revision bumped by another process invalidates the results
+        # cached by this process.
+        DatabaseRevision.bump(DatabaseRevision.DATA_MART)
+        self.assertEqual(len(AGGREGATION_CACHE), 1)
+        r4 = browser.aggregate(drilldown=['dim_1'])
+        self.assertIsNot(r3, r4)
+        # Uncached workspace
+        browser = model.get_cubes_workspace(use_cache=False).browser(
+            'fact_table_1'
+        )
+        AGGREGATION_CACHE.clear()
+        browser.aggregate(drilldown=['dim_1'])
+        self.assertEqual(len(AGGREGATION_CACHE), 0)
+
+    def test_aggregation_cache_eviction(self):
+        cache = AggregationCache(max_entries=2, max_result_cells=10)
+        keys = [cache.make_key('model', 'cube', drilldown=[i])
+                for i in range(3)]
+        for k in keys:
+            cache.set(k, k)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(keys[0]))
+        self.assertEqual(cache.get(keys[2]), keys[2])
+        cache.set('big', 'big', cell_count=11)
+        self.assertIsNone(cache.get('big'))
+
     def test_occurrence_observed_model(self):
         add_vector('ncl_adm1', SHP_TEST)
         model_dict = {
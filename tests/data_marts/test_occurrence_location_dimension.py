@@ -80,6 +80,72 @@ class TestOccurrenceLocationDimension(BaseTestNiamotoSchemaCreated):
         loaded_dim = OccurrenceLocationDimension.load(dim.name)
         loaded_dim.get_values()
 
+    def test_incremental_population(self):
+        dim = OccurrenceLocationDimension()
+        dim.create_dimension()
+        inserted = dim.populate_from_occurrences()
+        values = dim.get_values()
+        self.assertEqual(inserted, len(values))
+        self.assertFalse(values['snapped_wkt'].duplicated().any())
+        # A second population must not insert anything nor change the ids
+        self.assertEqual(dim.populate_from_occurrences(), 0)
+        values_bis = dim.get_values()
+        self.assertEqual(
+            list(values.sort_index()['snapped_wkt']),
+            list(values_bis.sort_index()['snapped_wkt']),
+        )
+        # Only one NS row
+        with Connector.get_connection() as connection:
+            ns_count = connection.execute(
+                "SELECT COUNT(*) FROM {}.{} WHERE location IS NULL".format(
+                    settings.NIAMOTO_DIMENSIONS_SCHEMA,
+                    dim.name
+                )
+            ).scalar()
+        self.assertEqual(ns_count, 1)
+        # location_wkt is the WKT of the (not snapped) location
+        with Connector.get_connection() as connection:
+            mismatch_count = connection.execute(
+                "SELECT COUNT(*) FROM {}.{} "
+                "WHERE location_wkt <> ST_AsText(location)".format(
+                    settings.NIAMOTO_DIMENSIONS_SCHEMA,
+                    dim.name
+                )
+            ).scalar()
+        self.assertEqual(mismatch_count, 0)
+        # The publisher is not used, publisher arguments are rejected
+        self.assertRaises(
+            TypeError,
+            dim.populate_from_publisher,
+            'arg'
+        )
+        self.assertRaises(
+            TypeError,
+            dim.populate_from_publisher,
+            properties=['dbh']
+        )
+        location_ids = dim.get_occurrence_location_ids()
+        self.assertFalse(
+            location_ids['{}_id'.format(dim.name)].isnull().any()
+        )
+
+    def test_add_snapped_wkt_column(self):
+        dim = OccurrenceLocationDimension()
+        dim.create_dimension()
+        with Connector.get_connection() as connection:
+            self.assertFalse(dim.add_snapped_wkt_column(connection))
+            # Simulate a dimension created before snapped_wkt existed
+            connection.execute(
+                "ALTER TABLE {}.{} DROP COLUMN snapped_wkt;".format(
+                    settings.NIAMOTO_DIMENSIONS_SCHEMA,
+                    dim.name
+                )
+            )
+        inserted = dim.populate_from_occurrences()
+        self.assertGreater(inserted, 0)
+        values = dim.get_values()
+        self.assertFalse(values['snapped_wkt'].isnull().any())
+
 
 if __name__ == '__main__':
     TestDatabaseManager.setup_test_database()
@@ -15,6 +15,7 @@ from niamoto.testing.base_tests import BaseTestNiamotoSchemaCreated
 from niamoto.api.vector_api import add_vector
 from niamoto.data_marts.dimensions.vector_dimension import VectorDimension
 from niamoto.db.connector import Connector
+from niamoto.db.utils import create_gist_index
 from niamoto.db import metadata as meta
 
 
@@ -64,6 +65,12 @@ class TestVectorDimension(BaseTestNiamotoSchemaCreated):
     def test_vector_dimension(self):
         dim = VectorDimension('ncl_adm1')
         dim.create_dimension()
+        # The geometry column is GiST indexed at creation
+        self.assertFalse(create_gist_index(
+            settings.NIAMOTO_DIMENSIONS_SCHEMA,
+            dim.name,
+            dim.geom_column_name
+        ))
         dim.populate_from_publisher()
         dim.get_values()
 
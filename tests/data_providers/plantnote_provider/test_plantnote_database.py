@@ -0,0 +1,85 @@
+# coding: utf-8
+
+import unittest
+import os
+import sqlite3
+import tempfile
+
+from sqlalchemy.exc import OperationalError
+
+from niamoto.testing import set_test_path
+set_test_path()
+
+from niamoto.conf import settings
+from niamoto.data_providers.plantnote_provider.plantnote_database import \
+    PlantnoteDatabase
+from niamoto.testing.base_tests import BaseTest
+from niamoto.testing.test_database_manager import TestDatabaseManager
+
+
+class TestPlantnoteDatabase(BaseTest):
+    """
+    Test case for the shared Pl@ntnote database.
+    """
+
+    def setUp(self):
+        super(TestPlantnoteDatabase, self).setUp()
+        PlantnoteDatabase.clear_metadata_cache()
+        fd, self.db_path = tempfile.mkstemp(suffix='.sqlite')
+        os.close(fd)
+        con = sqlite3.connect(self.db_path)
+        for table in PlantnoteDatabase.TABLES:
+            con.execute('CREATE TABLE "{}" (id INTEGER);'.format(table))
+        con.execute('CREATE TABLE "Unused" (id INTEGER);')
+        con.commit()
+        con.close()
+
+    def tearDown(self):
+        PlantnoteDatabase.clear_metadata_cache()
+        os.remove(self.db_path)
+        super(TestPlantnoteDatabase, self).tearDown()
+
+    def test_shared_connection_and_metadata(self):
+        database = PlantnoteDatabase(self.db_path)
+        connection = database.connect()
+        self.assertIs(database.connect(), connection)
+        tables = database.tables
+        self.assertEqual(
+            sorted(tables.keys()),
+            sorted(PlantnoteDatabase.TABLES)
+        )
+        database.close()
+        # The reflected metadata is reused by other instances
+        other = PlantnoteDatabase(self.db_path)
+        self.assertIs(other.tables['Individus'], tables['Individus'])
+        other.close()
+
+    def test_read_only(self):
+        database = PlantnoteDatabase(
+            self.db_path,
+            read_only=True,
+            mmap_size=2 ** 20,
+        )
+        connection = database.connect()
+        mmap_size = connection.execute("PRAGMA mmap_size;").scalar()
+        # mmap_size is capped by the SQLite compile-time maximum
+        self.assertIn(mmap_size, (0, 2 ** 20))
+        self.assertEqual(
+            connection.execute('SELECT COUNT(*) FROM "Individus";').scalar(),
+            0
+        )
+        self.assertRaises(
+            OperationalError,
+            connection.execute,
+            'INSERT INTO "Individus" VALUES (1);'
+        )
+        database.close()
+
+
+if __name__ == '__main__':
+    TestDatabaseManager.setup_test_database()
+    TestDatabaseManager.create_schema(settings.NIAMOTO_SCHEMA)
+    TestDatabaseManager.create_schema(settings.NIAMOTO_RASTER_SCHEMA)
+    TestDatabaseManager.create_schema(settings.NIAMOTO_VECTOR_SCHEMA)
+    unittest.main(exit=False)
+    TestDatabaseManager.teardown_test_database()
@@ -2,6 +2,10 @@
 
 import unittest
 import os
+import sqlite3
+import tempfile
+
+import pandas as pd
 
 from niamoto.testing import set_test_path
 set_test_path()
@@ -9,6 +13,10 @@ set_test_path()
 from niamoto.conf import settings, NIAMOTO_HOME
 from niamoto.data_providers.sql_provider.sql_data_provider import \
     SQLDataProvider
+from niamoto.data_providers.sql_provider.sql_occurrence_provider import \
+    SQLOccurrenceProvider
+from niamoto.db.connector import Connector
+from niamoto.exceptions import MalformedDataSourceError
 from niamoto.testing.test_database_manager import TestDatabaseManager
 from niamoto.testing.base_tests import BaseTestNiamotoSchemaCreated
 
@@ -84,6 +92,32 @@ class SQLTestProvider(SQLDataProvider):
         return "TEST_SQL"
 
 
+class SQLCDCTestProvider(SQLDataProvider):
+
+    OCCURRENCE_SQL = \
+        """
+        SELECT id, taxon_id, x, y, height, version
+        FROM occurrence;
+        """
+
+    TOMBSTONE_SQL = \
+        """
+        SELECT id, version FROM deleted_occurrence;
+        """
+
+    def __init__(self, name, db_url):
+        super(SQLCDCTestProvider, self).__init__(
+            name, db_url,
+            occurrence_sql=self.OCCURRENCE_SQL,
+            occurrence_cdc_column='version',
+            occurrence_tombstone_sql=self.TOMBSTONE_SQL,
+        )
+
+    @classmethod
+    def get_type_name(cls):
+        return "TEST_SQL_CDC"
+
+
 class TestSQLDataProvider(BaseTestNiamotoSchemaCreated):
     """
     Test case for sql data provider.
@@ -104,6 +138,122 @@ class TestSQLDataProvider(BaseTestNiamotoSchemaCreated):
         # Test sync
         test_data_provider.sync()
 
+    def test_sql_data_provider_cdc(self):
+        fd, db_path = tempfile.mkstemp(suffix='.sqlite')
+        os.close(fd)
+        source = sqlite3.connect(db_path)
+        source.execute(
+            "CREATE TABLE occurrence (id INTEGER, taxon_id INTEGER, "
+            "x REAL, y REAL, height REAL, version INTEGER);"
+        )
+        source.execute(
+            "CREATE TABLE deleted_occurrence (id INTEGER, version INTEGER);"
+        )
+        source.executemany(
+            "INSERT INTO occurrence VALUES (?, NULL, 166.5, -22.2, ?, ?);",
+            [(1, 10, 1), (2, 20, 2), (3, 30, 3)]
+        )
+        source.commit()
+        db_url = "sqlite:///{}".format(db_path)
+        try:
+            SQLCDCTestProvider.register_data_provider('sql_cdc', db_url)
+            provider = SQLCDCTestProvider('sql_cdc', db_url)
+            occ_provider = provider.occurrence_provider
+            # 1. No high-water mark: full sync
+            result = provider.sync()
+            self.assertEqual(len(result['occurrence']['insert']), 3)
+            with Connector.get_connection() as connection:
+                self.assertEqual(
+                    provider.get_high_water_mark('occurrence', connection),
+                    {'type': 'number', 'value': 3}
+                )
+                df = occ_provider.get_niamoto_occurrence_dataframe(connection)
+                self.assertEqual(len(df), 3)
+                self.assertNotIn('version', df['properties'].iloc[0])
+            # 2. Incremental sync
+            source.execute(
+                "UPDATE occurrence SET height = 11, version = 4 WHERE id = 1;"
+            )
+            source.execute(
+                "INSERT INTO occurrence VALUES (4, NULL, 166, -22, 40, 5);"
+            )
+            source.execute("DELETE FROM occurrence WHERE id = 2;")
+            source.execute("INSERT INTO deleted_occurrence VALUES (2, 6);")
+            source.commit()
+            result = provider.sync()
+            self.assertEqual(
+                list(result['occurrence']['insert']['provider_pk']),
+                [4]
+            )
+            self.assertEqual(
+                list(result['occurrence']['update']['provider_pk']),
+                [1]
+            )
+            self.assertEqual(
+                list(result['occurrence']['delete']['provider_pk']),
+                [2]
+            )
+            with Connector.get_connection() as connection:
+                self.assertEqual(
+                    provider.get_high_water_mark('occurrence', connection),
+                    {'type': 'number', 'value': 6}
+                )
+                df = occ_provider.get_niamoto_occurrence_dataframe(connection)
+                self.assertEqual(sorted(df['provider_pk']), [1, 3, 4])
+            # 3. Nothing changed, the boundary records are fetched again
+            result = provider.sync()
+            self.assertEqual(len(result['occurrence']['insert']), 0)
+            self.assertEqual(len(result['occurrence']['update']), 0)
+            self.assertEqual(len(result['occurrence']['delete']), 0)
+            # 4. A record written after the sync with the same cdc value
+            source.execute(
+                "INSERT INTO occurrence VALUES (5, NULL, 166, -22, 50, 6);"
+            )
+            source.commit()
+            result = provider.sync()
+            self.assertEqual(
+                list(result['occurrence']['insert']['provider_pk']),
+                [5]
+            )
+        finally:
+            source.close()
+            os.remove(db_path)
+
+    def test_high_water_mark_types(self):
+        provider = SQLOccurrenceProvider
+        mark = provider.get_new_high_water_mark([
+            pd.Series(pd.to_datetime(['2018-01-02 10:00:00',
+                                      '2018-01-01 23:00:00'])),
+        ])
+        self.assertEqual(mark, pd.Timestamp('2018-01-02 10:00:00'))
+        encoded = provider.encode_high_water_mark(mark)
+        self.assertEqual(
+            encoded,
+            {'type': 'timestamp', 'value': '2018-01-02T10:00:00'}
+        )
+        self.assertEqual(provider.decode_high_water_mark(encoded), mark)
+        # Values of another type are converted to the type of the mark,
+        # and compared as typed values, not lexically.
+        mark = provider.get_new_high_water_mark(
+            [pd.Series(['2018-01-02 9:30:00', '2018-01-02 11:00:00'])],
+            current=mark,
+        )
+        self.assertEqual(mark, pd.Timestamp('2018-01-02 11:00:00'))
+        mark = provider.get_new_high_water_mark(
+            [pd.Series([3, 12]), pd.Series([], dtype=object)],
+        )
+        self.assertEqual(mark, 12)
+        self.assertEqual(
+            provider.encode_high_water_mark(mark),
+            {'type': 'number', 'value': 12}
+        )
+        self.assertRaises(
+            MalformedDataSourceError,
+            provider.get_new_high_water_mark,
+            [pd.Series(['a'])],
+            current=pd.Timestamp('2018-01-02'),
+        )
+
 
 if __name__ == '__main__':
     TestDatabaseManager.setup_test_database()
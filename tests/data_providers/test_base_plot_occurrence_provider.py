@@ -13,6 +13,7 @@ from niamoto.data_providers.base_plot_occurrence_provider \
 from niamoto.db import metadata as niamoto_db_meta
 from niamoto.db.connector import Connector
 from niamoto.db.utils import fix_db_sequences
+from niamoto.exceptions import IncoherentDatabaseStateError
 from niamoto.testing.base_tests import BaseTestNiamotoSchemaCreated
 from niamoto.testing.test_data_provider import TestDataProvider
 from niamoto.testing.test_database_manager import TestDatabaseManager
@@ -92,6 +93,42 @@ class TestBasePlotOccurrenceProvider(BaseTestNiamotoSchemaCreated):
             [(1, 1), (1, 2), (2, 3), ],
         )
 
+    def test_get_niamoto_index_missing_references(self):
+        data_provider_1 = TestDataProvider('test_data_provider_1')
+        prov1 = BasePlotOccurrenceProvider(data_provider_1)
+        data = pd.DataFrame.from_records([
+            {
+                'plot_id': 1,
+                'occurrence_id': 1,
+                'occurrence_identifier': 'PLOT1_001',
+            },
+            {
+                'plot_id': 99,
+                'occurrence_id': 2,
+                'occurrence_identifier': 'PLOT1_002',
+            },
+        ], index=['plot_id', 'occurrence_id'])
+        with self.assertRaisesRegex(
+                IncoherentDatabaseStateError,
+                r'\[99\]'):
+            prov1.get_reindexed_provider_dataframe(data)
+        data = pd.DataFrame.from_records([
+            {
+                'plot_id': 1,
+                'occurrence_id': 98,
+                'occurrence_identifier': 'PLOT1_001',
+            },
+            {
+                'plot_id': 1,
+                'occurrence_id': 99,
+                'occurrence_identifier': 'PLOT1_002',
+            },
+        ], index=['plot_id', 'occurrence_id'])
+        with self.assertRaisesRegex(
+                IncoherentDatabaseStateError,
+                r'\[98, 99\]'):
+            prov1.get_reindexed_provider_dataframe(data)
+
     def test_get_insert_dataframe(self):
         data_provider_1 = TestDataProvider('test_data_provider_1')
         with Connector.get_connection() as connection:
@@ -356,9 +393,12 @@ class TestBasePlotOccurrenceProvider(BaseTestNiamotoSchemaCreated):
             self.assertEqual(len(i), 0)
             self.assertEqual(len(u), 5)
             self.assertEqual(len(d), 0)
+            df = prov.get_niamoto_plot_occurrence_dataframe(connection)
+            self.assertEqual(len(df), 5)
             self.assertEqual(
-                len(prov.get_niamoto_plot_occurrence_dataframe(connection)),
-                5
+                sorted(df['occurrence_identifier']),
+                ['PLOT1_000', 'PLOT1_001', 'PLOT2_002', 'PLOT2_003',
+                 'PLOT2_008'],
             )
 
     def test_sync_delete(self):
@@ -17,6 +17,12 @@ from shapely.geometry import (
     MultiPolygon
 )
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
 from niamoto.testing import set_test_path
 set_test_path()
 
@@ -26,6 +32,7 @@ from niamoto.db import metadata as meta
 from niamoto.data_providers.csv_provider.csv_data_provider import \
     CsvDataProvider
 from niamoto.data_publishers.base_data_publisher import BaseDataPublisher
+from niamoto.exceptions import IncompatibleSchemaError
 from niamoto.testing.test_database_manager import TestDatabaseManager
 from niamoto.testing.base_tests import BaseTestNiamotoSchemaCreated
 
@@ -63,6 +70,96 @@ class TestBaseDataPublisher(BaseTestNiamotoSchemaCreated):
         )
         temp_csv.close()
 
+    @unittest.skipIf(pa is None, "pyarrow is not installed")
+    def test_publish_columnar(self):
+        data = pd.DataFrame.from_records(
+            [[i, 'name_{}'.format(i % 3), i * 0.5] for i in range(10)],
+            columns=['a', 'full_name', 'b'],
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            parquet_path = os.path.join(tmp_dir, 'test.parquet')
+            BaseDataPublisher.publish(
+                data,
+                'parquet',
+                destination=parquet_path,
+                index_label='id',
+                row_group_size=4,
+                dictionary_columns='full_name',
+            )
+            parquet_file = pq.ParquetFile(parquet_path)
+            self.assertEqual(parquet_file.num_row_groups, 3)
+            table = parquet_file.read()
+            self.assertEqual(table.num_rows, 10)
+            self.assertIn('id', table.schema.names)
+            arrow_path = os.path.join(tmp_dir, 'test.arrow')
+            BaseDataPublisher.publish(
+                data,
+                'arrow',
+                destination=arrow_path,
+                row_group_size=4,
+                dictionary_columns=['full_name'],
+            )
+            reader = pa.ipc.open_file(arrow_path)
+            self.assertEqual(reader.num_record_batches, 3)
+            table = reader.read_all()
+            self.assertEqual(table.num_rows, 10)
+            self.assertTrue(pa.types.is_dictionary(
+                table.schema.field('full_name').type
+            ))
+
+    @unittest.skipIf(pa is None, "pyarrow is not installed")
+    def test_publish_columnar_streamed(self):
+        def chunks():
+            # 'a' is null in the first chunk, 'b' gets missing values
+            yield pd.DataFrame({'a': [None, None], 'b': [1, 2],
+                                'name': ['x', 'y']})
+            yield pd.DataFrame({'a': [0.5, 1.5], 'b': [3, None],
+                                'name': ['y', 'z']})
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            parquet_path = os.path.join(tmp_dir, 'test.parquet')
+            BaseDataPublisher.publish(
+                chunks(),
+                'parquet',
+                destination=parquet_path,
+                row_group_size=1,
+                dictionary_columns='name',
+            )
+            table = pq.read_table(parquet_path)
+            self.assertEqual(table.num_rows, 4)
+            self.assertTrue(pa.types.is_floating(
+                table.schema.field('a').type
+            ))
+            self.assertTrue(pa.types.is_integer(
+                table.schema.field('b').type
+            ))
+            self.assertEqual(
+                table.column('b').to_pylist(),
+                [1, 2, 3, None]
+            )
+            self.assertTrue(pa.types.is_dictionary(
+                table.schema.field('name').type
+            ))
+            # Streamed dictionary columns are not supported by arrow files
+            self.assertRaises(
+                ValueError,
+                BaseDataPublisher.publish,
+                chunks(),
+                'arrow',
+                destination=os.path.join(tmp_dir, 'test.arrow'),
+                dictionary_columns='name',
+            )
+
+            def incompatible_chunks():
+                yield pd.DataFrame({'a': [1, 2]})
+                yield pd.DataFrame({'a': ['x', 'y']})
+            self.assertRaises(
+                IncompatibleSchemaError,
+                BaseDataPublisher.publish,
+                incompatible_chunks(),
+                'arrow',
+                destination=os.path.join(tmp_dir, 'test.arrow'),
+            )
+
     def test_publish_to_postgis(self):
         CsvDataProvider.register_data_provider('csv_provider')
         csv_provider = CsvDataProvider(
@@ -209,6 +306,72 @@ class TestBaseDataPublisher(BaseTestNiamotoSchemaCreated):
                 if_exists='thisisnotallowed',
             )
 
+    def test_publish_sql_copy(self):
+        polygon = Polygon([(0, 0), (1, 0), (1, 1)])
+        df = gpd.GeoDataFrame(
+            [
+                {'id': 1, 'name': 'a', 'value': 1.5, 'geom': polygon},
+                {'id': 2, 'name': '', 'value': None, 'geom': polygon},
+                {'id': 3, 'name': None, 'value': 3.0, 'geom': polygon},
+            ],
+            geometry='geom',
+            crs={'init': 'epsg:4326'},
+        ).set_index('id')
+        for method in ['copy', 'insert']:
+            table_name = 'test_publish_{}'.format(method)
+            BaseDataPublisher._publish_sql(
+                df,
+                table_name,
+                schema='niamoto',
+                index_label='id',
+                method=method,
+            )
+        with Connector.get_connection() as connection:
+            sql = \
+                """
+                SELECT id, name, value, ST_AsText(geom) AS geom,
+                    ST_SRID(geom) AS srid
+                FROM niamoto.{}
+                ORDER BY id;
+                """
+            copied = pd.read_sql(sql.format('test_publish_copy'), connection)
+            inserted = pd.read_sql(
+                sql.format('test_publish_insert'),
+                connection
+            )
+        self.assertEqual(len(copied), 3)
+        self.assertTrue(copied.equals(inserted))
+        self.assertEqual(copied['name'].tolist(), ['a', '', None])
+        self.assertEqual(copied['srid'].tolist()[0], 4326)
+        # Append with COPY, chunk by chunk
+        BaseDataPublisher._publish_sql(
+            iter([df, df.set_index(df.index + 3)]),
+            'test_publish_copy',
+            schema='niamoto',
+            if_exists='replace',
+            index_label='id',
+        )
+        with Connector.get_connection() as connection:
+            count = connection.execute(
+                "SELECT COUNT(*) FROM niamoto.test_publish_copy"
+            ).scalar()
+        self.assertEqual(count, 6)
+        # Missing geometries are copied as NULL
+        BaseDataPublisher._publish_sql(
+            gpd.GeoDataFrame(
+                [{'A': 1, 'geom': polygon}, {'A': 2, 'geom': None}],
+                geometry='geom'
+            ),
+            'test_publish_copy',
+            schema='niamoto',
+            if_exists='replace',
+        )
+        with Connector.get_connection() as connection:
+            count = connection.execute(
+                "SELECT COUNT(*) FROM niamoto.test_publish_copy "
+                "WHERE geom IS NULL"
+            ).scalar()
+        self.assertEqual(count, 1)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,63 @@
+# coding: utf-8
+
+import unittest
+
+import geopandas as gpd
+from shapely.geometry import (
+    Point,
+    Polygon,
+    LineString,
+    MultiPolygon,
+    GeometryCollection,
+)
+
+from niamoto.testing import set_test_path
+set_test_path()
+
+from niamoto.data_publishers.utils.geo_pandas_sql import \
+    get_geometry_type_and_srid, get_srid
+from niamoto.testing.base_tests import BaseTest
+
+
+class TestGeoPandasSql(BaseTest):
+    """
+    Test case for the geometry type inference of GeoSQLTable.
+    """
+
+    def test_get_geometry_type_and_srid(self):
+        polygon = Polygon([(0, 0), (1, 0), (1, 1)])
+        linestring = LineString([(0, 0), (0, 1), (1, 1)])
+        multipolygon = MultiPolygon([polygon])
+        # Homogeneous layers, missing and empty geometries are ignored
+        cases = [
+            ([Point(0, 0), None, Point(1, 1)], 'POINT'),
+            ([linestring, linestring], 'LINESTRING'),
+            ([polygon, GeometryCollection(), polygon], 'POLYGON'),
+            ([multipolygon, None], 'MULTIPOLYGON'),
+            ([GeometryCollection([polygon])], 'GEOMETRYCOLLECTION'),
+            ([None, None], 'POINT'),
+            # Mixed layers
+            ([polygon, multipolygon], 'GEOMETRY'),
+            ([Point(0, 0), linestring, None], 'GEOMETRY'),
+        ]
+        for geometries, expected in cases:
+            geometry_type, srid = get_geometry_type_and_srid(
+                gpd.GeoSeries(geometries)
+            )
+            self.assertEqual(geometry_type, expected)
+            self.assertEqual(int(srid), -1)
+        geometry_type, srid = get_geometry_type_and_srid(gpd.GeoSeries(
+            [Point(0, 0), polygon],
+            crs={'init': 'epsg:4326'}
+        ))
+        self.assertEqual(geometry_type, 'GEOMETRY')
+        self.assertEqual(int(srid), 4326)
+
+    def test_get_srid(self):
+        self.assertEqual(int(get_srid({'init': 'epsg:3163'})), 3163)
+        self.assertEqual(int(get_srid('+init=epsg:4326 +no_defs')), 4326)
+        self.assertEqual(get_srid(None), -1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,6 +3,10 @@
 import unittest
 import os
 import logging
+import tempfile
+import types
+
+import pandas as pd
 
 from niamoto.testing import set_test_path
 set_test_path()
@@ -15,6 +19,7 @@ log.FILE_LOGGING_LEVEL = logging.DEBUG
 from niamoto.conf import settings, NIAMOTO_HOME
 from niamoto.data_publishers.occurrence_data_publisher import \
     OccurrenceDataPublisher, OccurrenceLocationPublisher
+from niamoto.exceptions import NoRecordFoundError
 from niamoto.testing.test_database_manager import TestDatabaseManager
 from niamoto.data_providers.csv_provider import CsvDataProvider
 from niamoto.testing.base_tests import BaseTestNiamotoSchemaCreated
@@ -48,6 +53,29 @@ class TestOccurrencesPublisher(BaseTestNiamotoSchemaCreated):
         self.assertIsNotNone(op.get_key())
         self.assertIsNotNone(op.get_publish_formats())
 
+    def test_occurrences_publisher_taxon_filter(self):
+        op = OccurrenceDataPublisher()
+        self.assertRaises(
+            NoRecordFoundError,
+            op.process,
+            taxon_id=1000,
+        )
+
+    def test_occurrences_publisher_streaming(self):
+        op = OccurrenceDataPublisher()
+        df = op.process()[0]
+        chunks, args, kwargs = op.process(chunksize=10)
+        self.assertIsInstance(chunks, types.GeneratorType)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            csv_path = os.path.join(tmp_dir, 'occurrences.csv')
+            op.publish(chunks, 'csv', destination=csv_path, **kwargs)
+            published = pd.read_csv(csv_path, index_col='id')
+        self.assertEqual(len(published), len(df))
+        self.assertEqual(
+            list(published.columns),
+            list(df.columns)
+        )
+
     def test_occurrence_locations_publisher(self):
         op = OccurrenceLocationPublisher()
         result = op.process()
@@ -0,0 +1,85 @@
+# coding: utf-8
+
+import unittest
+import os
+import logging
+
+from niamoto.testing import set_test_path
+set_test_path()
+
+from niamoto import log
+
+log.STREAM_LOGGING_LEVEL = logging.CRITICAL
+log.FILE_LOGGING_LEVEL = logging.DEBUG
+
+from niamoto.conf import settings, NIAMOTO_HOME
+from niamoto.data_publishers.occurrence_vector_publisher import \
+    OccurrenceVectorPublisher
+from niamoto.api import vector_api
+from niamoto.api import data_marts_api
+from niamoto.testing.test_database_manager import TestDatabaseManager
+from niamoto.data_providers.csv_provider import CsvDataProvider
+from niamoto.testing.base_tests import BaseTestNiamotoSchemaCreated
+
+
+TEST_OCCURRENCE_CSV = os.path.join(
+    NIAMOTO_HOME, 'data', 'csv', 'occurrences.csv',
+)
+
+SHP_TEST_1 = os.path.join(
+    NIAMOTO_HOME, 'data', 'vector', 'NCL_adm', 'NCL_adm1.shp'
+)
+SHP_TEST_2 = os.path.join(
+    NIAMOTO_HOME, 'data', 'vector', 'NCL_adm', 'NCL_adm2.shp'
+)
+
+
+class TestOccurrenceVectorPublisher(BaseTestNiamotoSchemaCreated):
+    """
+    Test for occurrence vector keys publisher.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestOccurrenceVectorPublisher, cls).setUpClass()
+        CsvDataProvider.register_data_provider('csv_provider')
+        csv_provider = CsvDataProvider(
+            'csv_provider',
+            occurrence_csv_path=TEST_OCCURRENCE_CSV,
+        )
+        csv_provider.sync()
+        vector_api.add_vector('ncl_adm1', SHP_TEST_1)
+        vector_api.add_vector('ncl_adm2', SHP_TEST_2)
+        data_marts_api.create_vector_dimension('ncl_adm1')
+        data_marts_api.create_vector_dimension('ncl_adm2')
+
+    def test_occurrence_vector_publisher(self):
+        publisher = OccurrenceVectorPublisher()
+        db_result = publisher.process(
+            'ncl_adm1,ncl_adm2',
+            method=OccurrenceVectorPublisher.DATABASE,
+            chunk_size=2,
+        )[0]
+        self.assertEqual(
+            list(db_result.columns),
+            ['ncl_adm1_id', 'ncl_adm2_id']
+        )
+        self.assertFalse(db_result.isnull().any().any())
+        local_result = publisher.process(
+            ['ncl_adm1', 'ncl_adm2'],
+            method=OccurrenceVectorPublisher.LOCAL,
+        )[0]
+        self.assertEqual(len(db_result), len(local_result))
+        self.assertTrue(
+            (db_result.sort_index() == local_result.sort_index()).all().all()
+        )
+
+
+if __name__ == '__main__':
+    TestDatabaseManager.setup_test_database()
+    TestDatabaseManager.create_schema(settings.NIAMOTO_SCHEMA)
+    TestDatabaseManager.create_schema(settings.NIAMOTO_RASTER_SCHEMA)
+    TestDatabaseManager.create_schema(settings.NIAMOTO_VECTOR_SCHEMA)
+    TestDatabaseManager.create_schema(settings.NIAMOTO_DIMENSIONS_SCHEMA)
+    unittest.main(exit=False)
+    TestDatabaseManager.teardown_test_database()
@@ -0,0 +1,98 @@
+# coding: utf-8
+
+import unittest
+import tempfile
+import shutil
+import os
+
+import pandas as pd
+
+from niamoto.testing import set_test_path
+set_test_path()
+
+from niamoto.conf import settings, NIAMOTO_HOME
+from niamoto.db.revision import DatabaseRevision
+from niamoto.data_providers.csv_provider.csv_data_provider import \
+    CsvDataProvider
+from niamoto.data_publishers import publisher_cache
+from niamoto.data_publishers.publisher_cache import PublisherCache
+from niamoto.data_publishers.occurrence_data_publisher import \
+    OccurrenceDataPublisher
+from niamoto.testing.test_database_manager import TestDatabaseManager
+from niamoto.testing.base_tests import BaseTestNiamotoSchemaCreated
+
+
+TEST_OCCURRENCE_CSV = os.path.join(
+    NIAMOTO_HOME, 'data', 'csv', 'occurrences.csv',
+)
+
+
+class TestPublisherCache(BaseTestNiamotoSchemaCreated):
+    """
+    Test for the publisher cache.
+    """
+
+    def setUp(self):
+        super(TestPublisherCache, self).setUp()
+        self.cache_dir = tempfile.mkdtemp()
+        publisher_cache.PUBLISHER_CACHE._cache_dir = self.cache_dir
+
+    def tearDown(self):
+        publisher_cache.PUBLISHER_CACHE._cache_dir = None
+        shutil.rmtree(self.cache_dir)
+        super(TestPublisherCache, self).tearDown()
+
+    def test_publisher_cache(self):
+        cache = PublisherCache(cache_dir=self.cache_dir)
+        key_1 = cache.make_key('test', [1], {'a': [1, 2], 'b': None})
+        key_2 = cache.make_key('test', [1], {'b': None, 'a': [1, 2]})
+        key_3 = cache.make_key('test', [2], {'a': [1, 2], 'b': None})
+        self.assertEqual(key_1, key_2)
+        self.assertNotEqual(key_1, key_3)
+        self.assertEqual(cache.get(key_1, "0"), (False, None))
+        df = pd.DataFrame({'a': [1, 2, 3]})
+        self.assertTrue(cache.set(key_1, "0", (df, [], {})))
+        found, result = cache.get(key_1, "0")
+        self.assertTrue(found)
+        self.assertTrue(result[0].equals(df))
+        # Entries of previous revisions are purged
+        cache.set(key_3, "1", (df, [], {}))
+        self.assertFalse(cache.get(key_1, "0")[0])
+        self.assertTrue(cache.get(key_3, "1")[0])
+        cache.clear()
+        self.assertFalse(cache.get(key_3, "1")[0])
+
+    def test_memoized_publisher(self):
+        revision = DatabaseRevision.get()
+        CsvDataProvider.register_data_provider('csv_provider')
+        csv_provider = CsvDataProvider(
+            'csv_provider',
+            occurrence_csv_path=TEST_OCCURRENCE_CSV,
+        )
+        publisher = OccurrenceDataPublisher()
+        # Memoization is disabled by default
+        publisher.process()
+        self.assertEqual(len(os.listdir(self.cache_dir)), 0)
+        df_1 = publisher.process(memoize=True)[0]
+        self.assertEqual(len(df_1), 0)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        df_2 = publisher.process(memoize=True)[0]
+        self.assertTrue(df_1.equals(df_2))
+        # Syncing bumps the revision and invalidates the cached result
+        csv_provider.sync()
+        self.assertGreater(DatabaseRevision.get(), revision)
+        df_3 = publisher.process(memoize=True)[0]
+        self.assertGreater(len(df_3), 0)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+        df_4 = publisher.process()[0]
+        self.assertEqual(len(df_3), len(df_4))
+        CsvDataProvider.unregister_data_provider('csv_provider')
+
+
+if __name__ == '__main__':
+    TestDatabaseManager.setup_test_database()
+    TestDatabaseManager.create_schema(settings.NIAMOTO_SCHEMA)
+    TestDatabaseManager.create_schema(settings.NIAMOTO_RASTER_SCHEMA)
+    TestDatabaseManager.create_schema(settings.NIAMOTO_VECTOR_SCHEMA)
+    unittest.main(exit=False)
+    TestDatabaseManager.teardown_test_database()
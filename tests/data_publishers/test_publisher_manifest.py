@@ -0,0 +1,75 @@
+# coding: utf-8
+
+import unittest
+import os
+import json
+
+from niamoto.testing import set_test_path
+set_test_path()
+
+from niamoto.conf import settings, NIAMOTO_HOME
+from niamoto import data_publishers
+from niamoto.data_publishers import publisher_manifest
+from niamoto.testing.test_database_manager import TestDatabaseManager
+from niamoto.testing.base_tests import BaseTest
+
+
+TEST_R_SCRIPT = os.path.join(
+    NIAMOTO_HOME, 'R', 'r_script.R',
+)
+
+
+class TestPublisherManifest(BaseTest):
+    """
+    Test case for the publisher manifest.
+    """
+
+    def test_build_manifest(self):
+        manifest = publisher_manifest.get_manifest(rebuild=True)
+        self.assertTrue(
+            os.path.exists(publisher_manifest.get_manifest_path())
+        )
+        publishers = manifest['publishers']
+        self.assertEqual(
+            publishers['occurrences']['source'],
+            [
+                data_publishers.MODULE,
+                'niamoto.data_publishers.occurrence_data_publisher'
+            ]
+        )
+        self.assertEqual(
+            publishers['R_r_script']['source'],
+            [data_publishers.R_SCRIPT, 'r_script.R']
+        )
+        self.assertEqual(
+            publishers['test']['source'],
+            [data_publishers.PYTHON_SCRIPT, 'test.py']
+        )
+        params = {
+            p['name']: p for p in publishers['occurrences']['parameters']
+        }
+        self.assertEqual(params['properties']['kind'], 'option')
+        self.assertEqual(params['drop_null_properties']['type'], 'bool')
+        self.assertIn('csv', manifest['publish_formats'])
+        # The manifest is serializable and read from its cache file
+        with open(publisher_manifest.get_manifest_path(), 'r') as f:
+            self.assertEqual(json.load(f), manifest)
+
+    def test_manifest_invalidation(self):
+        manifest = publisher_manifest.get_manifest()
+        self.assertIs(publisher_manifest.get_manifest(), manifest)
+        mtime = os.path.getmtime(TEST_R_SCRIPT)
+        os.utime(TEST_R_SCRIPT, (mtime, mtime + 1))
+        try:
+            self.assertIsNot(publisher_manifest.get_manifest(), manifest)
+        finally:
+            os.utime(TEST_R_SCRIPT, (mtime, mtime))
+
+
+if __name__ == '__main__':
+    TestDatabaseManager.setup_test_database()
+    TestDatabaseManager.create_schema(settings.NIAMOTO_SCHEMA)
+    TestDatabaseManager.create_schema(settings.NIAMOTO_RASTER_SCHEMA)
+    TestDatabaseManager.create_schema(settings.NIAMOTO_VECTOR_SCHEMA)
+    unittest.main(exit=False)
+    TestDatabaseManager.teardown_test_database()
@@ -2,6 +2,7 @@
 
 import unittest
 import os
+import tempfile
 import logging
 
 import pandas as pd
@@ -16,6 +17,7 @@ log.FILE_LOGGING_LEVEL = logging.DEBUG
 
 from niamoto.conf import settings, NIAMOTO_HOME
 from niamoto.data_publishers.r_data_publisher import RDataPublisher
+from niamoto.data_publishers.r_worker_pool import RWorkerPool
 from niamoto.testing.test_database_manager import TestDatabaseManager
 from niamoto.data_providers.csv_provider import CsvDataProvider
 from niamoto.raster.raster_manager import RasterManager
@@ -54,6 +56,7 @@ class TestRDataPublisher(BaseTestNiamotoSchemaCreated):
     def test_r_data_publisher(self):
         #  Test with empty dataframes
         r_data_publisher = RDataPublisher(TEST_R_SCRIPT)
+        self.assertEqual(r_data_publisher.exchange, RDataPublisher.RPY2)
         result = r_data_publisher._process()[0]
         self.assertIsInstance(result, pd.DataFrame)
         #  Add data
@@ -69,6 +72,72 @@ class TestRDataPublisher(BaseTestNiamotoSchemaCreated):
         result = r_data_publisher._process()[0]
         self.assertIsInstance(result, pd.DataFrame)
 
+    @unittest.skipIf(
+        not RDataPublisher.is_arrow_available(),
+        "pyarrow or the R arrow package is not available."
+    )
+    def test_r_data_publisher_arrow(self):
+        r_data_publisher = RDataPublisher(
+            TEST_R_SCRIPT,
+            exchange=RDataPublisher.ARROW
+        )
+        result = r_data_publisher._process()[0]
+        self.assertIsInstance(result, pd.DataFrame)
+        CsvDataProvider.register_data_provider('csv_provider')
+        csv_provider = CsvDataProvider(
+            'csv_provider',
+            occurrence_csv_path=TEST_OCCURRENCE_CSV,
+            plot_csv_path=TEST_PLOT_CSV,
+            plot_occurrence_csv_path=TEST_PLOTS_OCCURRENCES_CSV
+        )
+        csv_provider.sync()
+        RasterManager.add_raster('test_raster', TEST_RASTER)
+        result = r_data_publisher._process()[0]
+        self.assertIsInstance(result, pd.DataFrame)
+        self.assertGreater(len(result), 0)
+        for dtype in result.dtypes:
+            self.assertNotEqual(str(dtype), 'int32')
+
+    def test_script_exchange(self):
+        self.assertEqual(
+            RDataPublisher.get_script_exchange(TEST_R_SCRIPT),
+            RDataPublisher.RPY2
+        )
+        fd, path = tempfile.mkstemp(suffix='.R')
+        with os.fdopen(fd, 'w') as f:
+            f.write("# A script\n# niamoto: exchange=arrow\n\n")
+            f.write("process <- function() {}\n")
+        try:
+            self.assertEqual(
+                RDataPublisher.get_script_exchange(path),
+                RDataPublisher.ARROW
+            )
+        finally:
+            os.remove(path)
+
+    def test_script_environment(self):
+        env_1 = RDataPublisher.get_script_environment(
+            TEST_R_SCRIPT,
+            RDataPublisher.RPY2
+        )
+        env_2 = RDataPublisher.get_script_environment(
+            TEST_R_SCRIPT,
+            RDataPublisher.RPY2
+        )
+        self.assertIs(env_1, env_2)
+
+    def test_r_worker_pool(self):
+        with RWorkerPool(processes=2) as pool:
+            results = pool.process_many(
+                [TEST_R_SCRIPT, TEST_R_SCRIPT],
+                exchange=RDataPublisher.RPY2
+            )
+            self.assertEqual(len(results), 2)
+            for result in results:
+                self.assertIsInstance(result[0], pd.DataFrame)
+            result = pool.process(TEST_R_SCRIPT, exchange=RDataPublisher.RPY2)
+            self.assertIsInstance(result[0], pd.DataFrame)
+
 
 if __name__ == '__main__':
     TestDatabaseManager.setup_test_database()
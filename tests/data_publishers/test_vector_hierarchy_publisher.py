@@ -0,0 +1,91 @@
+# coding: utf-8
+
+import unittest
+import os
+import logging
+
+import pandas as pd
+
+from niamoto.testing import set_test_path
+set_test_path()
+
+from niamoto import log
+
+log.STREAM_LOGGING_LEVEL = logging.CRITICAL
+log.FILE_LOGGING_LEVEL = logging.DEBUG
+
+from niamoto.conf import settings, NIAMOTO_HOME
+from niamoto.api import vector_api
+from niamoto.api import data_marts_api
+from niamoto.testing.test_database_manager import TestDatabaseManager
+from niamoto.data_publishers.vector_hierarchy_publisher import \
+    VectorHierarchyPublisher
+from niamoto.testing.base_tests import BaseTestNiamotoSchemaCreated
+
+
+SHP_TEST_0 = os.path.join(
+    NIAMOTO_HOME, 'data', 'vector', 'NCL_adm', 'NCL_adm0.shp'
+)
+SHP_TEST_1 = os.path.join(
+    NIAMOTO_HOME, 'data', 'vector', 'NCL_adm', 'NCL_adm1.shp'
+)
+SHP_TEST_2 = os.path.join(
+    NIAMOTO_HOME, 'data', 'vector', 'NCL_adm', 'NCL_adm2.shp'
+)
+
+
+class TestVectorHierarchyPublisher(BaseTestNiamotoSchemaCreated):
+    """
+    Test for vector hierarchy publisher.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestVectorHierarchyPublisher, cls).setUpClass()
+        vector_api.add_vector('ncl_adm0', SHP_TEST_0)
+        vector_api.add_vector('ncl_adm1', SHP_TEST_1)
+        vector_api.add_vector('ncl_adm2', SHP_TEST_2)
+        data_marts_api.create_vector_dimension('ncl_adm0')
+        data_marts_api.create_vector_dimension('ncl_adm1')
+        data_marts_api.create_vector_dimension('ncl_adm2')
+
+    def test_vector_hierarchy_publisher(self):
+        levels = ['ncl_adm0', 'ncl_adm1', 'ncl_adm2']
+        publisher = VectorHierarchyPublisher()
+        data = publisher.process(levels)[0]
+        self.assertIsInstance(data, pd.DataFrame)
+        self.assertEqual(
+            list(data.columns),
+            ['ncl_adm0_id', 'ncl_adm1_id', 'ncl_adm2_id']
+        )
+        self.assertGreater(len(data), 0)
+        # The level list must not be consumed
+        self.assertEqual(len(levels), 3)
+        # Each commune belongs to a single province
+        self.assertFalse(data['ncl_adm2_id'].duplicated().any())
+        parallel = publisher.process(levels, max_workers=2)[0]
+        self.assertEqual(len(parallel), len(data))
+
+    def test_vector_hierarchy_publisher_point_on_surface(self):
+        publisher = VectorHierarchyPublisher()
+        data = publisher.process(
+            ['ncl_adm0', 'ncl_adm1'],
+            representative=VectorHierarchyPublisher.POINT_ON_SURFACE,
+        )[0]
+        self.assertGreater(len(data), 0)
+        self.assertRaises(
+            ValueError,
+            publisher.process,
+            ['ncl_adm0', 'ncl_adm1'],
+            representative='unknown',
+        )
+
+
+if __name__ == '__main__':
+    TestDatabaseManager.setup_test_database()
+    TestDatabaseManager.create_schema(settings.NIAMOTO_SCHEMA)
+    TestDatabaseManager.create_schema(settings.NIAMOTO_RASTER_SCHEMA)
+    TestDatabaseManager.create_schema(settings.NIAMOTO_VECTOR_SCHEMA)
+    TestDatabaseManager.create_schema(settings.NIAMOTO_DIMENSIONS_SCHEMA)
+    unittest.main(exit=False)
+    TestDatabaseManager.teardown_test_database()
@@ -0,0 +1,166 @@
+# coding: utf-8
+
+import unittest
+
+import pandas as pd
+
+from niamoto.testing import set_test_path
+set_test_path()
+
+from niamoto.conf import settings
+from niamoto.db import metadata as niamoto_db_meta
+from niamoto.db.connector import Connector
+from niamoto.db.property_catalog import PropertyCatalog
+from niamoto.db.utils import fix_db_sequences
+from niamoto.exceptions import NoRecordFoundError, RecordAlreadyExistsError
+from niamoto.data_publishers.occurrence_data_publisher import \
+    OccurrenceDataPublisher
+from niamoto.data_publishers.base_fact_table_publisher import \
+    BaseFactTablePublisher
+from niamoto.testing.base_tests import BaseTestNiamotoSchemaCreated
+from niamoto.testing.test_data_provider import TestDataProvider
+from niamoto.testing.test_database_manager import TestDatabaseManager
+from niamoto.testing import test_data
+
+
+class TestPropertyCatalog(BaseTestNiamotoSchemaCreated):
+    """
+    Test case for the property key catalog.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super(TestPropertyCatalog, cls).setUpClass()
+        data_provider_1 = TestDataProvider.register_data_provider(
+            'test_data_provider_1',
+        )
+        data_provider_2 = TestDataProvider.register_data_provider(
+            'test_data_provider_2',
+        )
+        occ_1 = test_data.get_occurrence_data_1(data_provider_1)
+        occ_2 = test_data.get_occurrence_data_2(data_provider_2)
+        for i, occ in enumerate(occ_1):
+            occ['properties'] = {
+                'dbh': i * 10,
+                'height': i * 1.5,
+                'status': 'alive',
+            }
+        occ_1[0]['properties']['status'] = None
+        for occ in occ_2:
+            occ['properties'] = {'dbh': 'unknown'}
+        ins = niamoto_db_meta.occurrence.insert().values(occ_1 + occ_2)
+        with Connector.get_connection() as connection:
+            connection.execute(ins)
+        fix_db_sequences()
+        cls.provider_1_id = data_provider_1.db_id
+
+    def test_get_key_types(self):
+        # The catalog is built when it has never been populated
+        key_types = PropertyCatalog.get_key_types(PropertyCatalog.OCCURRENCE)
+        self.assertEqual(
+            list(key_types.keys()),
+            ['dbh', 'height', 'status']
+        )
+        self.assertEqual(key_types['dbh'], PropertyCatalog.MIXED_TYPE)
+        self.assertEqual(key_types['status'], 'string')
+        key_types = PropertyCatalog.get_key_types(
+            PropertyCatalog.OCCURRENCE,
+            provider_id=self.provider_1_id,
+        )
+        self.assertEqual(key_types['dbh'], 'number')
+        self.assertEqual(
+            PropertyCatalog.get_keys(PropertyCatalog.PLOT),
+            []
+        )
+
+    def test_refresh(self):
+        PropertyCatalog.refresh(PropertyCatalog.OCCURRENCE)
+        catalog = PropertyCatalog.get_catalog(PropertyCatalog.OCCURRENCE)
+        self.assertEqual(len(catalog), 4)
+        status = catalog[catalog['key'] == 'status'].iloc[0]
+        # One of the four occurrences of provider 1 has a null status
+        self.assertEqual(status['value_count'], 3)
+        PropertyCatalog.refresh(
+            PropertyCatalog.OCCURRENCE,
+            provider_id=self.provider_1_id,
+            keys=['status'],
+        )
+        catalog = PropertyCatalog.get_catalog(PropertyCatalog.OCCURRENCE)
+        self.assertEqual(len(catalog), 4)
+
+    def test_typed_occurrence_publisher(self):
+        publisher = OccurrenceDataPublisher()
+        df = publisher.process(properties='height,status')[0]
+        self.assertEqual(df['height'].dtype, pd.np.float64)
+        df = publisher.process(
+            properties='height,status',
+            drop_null_properties=True,
+        )[0]
+        self.assertEqual(len(df), 3)
+        df = publisher.process(
+            properties='height,status',
+            where="height > 2",
+        )[0]
+        self.assertEqual(len(df), 2)
+
+    def test_promote(self):
+        index_name = PropertyCatalog.promote(
+            PropertyCatalog.OCCURRENCE,
+            'height'
+        )
+        promoted = PropertyCatalog.get_promoted_properties(
+            PropertyCatalog.OCCURRENCE
+        )
+        self.assertEqual(len(promoted), 1)
+        self.assertEqual(promoted.iloc[0]['value_type'], 'number')
+        with Connector.get_connection() as connection:
+            indexes = [r[0] for r in connection.execute(
+                "SELECT indexname FROM pg_indexes WHERE schemaname = '{}';"
+                .format(settings.NIAMOTO_SCHEMA)
+            ).fetchall()]
+        self.assertIn(index_name, indexes)
+        self.assertRaises(
+            RecordAlreadyExistsError,
+            PropertyCatalog.promote,
+            PropertyCatalog.OCCURRENCE,
+            'height'
+        )
+        self.assertRaises(
+            ValueError,
+            PropertyCatalog.promote,
+            PropertyCatalog.OCCURRENCE,
+            'dbh'
+        )
+        df = OccurrenceDataPublisher().process(
+            properties='height',
+            where="height > 2",
+        )[0]
+        self.assertEqual(len(df), 2)
+        # Fact-table publishers use the typed (promoted) expressions
+        sel = BaseFactTablePublisher.get_properties_select(
+            PropertyCatalog.OCCURRENCE,
+            ['height'],
+        )
+        with Connector.get_connection() as connection:
+            df = pd.read_sql(sel, connection, index_col='id')
+        self.assertEqual(list(df.columns), ['height'])
+        PropertyCatalog.demote(PropertyCatalog.OCCURRENCE, 'height')
+        self.assertEqual(
+            len(PropertyCatalog.get_promoted_properties()),
+            0
+        )
+        self.assertRaises(
+            NoRecordFoundError,
+            PropertyCatalog.demote,
+            PropertyCatalog.OCCURRENCE,
+            'height'
+        )
+
+
+if __name__ == '__main__':
+    TestDatabaseManager.setup_test_database()
+    TestDatabaseManager.create_schema(settings.NIAMOTO_SCHEMA)
+    TestDatabaseManager.create_schema(settings.NIAMOTO_RASTER_SCHEMA)
+    TestDatabaseManager.create_schema(settings.NIAMOTO_VECTOR_SCHEMA)
+    unittest.main(exit=False)
+    TestDatabaseManager.teardown_test_database()
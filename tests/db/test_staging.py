@@ -0,0 +1,108 @@
+# coding: utf-8
+
+import unittest
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.exc import ProgrammingError
+
+from niamoto.testing import set_test_path
+set_test_path()
+
+from niamoto.conf import settings
+from niamoto.db.connector import Connector
+from niamoto.db.staging import StagingTable
+from niamoto.testing.base_tests import BaseTestNiamotoSchemaCreated
+from niamoto.testing.test_database_manager import TestDatabaseManager
+
+
+class TestStagingTable(BaseTestNiamotoSchemaCreated):
+    """
+    Test case for the staging tables.
+    """
+
+    COLUMNS = [
+        ('id', 'integer'),
+        ('taxon_id', 'integer'),
+        ('properties', 'jsonb'),
+    ]
+
+    def test_copy_from(self):
+        df = pd.DataFrame({
+            'id': [1, 2, 3],
+            'taxon_id': [10, np.nan, 30],
+            'properties': ['{"a": 1}', '{}', None],
+            'ignored': ['a', 'b', 'c'],
+        })
+        with Connector.get_connection() as connection:
+            with StagingTable(connection, self.COLUMNS) as staging:
+                self.assertEqual(staging.copy_from(df), 3)
+                rows = connection.execute(
+                    "SELECT id, taxon_id, properties FROM {} "
+                    "ORDER BY id;".format(staging.name)
+                ).fetchall()
+                self.assertEqual(
+                    [tuple(r) for r in rows],
+                    [(1, 10, {'a': 1}), (2, None, {}), (3, None, None)]
+                )
+            # The table is dropped at the end of the transaction
+            exists = connection.execute(
+                "SELECT to_regclass('pg_temp.{}');".format(staging.name)
+            ).scalar()
+            self.assertIsNone(exists)
+
+    def test_concurrent_sessions(self):
+        df = pd.DataFrame({
+            'id': [1],
+            'taxon_id': [10],
+            'properties': ['{}'],
+        })
+        with Connector.get_connection() as connection_1, \
+                Connector.get_connection() as connection_2:
+            with StagingTable(connection_1, self.COLUMNS) as staging_1, \
+                    StagingTable(connection_2, self.COLUMNS) as staging_2:
+                self.assertNotEqual(staging_1.name, staging_2.name)
+                staging_1.copy_from(df)
+                # The staging table of the first session only exists in the
+                # temporary schema of this session
+                sql_temp_schema = "SELECT nspname FROM pg_namespace " \
+                                  "WHERE oid = pg_my_temp_schema();"
+                temp_schema_1 = connection_1.execute(sql_temp_schema).scalar()
+                temp_schema_2 = connection_2.execute(sql_temp_schema).scalar()
+                self.assertNotEqual(temp_schema_1, temp_schema_2)
+                schemas = connection_2.execute(
+                    """
+                    SELECT n.nspname
+                    FROM pg_class AS c
+                    JOIN pg_namespace AS n ON n.oid = c.relnamespace
+                    WHERE c.relname = %(name)s;
+                    """,
+                    {'name': staging_1.name}
+                ).fetchall()
+                self.assertEqual([r[0] for r in schemas], [temp_schema_1])
+                # And it can not be queried from the second session
+                savepoint = connection_2.begin_nested()
+                self.assertRaises(
+                    ProgrammingError,
+                    connection_2.execute,
+                    "SELECT COUNT(*) FROM {};".format(staging_1.name)
+                )
+                savepoint.rollback()
+                count = connection_2.execute(
+                    "SELECT COUNT(*) FROM {};".format(staging_2.name)
+                ).scalar()
+                self.assertEqual(count, 0)
+
+    def test_create_outside_transaction(self):
+        with Connector.get_connection() as connection:
+            staging = StagingTable(connection, self.COLUMNS)
+            self.assertRaises(ValueError, staging.create)
+
+
+if __name__ == '__main__':
+    TestDatabaseManager.setup_test_database()
+    TestDatabaseManager.create_schema(settings.NIAMOTO_SCHEMA)
+    TestDatabaseManager.create_schema(settings.NIAMOTO_RASTER_SCHEMA)
+    TestDatabaseManager.create_schema(settings.NIAMOTO_VECTOR_SCHEMA)
+    unittest.main(exit=False)
+    TestDatabaseManager.teardown_test_database()
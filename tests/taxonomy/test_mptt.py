@@ -14,6 +14,8 @@ from niamoto.db import metadata as niamoto_db_meta
 from niamoto.testing.test_database_manager import TestDatabaseManager
 from niamoto.testing.base_tests import BaseTestNiamotoSchemaCreated
 from niamoto.testing.mptt import make_taxon_tree
+from niamoto.testing.test_data_provider import TestDataProvider
+from niamoto.exceptions import NoRecordFoundError
 
 
 class TestMPTT(BaseTestNiamotoSchemaCreated):
@@ -90,6 +92,65 @@ class TestMPTT(BaseTestNiamotoSchemaCreated):
             [None, 1, 1, 3, 1, 5, None, 7, None, 9, None, 11, None, 13,
              13, 15, 15, 15, 13, 19, 19, 21, 19, 23]
         )
+    def test_subtree_queries(self):
+        tree = [
+            [1, [1, ]],
+            [1, ]
+        ]
+        data, last_id = make_taxon_tree(tree)
+        ins = niamoto_db_meta.taxon.insert().values(data)
+        with Connector.get_connection() as connection:
+            connection.execute(ins)
+        TaxonomyManager.make_mptt()
+        descendants = TaxonomyManager.get_descendants(1)
+        self.assertEqual(list(descendants.index), [2, 3, 4])
+        descendants = TaxonomyManager.get_descendants(3, include_self=True)
+        self.assertEqual(list(descendants.index), [3, 4])
+        self.assertEqual(len(TaxonomyManager.get_descendants(6)), 0)
+        ancestors = TaxonomyManager.get_ancestors(4)
+        self.assertEqual(list(ancestors.index), [1, 3])
+        ancestors = TaxonomyManager.get_ancestors(6, include_self=True)
+        self.assertEqual(list(ancestors.index), [5, 6])
+        self.assertRaises(
+            NoRecordFoundError,
+            TaxonomyManager.get_descendants,
+            100
+        )
+        # Occurrences
+        data_provider = TestDataProvider.register_data_provider(
+            'test_data_provider_1'
+        )
+        occurrences = [
+            {
+                'id': i,
+                'provider_id': data_provider.db_id,
+                'provider_pk': i,
+                'taxon_id': taxon_id,
+                'location': 'SRID=4326;POINT(166.551 -22.098)',
+                'properties': {},
+            } for i, taxon_id in enumerate([2, 4, 4, 6, None])
+        ]
+        with Connector.get_connection() as connection:
+            connection.execute(
+                niamoto_db_meta.occurrence.insert().values(occurrences)
+            )
+        try:
+            subtree = TaxonomyManager.get_subtree_occurrences(3)
+            self.assertEqual(set(subtree.index), {1, 2})
+            subtree = TaxonomyManager.get_subtree_occurrences(1)
+            self.assertEqual(set(subtree.index), {0, 1, 2})
+            counts = TaxonomyManager.get_subtree_occurrence_counts()
+            self.assertEqual(
+                counts.to_dict(),
+                {1: 3, 2: 1, 3: 2, 4: 2, 5: 1, 6: 1}
+            )
+            counts = TaxonomyManager.get_subtree_occurrence_counts([3, 5])
+            self.assertEqual(counts.to_dict(), {3: 2, 5: 1})
+        finally:
+            with Connector.get_connection() as connection:
+                connection.execute(niamoto_db_meta.occurrence.delete())
+            TestDataProvider.unregister_data_provider('test_data_provider_1')
+
 
 if __name__ == '__main__':
     TestDatabaseManager.setup_test_database()
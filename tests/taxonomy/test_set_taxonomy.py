@@ -9,6 +9,8 @@ set_test_path()
 
 from niamoto.taxonomy.taxonomy_manager import TaxonomyManager
 from niamoto.db import metadata as niamoto_db_meta
+from niamoto.db.connector import Connector
+from niamoto.db.revision import DatabaseRevision
 from niamoto.conf import settings
 from niamoto.exceptions import MalformedDataSourceError
 from niamoto.testing.test_database_manager import TestDatabaseManager
@@ -107,6 +109,68 @@ class TestSetTaxonomy(BaseTestNiamotoSchemaCreated):
         taxref_synonyms = TaxonomyManager.get_synonyms_for_key('taxref')
         self.assertEqual(len(taxref_synonyms), 3)
 
+    def test_set_taxonomy_differential(self):
+        records = [
+            (0, 'Family One', 'FAMILIA', None, 1),
+            (1, 'Genus One', 'GENUS', 0, 2),
+            (2, 'Family Two', 'FAMILIA', None, 3),
+            (3, 'Genus Two', 'GENUS', 2, 4),
+        ]
+        columns = ['id', 'full_name', 'rank', 'parent_id', 'gbif']
+
+        def make_dataframe(records):
+            df = pd.DataFrame.from_records(
+                records,
+                columns=columns,
+                index='id'
+            )
+            df['rank_name'] = df['full_name']
+            return df
+
+        def get_row_versions():
+            with Connector.get_connection() as connection:
+                return dict(connection.execute(
+                    "SELECT id, xmin::text FROM {}.taxon;".format(
+                        settings.NIAMOTO_SCHEMA
+                    )
+                ).fetchall())
+
+        result, synonyms = TaxonomyManager.set_taxonomy(
+            make_dataframe(records)
+        )
+        self.assertEqual(result, 4)
+        versions = get_row_versions()
+        revision = DatabaseRevision.get_tag()
+        # Same taxonomy: nothing is touched, the revisions are kept
+        result, synonyms = TaxonomyManager.set_taxonomy(
+            make_dataframe(records)
+        )
+        self.assertEqual(result, 0)
+        self.assertEqual(get_row_versions(), versions)
+        self.assertEqual(DatabaseRevision.get_tag(), revision)
+        # Insert a taxon in the second tree, remove one from the first
+        # tree and change a synonym
+        records = [
+            (0, 'Family One', 'FAMILIA', None, 10),
+            (2, 'Family Two', 'FAMILIA', None, 3),
+            (3, 'Genus Two', 'GENUS', 2, 4),
+            (4, 'Genus Three', 'GENUS', 2, 5),
+        ]
+        result, synonyms = TaxonomyManager.set_taxonomy(
+            make_dataframe(records)
+        )
+        self.assertNotEqual(DatabaseRevision.get_tag(), revision)
+        df = TaxonomyManager.get_raw_taxon_dataframe()
+        self.assertEqual(set(df.index), {0, 2, 3, 4})
+        self.assertEqual(df.loc[0]['synonyms'], {'gbif': 10})
+        # The MPTT of the modified trees is rebuilt
+        self.assertEqual(df.loc[0]['mptt_right'], 2)
+        self.assertEqual(df.loc[2]['mptt_right'], 6)
+        self.assertEqual(df.loc[4]['mptt_tree_id'], 2)
+        self.assertEqual(df.loc[4]['mptt_depth'], 1)
+        gbif_synonyms = TaxonomyManager.get_synonyms_for_key("gbif")
+        self.assertEqual(gbif_synonyms.loc[10], 0)
+
 
 if __name__ == '__main__':
     TestDatabaseManager.setup_test_database()
@@ -0,0 +1,80 @@
+# coding: utf-8
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from niamoto.testing import set_test_path
+set_test_path()
+
+from niamoto.conf import settings
+from niamoto.taxonomy.synonym_map import SynonymMap
+from niamoto.testing.test_database_manager import TestDatabaseManager
+from niamoto.testing.base_tests import BaseTest
+
+
+class TestSynonymMap(BaseTest):
+    """
+    Test case for the synonym map.
+    """
+
+    def test_map(self):
+        synonym_map = SynonymMap([30, 10, 20], [3, 1, 2])
+        self.assertEqual(len(synonym_map), 3)
+        self.assertEqual(list(synonym_map.keys), [10, 20, 30])
+        self.assertEqual(list(synonym_map.values), [1, 2, 3])
+        result = synonym_map.map(np.array([20, 40, 10, 30]))
+        np.testing.assert_array_equal(result, [2, np.nan, 1, 3])
+        # Floats with missing values
+        result = synonym_map.map(np.array([10., np.nan, 30., 10.5]))
+        np.testing.assert_array_equal(result, [1, np.nan, 3, np.nan])
+        # Objects with None
+        result = synonym_map.map(np.array([None, 20, 50], dtype=object))
+        np.testing.assert_array_equal(result, [np.nan, 2, np.nan])
+
+    def test_non_integer_ids(self):
+        # Non integer synonyms are ignored, as Series.map would not match
+        # them with integer ids
+        synonym_map = SynonymMap(
+            np.array(['10', 'abc', None, 12.5, '30'], dtype=object),
+            [1, 2, 3, 4, 5]
+        )
+        self.assertEqual(list(synonym_map.keys), [10, 30])
+        self.assertEqual(list(synonym_map.values), [1, 5])
+        # Unparsable lookups are misses
+        result = synonym_map.map(
+            np.array(['abc', '10', 30, np.inf], dtype=object)
+        )
+        np.testing.assert_array_equal(result, [np.nan, 1, 5, np.nan])
+
+    def test_map_empty(self):
+        synonym_map = SynonymMap([], [])
+        self.assertEqual(len(synonym_map), 0)
+        result = synonym_map.map([1, 2])
+        self.assertTrue(np.isnan(result).all())
+        synonym_map = SynonymMap([1], [1])
+        self.assertEqual(len(synonym_map.map([])), 0)
+
+    def test_map_series(self):
+        synonyms = pd.Series(
+            [1, 2, None],
+            index=pd.Index([10, 20, 30], name='provider_taxon_id')
+        )
+        synonym_map = SynonymMap.from_series(synonyms)
+        self.assertEqual(len(synonym_map), 2)
+        ids = pd.Series([10, 30, 20], index=['a', 'b', 'c'])
+        expected = ids.map(synonyms[synonyms.notnull()])
+        pd.testing.assert_series_equal(
+            synonym_map.map_series(ids),
+            expected.astype(np.float64),
+        )
+
+
+if __name__ == '__main__':
+    TestDatabaseManager.setup_test_database()
+    TestDatabaseManager.create_schema(settings.NIAMOTO_SCHEMA)
+    TestDatabaseManager.create_schema(settings.NIAMOTO_RASTER_SCHEMA)
+    TestDatabaseManager.create_schema(settings.NIAMOTO_VECTOR_SCHEMA)
+    unittest.main(exit=False)
+    TestDatabaseManager.teardown_test_database()
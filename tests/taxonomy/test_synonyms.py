@@ -2,6 +2,8 @@
 
 import unittest
 
+import pandas as pd
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 
 from niamoto.testing import set_test_path
@@ -179,6 +181,199 @@ class TestSynonymsTaxon(BaseTestNiamotoSchemaCreated):
         self.assertEqual(synonyms.loc[10], 0)
         self.assertEqual(synonyms.loc[20], 1)
 
+    def test_get_synonym_map(self):
+        synonym_key = "synonym_key_1"
+        TaxonomyManager.register_synonym_key(synonym_key)
+        data = [
+            {
+                'id': 0,
+                'full_name': 'Family One',
+                'rank_name': 'One',
+                'rank': niamoto_db_meta.TaxonRankEnum.FAMILIA,
+                'parent_id': None,
+                'synonyms': {},
+                'mptt_left': 0,
+                'mptt_right': 0,
+                'mptt_tree_id': 0,
+                'mptt_depth': 0,
+            },
+        ]
+        with Connector.get_connection() as connection:
+            connection.execute(niamoto_db_meta.taxon.insert().values(data))
+        TaxonomyManager.add_synonym_for_single_taxon(0, synonym_key, 10)
+        synonym_map = TaxonomyManager.get_synonym_map(synonym_key)
+        self.assertEqual(list(synonym_map.map([10, 20])[:1]), [0])
+        # Cached until the taxonomy revision changes
+        self.assertIs(
+            TaxonomyManager.get_synonym_map(synonym_key),
+            synonym_map
+        )
+        TaxonomyManager.add_synonym_for_single_taxon(0, synonym_key, 20)
+        synonym_map = TaxonomyManager.get_synonym_map(synonym_key)
+        self.assertEqual(list(synonym_map.map([20])), [0])
+        identity = TaxonomyManager.get_synonym_map(
+            TaxonomyManager.IDENTITY_SYNONYM_KEY
+        )
+        self.assertEqual(list(identity.map([0])), [0])
+
+    def test_set_synonym_data(self):
+        synonym_key = "synonym_key_1"
+        TaxonomyManager.register_synonym_key(synonym_key)
+        data = [
+            {
+                'id': i,
+                'full_name': 'Family {}'.format(i),
+                'rank_name': str(i),
+                'rank': niamoto_db_meta.TaxonRankEnum.FAMILIA,
+                'parent_id': None,
+                'synonyms': {'other_key': i},
+                'mptt_left': 0,
+                'mptt_right': 0,
+                'mptt_tree_id': 0,
+                'mptt_depth': 0,
+            } for i in range(3)
+        ]
+        with Connector.get_connection() as connection:
+            connection.execute(niamoto_db_meta.taxon.insert().values(data))
+        synonyms = pd.DataFrame({
+            'taxon_id': [0, 1, 2],
+            'provider_taxon_id': [10, 20, None],
+        })
+        nb = TaxonomyManager.set_synonym_data(synonym_key, synonyms)
+        self.assertEqual(nb, 2)
+        df = TaxonomyManager.get_raw_taxon_dataframe()
+        self.assertEqual(
+            df.loc[0]['synonyms'],
+            {'other_key': 0, synonym_key: 10}
+        )
+        self.assertEqual(df.loc[2]['synonyms'], {'other_key': 2})
+        # Synonyms exchanged between taxa
+        synonyms = pd.DataFrame({
+            'taxon_id': [0, 1],
+            'provider_taxon_id': [20, 10],
+        })
+        TaxonomyManager.set_synonym_data(synonym_key, synonyms)
+        mapping = TaxonomyManager.get_synonyms_for_key(synonym_key)
+        self.assertEqual(mapping.loc[20], 0)
+        self.assertEqual(mapping.loc[10], 1)
+        # Invalid data
+        invalid = [
+            {'taxon_id': [0, 0], 'provider_taxon_id': [30, 40]},
+            {'taxon_id': [0, 1], 'provider_taxon_id': [30, 30]},
+            {'taxon_id': [5], 'provider_taxon_id': [30]},
+            {'taxon_id': [2], 'provider_taxon_id': [10]},
+            {'taxon_id': [2]},
+        ]
+        for d in invalid:
+            self.assertRaises(
+                MalformedDataSourceError,
+                TaxonomyManager.set_synonym_data,
+                synonym_key,
+                pd.DataFrame(d),
+            )
+        self.assertRaises(
+            NoRecordFoundError,
+            TaxonomyManager.set_synonym_data,
+            "unknown_key",
+            synonyms,
+        )
+        # Replace
+        synonyms = pd.DataFrame({
+            'taxon_id': [2],
+            'provider_taxon_id': [10],
+        })
+        nb = TaxonomyManager.set_synonym_data(
+            synonym_key,
+            synonyms,
+            replace=True
+        )
+        self.assertEqual(nb, 1)
+        mapping = TaxonomyManager.get_synonyms_for_key(synonym_key)
+        self.assertEqual(mapping.to_dict(), {10: 2})
+
+    def test_map_occurrence_synonyms(self):
+        synonym_key = "synonym_key_1"
+        TaxonomyManager.register_synonym_key(synonym_key)
+        data = [
+            {
+                'id': 0,
+                'full_name': 'Family One',
+                'rank_name': 'One',
+                'rank': niamoto_db_meta.TaxonRankEnum.FAMILIA,
+                'parent_id': None,
+                'synonyms': {
+                    synonym_key: 10,
+                },
+                'mptt_left': 0,
+                'mptt_right': 0,
+                'mptt_tree_id': 0,
+                'mptt_depth': 0,
+            },
+            {
+                'id': 1,
+                'full_name': 'Family Two',
+                'rank_name': 'Two',
+                'rank': niamoto_db_meta.TaxonRankEnum.FAMILIA,
+                'parent_id': None,
+                'synonyms': {
+                    synonym_key: 20,
+                },
+                'mptt_left': 0,
+                'mptt_right': 0,
+                'mptt_tree_id': 0,
+                'mptt_depth': 0,
+            },
+        ]
+        data_provider_1 = TestDataProvider.update_data_provider(
+            'test_data_provider_1',
+            synonym_key=synonym_key
+        )
+        data_provider_2 = TestDataProvider('test_data_provider_2')
+        occurrences = [
+            {
+                'id': i,
+                'provider_id': provider.db_id,
+                'provider_pk': i,
+                'provider_taxon_id': provider_taxon_id,
+                'taxon_id': taxon_id,
+                'location': 'SRID=4326;POINT(166.551 -22.098)',
+                'properties': {},
+            } for i, (provider, provider_taxon_id, taxon_id) in enumerate([
+                (data_provider_1, 10, None),
+                (data_provider_1, 20, 0),
+                (data_provider_1, 30, 1),
+                (data_provider_2, 10, 0),
+            ])
+        ]
+        with Connector.get_connection() as connection:
+            connection.execute(niamoto_db_meta.taxon.insert().values(data))
+            connection.execute(
+                niamoto_db_meta.occurrence.insert().values(occurrences)
+            )
+        try:
+            stats = TaxonomyManager.map_occurrence_synonyms()
+            self.assertEqual(stats.loc[data_provider_1.db_id, 'mapped'], 2)
+            self.assertEqual(stats.loc[data_provider_1.db_id, 'total'], 3)
+            # No synonym key: the occurrences are not mapped
+            self.assertEqual(stats.loc[data_provider_2.db_id, 'mapped'], 0)
+            with Connector.get_connection() as connection:
+                taxon_ids = dict(connection.execute(
+                    select([
+                        niamoto_db_meta.occurrence.c.id,
+                        niamoto_db_meta.occurrence.c.taxon_id,
+                    ])
+                ).fetchall())
+            self.assertEqual(taxon_ids, {0: 0, 1: 1, 2: None, 3: None})
+            # Restricted to a single provider
+            stats = TaxonomyManager.map_occurrence_synonyms(
+                provider_ids=[data_provider_2.db_id]
+            )
+            self.assertEqual(list(stats.index), [data_provider_2.db_id])
+        finally:
+            with Connector.get_connection() as connection:
+                connection.execute(niamoto_db_meta.occurrence.delete())
+            TestDataProvider.update_data_provider('test_data_provider_1')
+
     def test_get_synonym_key(self):
         self.assertRaises(
             NoRecordFoundError,